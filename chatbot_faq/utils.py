@@ -1,6 +1,5 @@
-import requests
-import time
 from django.conf import settings
+from webapp import http_client
 from google import genai
 from google.genai import types
 
@@ -36,22 +35,20 @@ def get_embedding(text):
     # PERBAIKAN PENTING UNTUK MODEL E5:
 
     payload = {"inputs": [text]} 
-    for attempt in range(3):
-        try:
-            response = requests.post(HF_EMBED_URL, headers=headers, json=payload, timeout=20)
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, list):
-                    if len(data) > 0 and isinstance(data[0], list): return data[0]
-                return data
-            elif response.status_code == 503:
-                time.sleep(5)
-                continue
-            else:
-                print(f"API Error {response.status_code}: {response.text}")
-                return None
-        except Exception as e:
-            print(f"Connection Error: {e}")
+    # Retry 503 (model loading) + backoff + circuit breaker diurus http_client,
+    # jadi worker tidak lagi tidur 5 detik per percobaan.
+    try:
+        response = http_client.post('embed', HF_EMBED_URL, headers=headers, json=payload)
+        if response.status_code == 200:
+            data = response.json()
+            if isinstance(data, list):
+                if len(data) > 0 and isinstance(data[0], list): return data[0]
+            return data
+        print(f"API Error {response.status_code}: {response.text}")
+    except http_client.CircuitOpenError as e:
+        print(f"⏭️ {e}, embedding dilewati")
+    except Exception as e:
+        print(f"Connection Error: {e}")
             
     return None
 # --- FUNGSI CHAT BARU (GEMINI) ---
@@ -7,9 +7,11 @@ from django.db.models import Q
 from django.shortcuts import render
 from .models import ChatMessage, KnowledgeChunk
 from .utils import get_embedding, generate_response_huggingface
+from webapp.ratelimit import rate_limit
 
 @login_required
 @require_POST
+@rate_limit('chat', limit=20, period=60, message='Terlalu banyak pesan. Tunggu sebentar sebelum bertanya lagi.')
 def chat_api(request):
     user_query = request.POST.get('message')
     
@@ -4,6 +4,7 @@ from django.utils import timezone
 import datetime
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from allauth.socialaccount.signals import social_account_added, social_account_updated, social_account_removed
 
 # Create your models here.
 # 1. Profile untuk User (Menangani Guest & Avatar)
@@ -12,6 +13,8 @@ class Profile(models.Model):
     is_guest = models.BooleanField(default=False)
     avatar_animal = models.CharField(max_length=50, blank=True, null=True)
     avatar_image = models.ImageField(upload_to='profile_avatars/', blank=True, null=True)
+    # Dinaikkan setiap avatar berubah; bagian dari key cache avatar (profiles/utils.py)
+    avatar_version = models.PositiveIntegerField(default=0)
     def __str__(self):
         return self.user.username
 
@@ -28,4 +31,14 @@ class OTPRequest(models.Model):
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+        Profile.objects.create(user=instance)
+
+@receiver(social_account_added)
+@receiver(social_account_updated)
+@receiver(social_account_removed)
+def invalidate_social_avatar(sender, request, sociallogin=None, socialaccount=None, **kwargs):
+    # Login / connect Google bisa membawa foto profil baru -> cache avatar user dibuang
+    account = socialaccount or (sociallogin.account if sociallogin else None)
+    if account is not None and account.user_id:
+        from .utils import invalidate_avatar
+        invalidate_avatar(account.user_id)
@@ -2,6 +2,9 @@ import random
 import string
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import F
+from webapp import metrics
 from .models import Profile, OTPRequest
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
@@ -76,27 +79,133 @@ def send_otp_email(email_tujuan):
         print(f"🔥 Gagal mengirim OTP: {e}")
         return False
 
-def get_avatar_url(user):
+# Avatar Google disimpan di cache per user; key ikut Profile.avatar_version, jadi
+# bump versi (invalidate_avatar) langsung berlaku di semua worker tanpa hapus cache.
+AVATAR_CACHE_TTL = 24 * 3600
+
+
+def _avatar_cache_key(user_id, version):
+    return f"avatar:{user_id}:{version}"
+
+
+def _social_avatar_urls(user_ids):
+    """URL avatar social account pertama per user, satu query untuk semua user."""
     try:
-        # Cek Profile
-        prof = getattr(user, 'profile', None)
-        
-        # PRIORITAS 1: Foto Upload Manual
-        if prof and prof.avatar_image:
-            return prof.avatar_image.url
-            
-        # PRIORITAS 2: Google Social Account
-        # Kita import di dalam fungsi agar aman
+        from allauth.socialaccount import providers
         from allauth.socialaccount.models import SocialAccount
-        sa = SocialAccount.objects.filter(user=user).first()
-        if sa:
-            return sa.get_avatar_url()
-            
-        # PRIORITAS 3: Avatar Hewan
-        if prof and prof.avatar_animal:
-            return f"/static/account/img/{prof.avatar_animal}.svg"
-            
-    except Exception:
-        pass
-        
-    return ""
\ No newline at end of file
+    except ImportError:
+        return {}
+
+    urls = {}
+    for account in SocialAccount.objects.filter(user_id__in=user_ids).order_by('pk'):
+        if account.user_id in urls:
+            continue
+        try:
+            # Bungkus langsung dengan class akun provider (tanpa lookup SocialApp ke DB)
+            provider_class = providers.registry.get_class(account.provider)
+            urls[account.user_id] = provider_class.account_class(account).get_avatar_url() or ''
+        except Exception:
+            urls[account.user_id] = ''
+    return urls
+
+
+def get_avatar_urls(users):
+    """
+    {user.id: url avatar} untuk banyak user sekaligus, maksimal 2 query:
+    Profile (dilewati kalau sudah select_related('profile')) dan SocialAccount
+    (hanya user yang cache avatarnya miss).
+
+    Prioritas: foto upload manual -> avatar Google -> avatar hewan -> "".
+    """
+    users = list({user.pk: user for user in users if user is not None and user.pk}.values())
+    if not users:
+        return {}
+
+    profiles = {}
+    unloaded = []
+    for user in users:
+        if User.profile.is_cached(user):
+            profiles[user.pk] = getattr(user, 'profile', None)
+        else:
+            unloaded.append(user.pk)
+    if unloaded:
+        for profile in Profile.objects.filter(user_id__in=unloaded):
+            profiles[profile.user_id] = profile
+
+    entries = {}
+    for user in users:
+        prof = profiles.get(user.pk)
+        if prof is None:
+            entries[user.pk] = ('', None, 0)
+        else:
+            entries[user.pk] = (prof.avatar_image.url if prof.avatar_image else '', prof.avatar_animal, prof.avatar_version)
+    return _resolve_avatars(entries)
+
+
+def avatar_urls_from_values(rows):
+    """
+    Sama seperti get_avatar_urls, untuk hasil .values() (tanpa model instance).
+    Setiap row butuh key user_id, avatar_image, avatar_animal, avatar_version
+    (kolom Profile, boleh None kalau user tidak punya profile).
+    """
+    storage = Profile._meta.get_field('avatar_image').storage
+    return _resolve_avatars({
+        row['user_id']: (
+            storage.url(row['avatar_image']) if row.get('avatar_image') else '',
+            row.get('avatar_animal'),
+            row.get('avatar_version') or 0,
+        )
+        for row in rows if row.get('user_id')
+    })
+
+
+def _resolve_avatars(entries):
+    """entries: {user_id: (url_upload, avatar_animal, avatar_version)} -> {user_id: url}"""
+    result = {}
+    keys = {}
+    for user_id, (upload_url, _, version) in entries.items():
+        # PRIORITAS 1: Foto Upload Manual
+        if upload_url:
+            result[user_id] = upload_url
+        else:
+            keys[user_id] = _avatar_cache_key(user_id, version)
+
+    # PRIORITAS 2: Google Social Account (dari cache, sisanya satu query)
+    cached = cache.get_many(list(keys.values())) if keys else {}
+    misses = [user_id for user_id, key in keys.items() if key not in cached]
+    metrics.incr('avatar_cache.hit', len(keys) - len(misses))
+    metrics.incr('avatar_cache.miss', len(misses))
+    if misses:
+        fetched = _social_avatar_urls(misses)
+        fresh = {keys[user_id]: fetched.get(user_id, '') for user_id in misses}
+        cache.set_many(fresh, AVATAR_CACHE_TTL)
+        cached.update(fresh)
+
+    for user_id, key in keys.items():
+        url = cached.get(key)
+        if not url:
+            # PRIORITAS 3: Avatar Hewan
+            animal = entries[user_id][1]
+            url = f"/static/account/img/{animal}.svg" if animal else ""
+        result[user_id] = url
+    return result
+
+
+def get_avatar_url(user):
+    return get_avatar_urls([user]).get(getattr(user, 'pk', None), "")
+
+
+def invalidate_avatar(user_id):
+    """Naikkan versi avatar user (setelah ganti foto / login social) supaya cache lama tidak dipakai."""
+    Profile.objects.filter(user_id=user_id).update(avatar_version=F('avatar_version') + 1)
+
+
+def avatar_cache_stats():
+    return {
+        'hits': metrics.get('avatar_cache.hit'),
+        'misses': metrics.get('avatar_cache.miss'),
+        'hit_ratio': metrics.ratio('avatar_cache.hit', 'avatar_cache.miss'),
+    }
+
+
+metrics.register('avatar_cache', avatar_cache_stats)
@@ -3,51 +3,63 @@ from django.http import JsonResponse
 from django.contrib.auth import login, logout
 from django.contrib.auth.models import User
 from django.views.decorators.http import require_POST
+from django.conf import settings
 from .utils import create_guest_account, send_otp_email
 from .models import OTPRequest
 from reports.models import Report
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.csrf import csrf_exempt
-from .utils import get_avatar_url
+from .utils import get_avatar_urls, invalidate_avatar
+from django.db.models import Count, Max, Sum
+from webapp.conditional import conditional_view
+from webapp.ratelimit import rate_limit, client_ip, user_or_session
 
 # Helper function agar kita tidak menulis ulang logika avatar berulang kali
 def attach_report_metadata(report_list):
+    # Avatar semua author di-resolve sekaligus (maksimal 2 query, lihat profiles/utils.py)
+    avatars = get_avatar_urls([r.author for r in report_list])
     for r in report_list:
         # 1. Logika Nama
         author_name = r.author.get_full_name() or r.author.username
-        author_avatar_url = get_avatar_url(r.author)
+        author_avatar_url = avatars.get(r.author_id, "")
 
         # Tempel atribut ke objek report (PENTING!)
         setattr(r, 'author_display_name', author_name)
         setattr(r, 'author_avatar_url', author_avatar_url)
-        
-        # 3. Logika Reaction Counts (Karena models.py property dihapus)
-        # Ambil semua reaction dari prefetch (pastikan view memanggil prefetch)
-        # Jika tidak di prefetch, ini akan lambat (N+1 query)
-        all_reactions = r.reactions.all()
-        
-        r.agree_count = sum(1 for x in all_reactions if x.type == 'agree')
-        r.support_count = sum(1 for x in all_reactions if x.type == 'support')
-        r.sad_count = sum(1 for x in all_reactions if x.type == 'sad')
-        r.shock_count = sum(1 for x in all_reactions if x.type == 'shock')
-        r.confused_count = sum(1 for x in all_reactions if x.type == 'confused')
-        r.total_reactions_count = len(all_reactions)
+        # Counter reaction (agree_count, ..., total_reactions) sudah kolom di Report
+
+def _profile_state(user, reports):
+    # Validator conditional GET: 1 aggregate atas laporan user + data profil yang tampil
+    # (updated_at naik di setiap save, update status / enrichment dan toggle reaction)
+    profile = getattr(user, 'profile', None)
+    stats = reports.aggregate(count=Count('id'), last=Max('updated_at'), impact=Sum('total_reactions'))
+    return (
+        user.pk, user.username, user.first_name, user.email,
+        getattr(profile, 'avatar_version', None), getattr(profile, 'is_guest', None),
+        tuple(stats.values()),
+    )
+
+def _own_profile_state(request):
+    return _profile_state(request.user, Report.objects.filter(author=request.user))
+
+def _public_profile_state(request, username):
+    target_user = get_object_or_404(User.objects.select_related('profile'), username=username)
+    return _profile_state(target_user, Report.objects.public().filter(author=target_user))
 
 # --- VIEWS UTAMA ---
 
 @login_required
+@conditional_view('profile', _own_profile_state)
 def profile_view(request):
-    # Gunakan prefetch_related('reactions') agar hitungan reaction cepat
     user_reports = Report.objects.filter(author=request.user)\
-                                .select_related('author')\
-                                .prefetch_related('reactions')\
+                                .select_related('author', 'author__profile')\
                                 .order_by('-created_at')
     
     # JALANKAN HELPER DI SINI
     attach_report_metadata(user_reports)
     
     total_reports = user_reports.count()
-    total_impact = sum(r.total_reactions_count for r in user_reports)
+    total_impact = sum(r.total_reactions for r in user_reports)
 
     context = {
         'profile_user': request.user,
@@ -57,20 +69,20 @@ def profile_view(request):
     }
     return render(request, 'account/profile.html', context)
 
+@conditional_view('public_profile', _public_profile_state)
 def public_profile_view(request, username):
     target_user = get_object_or_404(User, username=username)
     
-    # Gunakan prefetch_related('reactions')
-    user_reports = Report.objects.filter(author=target_user)\
-                                .select_related('author')\
-                                .prefetch_related('reactions')\
+    # Profil publik hanya menampilkan laporan yang lolos screening
+    user_reports = Report.objects.public().filter(author=target_user)\
+                                .select_related('author', 'author__profile')\
                                 .order_by('-created_at')
 
     # JALANKAN HELPER DI SINI
     attach_report_metadata(user_reports)
 
     total_reports = user_reports.count()
-    total_impact = sum(r.total_reactions_count for r in user_reports)
+    total_impact = sum(r.total_reactions for r in user_reports)
     is_me = (request.user == target_user)
 
     context = {
@@ -89,8 +101,14 @@ def guest_login_view(request):
     return redirect('home') # Ganti dengan nama url home Anda
 
 
+def _otp_email(request):
+    email = (request.POST.get('email') or '').strip().lower()
+    return f"email:{email}" if email else ''
+
+
 @csrf_exempt
 @require_POST
+@rate_limit('guest_login', limit=settings.RATELIMIT_GUEST_LOGIN_PER_HOUR, period=3600, key=client_ip)
 def guest_login_api(request):
     """API endpoint for JS to create a guest account and login.
 
@@ -111,6 +129,11 @@ def guest_login_api(request):
 
 # === 2. REQUEST OTP (AJAX) ===
 @require_POST
+@rate_limit('otp_ip', limit=settings.RATELIMIT_OTP_IP_PER_HOUR, period=3600, key=client_ip)
+@rate_limit('otp_session', limit=settings.RATELIMIT_OTP_SESSION_PER_10_MIN, period=600, key=user_or_session,
+            message='Terlalu sering meminta OTP. Coba lagi beberapa menit lagi.')
+@rate_limit('otp_email', limit=settings.RATELIMIT_OTP_EMAIL_PER_10_MIN, period=600, key=_otp_email,
+            message='Terlalu sering meminta OTP untuk email ini. Coba lagi beberapa menit lagi.')
 def request_otp_view(request):
     email = request.POST.get('email')
     if not email:
@@ -222,5 +245,6 @@ def update_profile_api(request):
         profile.avatar_animal = None 
         
         profile.save()
+        invalidate_avatar(user.id)
 
     return JsonResponse({'status': 'success', 'message': 'Profil berhasil diperbarui!'})
\ No newline at end of file
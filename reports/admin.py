@@ -1,23 +1,171 @@
 from django.contrib import admin
-from .models import Report
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, FloatField, Q, Sum
+from django.http import HttpResponseRedirect
+from django.urls import reverse
+from django.utils import timezone
+from .models import Report, ModerationVerdict, AttachmentImageHash, GeminiResponseCache, ModerationTrace
+from . import verdict_cache, image_hash, gemini_cache, search
 # Register your models here.
 @admin.action(description='✅ Set Status to Verified (Tampilkan di Web)')
 def make_verified(modeladmin, request, queryset):
-    queryset.update(status='verified')
+    # updated_at ikut diubah supaya cache kartu feed memakai status baru
+    queryset.update(status='verified', updated_at=timezone.now())
 
 @admin.action(description='❌ Set Status to Rejected (Tolak Laporan)')
 def make_rejected(modeladmin, request, queryset):
-    queryset.update(status='rejected')
+    queryset.update(status='rejected', updated_at=timezone.now())
+
+@admin.action(description='🖼️ Cari laporan dengan gambar yang sama')
+def find_same_image(modeladmin, request, queryset):
+    report_ids = image_hash.reports_sharing_image(list(queryset.values_list('id', flat=True)))
+    if not report_ids:
+        modeladmin.message_user(request, "Laporan yang dipilih tidak punya lampiran gambar ber-hash.")
+        return None
+    url = reverse('admin:reports_report_changelist')
+    return HttpResponseRedirect(f"{url}?id__in={','.join(str(i) for i in report_ids)}")
 
 class ReportAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'category', 'status', 'created_at')
+    list_display = ('title', 'author', 'category', 'status', 'total_reactions', 'created_at')
     list_filter = ('status', 'category', 'created_at')
     search_fields = ('title', 'description', 'author__username')
     
     # Tombol Action Massal
-    actions = [make_verified, make_rejected]
+    actions = [make_verified, make_rejected, find_same_image]
+
+    def get_search_results(self, request, queryset, search_term):
+        # PostgreSQL: judul / ringkasan / deskripsi lewat index GIN (bukan icontains seq scan),
+        # username author tetap dicocokkan persis
+        term = search.clean_query(search_term)
+        if term and connection.vendor == 'postgresql':
+            matched, _ = search.match(Report.objects.all(), term)
+            return queryset.filter(Q(pk__in=matched.values('pk')) | Q(author__username=term)), False
+        return super().get_search_results(request, queryset, search_term)
     
     # Biar admin bisa lihat foto attachment langsung (Opsional, butuh library tambahan biasanya)
     # Tapi defaultnya akan muncul link file.
 
-admin.site.register(Report, ReportAdmin)
\ No newline at end of file
+admin.site.register(Report, ReportAdmin)
+
+@admin.action(description='🧹 Hapus entry cache kadaluarsa / kelebihan')
+def evict_cache(modeladmin, request, queryset):
+    # Dipakai admin tabel cache (verdict, Gemini); modeladmin.db_cache = DBCache tabelnya
+    expired, overflow = modeladmin.db_cache.evict()
+    modeladmin.message_user(request, f"{expired} entry kadaluarsa dan {overflow} entry kelebihan dihapus.")
+
+@admin.register(ModerationVerdict)
+class ModerationVerdictAdmin(admin.ModelAdmin):
+    list_display = ('fingerprint_short', 'endpoint', 'score', 'hits', 'sample', 'created_at', 'last_hit_at')
+    list_filter = ('endpoint',)
+    search_fields = ('fingerprint', 'sample')
+    ordering = ('-hits',)
+    actions = [evict_cache]
+    db_cache = verdict_cache.cache
+    readonly_fields = ('fingerprint', 'endpoint', 'score', 'hits', 'sample', 'created_at', 'last_hit_at')
+
+    @admin.display(description='Fingerprint')
+    def fingerprint_short(self, obj):
+        return obj.fingerprint[:12]
+
+    def changelist_view(self, request, extra_context=None):
+        # Efektivitas cache: setiap baris = 1 miss yang tersimpan, hits = panggilan HF yang dihemat
+        per_endpoint = ModerationVerdict.objects.values('endpoint')\
+                                                .annotate(entries=Count('id'), total_hits=Sum('hits'))\
+                                                .order_by('endpoint')
+        summary = []
+        for row in per_endpoint:
+            hits = row['total_hits'] or 0
+            summary.append({
+                'endpoint': row['endpoint'],
+                'entries': row['entries'],
+                'hits': hits,
+                'hit_ratio': round(hits / (hits + row['entries']), 3) if hits + row['entries'] else 0,
+            })
+        extra_context = {**(extra_context or {}), 'verdict_summary': summary, 'worker_stats': verdict_cache.stats()}
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(AttachmentImageHash)
+class AttachmentImageHashAdmin(admin.ModelAdmin):
+    list_display = ('phash_hex', 'report', 'nsfw_score', 'created_at')
+    list_select_related = ('report', 'report__author')
+    search_fields = ('report__title',)
+    readonly_fields = ('report', 'phash', 'band0', 'band1', 'band2', 'band3', 'nsfw_score', 'created_at')
+
+    @admin.display(description='dHash')
+    def phash_hex(self, obj):
+        return f"{image_hash.to_unsigned(obj.phash):016x}"
+
+    def get_search_results(self, request, queryset, search_term):
+        # Cari pakai hash hex (16 digit) -> semua gambar dalam jarak Hamming kecil
+        term = search_term.strip().lower()
+        if len(term) == 16:
+            try:
+                value = int(term, 16)
+            except ValueError:
+                pass
+            else:
+                ids = [row.id for row in image_hash.find_similar(value)]
+                return queryset.filter(id__in=ids), False
+        return super().get_search_results(request, queryset, search_term)
+
+
+@admin.register(GeminiResponseCache)
+class GeminiResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ('key_short', 'model', 'prompt_version', 'hits', 'created_at', 'last_hit_at')
+    list_filter = ('model', 'prompt_version')
+    search_fields = ('key',)
+    ordering = ('-hits',)
+    actions = [evict_cache]
+    db_cache = gemini_cache.cache
+    readonly_fields = ('key', 'response', 'model', 'prompt_version', 'hits', 'created_at', 'last_hit_at')
+
+    @admin.display(description='Key')
+    def key_short(self, obj):
+        return obj.key[:12]
+
+
+class Percentile(Aggregate):
+    """percentile_cont(p) WITHIN GROUP (ORDER BY expr), khusus PostgreSQL."""
+    function = 'PERCENTILE_CONT'
+    name = 'Percentile'
+    output_field = FloatField()
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+@admin.register(ModerationTrace)
+class ModerationTraceAdmin(admin.ModelAdmin):
+    list_display = ('stage', 'duration_ms', 'outcome', 'cache', 'score', 'error_class', 'report', 'created_at')
+    list_filter = ('created_at', 'stage', 'outcome', 'cache')
+    list_select_related = ('report', 'report__author')
+    search_fields = ('trace_id', 'report__title')
+    date_hierarchy = 'created_at'
+    readonly_fields = ('trace_id', 'report', 'stage', 'duration_ms', 'outcome', 'score', 'cache', 'error_class', 'created_at')
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context=extra_context)
+        try:
+            # Queryset changelist sudah terfilter (rentang waktu, stage, outcome, ...)
+            queryset = response.context_data['cl'].queryset
+        except (AttributeError, KeyError):
+            return response
+
+        if connection.vendor != 'postgresql':
+            response.context_data['latency_error'] = 'Dashboard persentil butuh PostgreSQL (percentile_cont).'
+            return response
+
+        # Satu query GROUP BY stage, semua persentil dihitung di database
+        response.context_data['latency_summary'] = queryset.order_by().values('stage').annotate(
+            count=Count('id'),
+            avg=Avg('duration_ms'),
+            p50=Percentile('duration_ms', 0.50),
+            p95=Percentile('duration_ms', 0.95),
+            p99=Percentile('duration_ms', 0.99),
+            errors=Count('id', filter=Q(outcome__in=['error', 'timeout', 'fallback']) | Q(outcome__startswith='5')),
+            cache_hits=Count('id', filter=Q(cache__in=['hit', 'prefilter'])),
+            cache_lookups=Count('id', filter=~Q(cache='')),
+        ).order_by('-p95')
+        return response
@@ -1,6 +1,11 @@
+import os
+
 # --- CONFIGURATION API huggingface and token---
 # Use the HF router host for inference. Hugging Face has moved to the router
-# endpoint for many setups; if you have a custom router, replace these URLs.
-HF_API_URL_SPAM = "https://router.huggingface.co/hf-inference/models/mrm8488/bert-tiny-finetuned-sms-spam-detection"
-HF_API_URL_TOXIC = "https://router.huggingface.co/hf-inference/models/unitary/multilingual-toxic-xlm-roberta"
-HF_API_URL_NSFW = "https://router.huggingface.co/hf-inference/models/Falconsai/nsfw_image_detection"
\ No newline at end of file
+# endpoint for many setups; if you have a custom router, set HF_ROUTER_URL
+# (juga dipakai bench_submit untuk mengarahkan ke stub server lokal).
+HF_ROUTER_URL = os.getenv('HF_ROUTER_URL', 'https://router.huggingface.co').rstrip('/')
+
+HF_API_URL_SPAM = f"{HF_ROUTER_URL}/hf-inference/models/mrm8488/bert-tiny-finetuned-sms-spam-detection"
+HF_API_URL_TOXIC = f"{HF_ROUTER_URL}/hf-inference/models/unitary/multilingual-toxic-xlm-roberta"
+HF_API_URL_NSFW = f"{HF_ROUTER_URL}/hf-inference/models/Falconsai/nsfw_image_detection"
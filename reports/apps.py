@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReportsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reports'
+
+    def ready(self):
+        # Tabel rate limiter (UNLOGGED di PostgreSQL) tidak punya model, dibuat setelah migrate
+        from webapp.ratelimit import create_table
+        post_migrate.connect(create_table, sender=self, dispatch_uid='ratelimit_create_table')
+
+        # Generated column tsvector + index GIN untuk pencarian (PostgreSQL saja)
+        from .search import create_search_column
+        post_migrate.connect(create_search_column, sender=self, dispatch_uid='report_search_column')
@@ -0,0 +1,113 @@
+"""
+Fragment cache HTML kartu laporan (reports/report_post.html) untuk feed.
+
+Bagian kartu yang sama untuk semua pembaca (judul, deskripsi + linebreaks,
+ringkasan AI, lampiran, counter reaction) dirender sekali lalu disimpan di
+cache. Key-nya memuat updated_at, semua counter reaction, avatar/nama author
+dan host, jadi save() laporan, update status/enrichment dan toggle reaction
+otomatis memakai key baru di semua worker tanpa perlu hapus cache manual.
+
+Bagian yang bergantung pada pembaca / waktu ditempel belakangan (overlay)
+dengan penanda yang tidak mungkin muncul dari konten user (sudah di-escape):
+- `<!--card:timesince-->` -> "5 menit" (timesince dihitung per request)
+- tombol reaction milik pembaca diberi class `active`
+- akun guest: tombol diberi `data-guest-restricted` (JS langsung buka modal OTP)
+"""
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.timesince import timesince
+from webapp import metrics
+from .models import Reaction, REACTION_COUNT_FIELDS
+
+TIMESINCE_MARKER = '<!--card:timesince-->'
+REACTION_BUTTON = 'class="btn btn-sm btn-reaction" data-reaction="{}"'
+GUEST_MARKER = 'data-reaction="'
+
+
+def _card_key(report, host):
+    counts = '-'.join(str(getattr(report, field)) for field in (*REACTION_COUNT_FIELDS.values(), 'total_reactions'))
+    state = '|'.join([
+        report.updated_at.isoformat(),
+        counts,
+        getattr(report, 'author_avatar_url', ''),
+        getattr(report, 'author_display_name', ''),
+        host,
+    ])
+    return f"card:{report.pk}:{hashlib.sha1(state.encode()).hexdigest()[:16]}"
+
+
+def _viewer_reactions(request, report_ids):
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated or not report_ids:
+        return {}
+    return dict(Reaction.objects.filter(user=user, report_id__in=report_ids).values_list('report_id', 'type'))
+
+
+def _is_guest(request):
+    user = getattr(request, 'user', None)
+    profile = getattr(user, 'profile', None) if user is not None and user.is_authenticated else None
+    return bool(profile and profile.is_guest)
+
+
+def _overlay(html, report, reaction, guest):
+    html = html.replace(TIMESINCE_MARKER, timesince(report.created_at))
+    if reaction:
+        button = REACTION_BUTTON.format(reaction)
+        html = html.replace(button, button.replace('btn-reaction"', 'btn-reaction active"'))
+    if guest:
+        html = html.replace(GUEST_MARKER, 'data-guest-restricted ' + GUEST_MARKER)
+    return html
+
+
+def render_cards(reports, request):
+    """HTML semua kartu (urut sesuai `reports`), dari cache kalau ada."""
+    if not reports:
+        return mark_safe('')
+
+    host = f"{request.scheme}://{request.get_host()}"
+    keys = {report.pk: _card_key(report, host) for report in reports}
+    cached = cache.get_many(list(keys.values()))
+
+    fresh = {}
+    render_ms = 0.0
+    for report in reports:
+        key = keys[report.pk]
+        if key in cached or key in fresh:
+            continue
+        started = time.perf_counter()
+        fresh[key] = render_to_string('reports/report_post.html', {'report': report, 'card_cache': True}, request=request)
+        render_ms += (time.perf_counter() - started) * 1000
+    if fresh:
+        cache.set_many(fresh, getattr(settings, 'CARD_CACHE_TTL', 3600))
+        cached.update(fresh)
+
+    metrics.incr('card_cache.hit', len(reports) - len(fresh))
+    metrics.incr('card_cache.miss', len(fresh))
+    metrics.incr('card_cache.render_ms', render_ms)
+
+    reactions = _viewer_reactions(request, list(keys))
+    guest = _is_guest(request)
+    return mark_safe(''.join(
+        _overlay(cached[keys[report.pk]], report, reactions.get(report.pk), guest) for report in reports
+    ))
+
+
+def stats():
+    hits, misses = metrics.get('card_cache.hit'), metrics.get('card_cache.miss')
+    render_ms = metrics.get('card_cache.render_ms')
+    avg_render_ms = render_ms / misses if misses else 0.0
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': metrics.ratio('card_cache.hit', 'card_cache.miss'),
+        'avg_render_ms': round(avg_render_ms, 2),
+        # Perkiraan waktu render yang dihemat: setiap hit = satu render rata-rata
+        'render_ms_saved': round(hits * avg_render_ms, 1),
+    }
+
+
+metrics.register('card_cache', stats)
@@ -0,0 +1,57 @@
+"""
+TTL, hit counter dan eviction untuk tabel cache di DB.
+
+Dipakai verdict cache moderasi (ModerationVerdict) dan cache respons Gemini
+(GeminiResponseCache). Model cukup punya kolom `created_at`, `hits` dan
+`last_hit_at`; TTL dan batas jumlah baris dibaca dari settings
+`<PREFIX>_TTL` / `<PREFIX>_MAX_ROWS`.
+"""
+import random
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+# Eviction dijalankan sesekali saat insert, bukan di setiap request
+EVICT_PROBABILITY = 0.01
+
+
+class DBCache:
+    def __init__(self, model, setting_prefix, default_ttl, default_max_rows):
+        self.model = model
+        self.setting_prefix = setting_prefix
+        self.default_ttl = default_ttl
+        self.default_max_rows = default_max_rows
+
+    def ttl(self):
+        return timedelta(seconds=getattr(settings, f'{self.setting_prefix}_TTL', self.default_ttl))
+
+    def expiry(self):
+        """Entry dengan created_at sebelum waktu ini sudah kadaluarsa."""
+        return timezone.now() - self.ttl()
+
+    def fresh(self):
+        return self.model.objects.filter(created_at__gte=self.expiry())
+
+    def record_hits(self, queryset):
+        queryset.update(hits=F('hits') + 1, last_hit_at=timezone.now())
+
+    def maybe_evict(self):
+        if random.random() < EVICT_PROBABILITY:
+            self.evict()
+
+    def evict(self, max_rows=None):
+        """Hapus entry kadaluarsa, lalu yang paling lama tidak terpakai jika melebihi batas."""
+        if max_rows is None:
+            max_rows = getattr(settings, f'{self.setting_prefix}_MAX_ROWS', self.default_max_rows)
+        objects = self.model.objects
+
+        expired, _ = objects.filter(created_at__lt=self.expiry()).delete()
+
+        overflow = 0
+        total = objects.count()
+        if total > max_rows:
+            stale = objects.order_by(F('last_hit_at').asc(nulls_first=True), 'created_at')\
+                           .values_list('pk', flat=True)[:total - max_rows]
+            overflow, _ = objects.filter(pk__in=list(stale)).delete()
+        return expired, overflow
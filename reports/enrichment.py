@@ -0,0 +1,169 @@
+"""
+Enrichment Gemini (ai_summary, sentiment_score, judul yang lebih baik)
+setelah laporan tersimpan.
+
+Laporan langsung disimpan dengan judul dari user; screening mendaftarkan
+enqueue() lewat transaction.on_commit. Dua mode (settings.ENRICHMENT_INLINE):
+
+- Inline (default kalau screening juga inline, mis. Vercel): Gemini dipanggil
+  di request itu sendiri dengan retry terbatas. Di serverless, thread yang
+  masih jalan setelah response dikirim ikut dibekukan / dimatikan bersama
+  lambda, jadi thread pool di bawah tidak bisa diandalkan.
+- Thread pool: Gemini dipanggil di thread terpisah setelah commit dan tidak
+  menahan submission / worker moderasi. HANYA untuk proses yang hidup lama
+  (gunicorn, runserver, moderation_worker); antriannya ada di memori proses,
+  jadi hilang kalau proses restart.
+
+Error kuota (429) dan 5xx di-retry dengan exponential backoff; kalau tetap
+gagal, field AI dibiarkan kosong dan diisi nanti oleh
+`python manage.py enrich_reports` (jadwalkan berkala, mis. cron).
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from webapp import metrics
+from . import tracing
+from .models import Report
+from .gemini_utils import request_report_metadata, request_batch_metadata, is_retryable_error
+
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'ENRICHMENT_MAX_WORKERS', 2),
+    thread_name_prefix='enrichment',
+)
+
+# Gauge: laporan yang sudah di-enqueue tapi belum selesai di thread pool proses ini
+# (bukan backlog global; itu Report.objects.needs_enrichment())
+_queue_depth = 0
+_queue_lock = threading.Lock()
+
+
+def _change_depth(delta):
+    global _queue_depth
+    with _queue_lock:
+        _queue_depth += delta
+
+
+def queue_depth():
+    return _queue_depth
+
+
+def _backoff(attempt):
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _with_retry(label, func, *args, max_retries=None):
+    """Panggil Gemini dengan retry + backoff untuk error kuota / server; None kalau gagal."""
+    if max_retries is None:
+        max_retries = getattr(settings, 'ENRICHMENT_MAX_RETRIES', 4)
+
+    for attempt in range(max_retries + 1):
+        try:
+            return func(*args)
+        except Exception as e:
+            if not is_retryable_error(e) or attempt >= max_retries:
+                metrics.incr('enrichment.failed')
+                print(f"❌ Enrichment {label} gagal: {e}")
+                return None
+            metrics.incr('enrichment.retried')
+            delay = _backoff(attempt)
+            print(f"⚠️ Gemini kuota/server error, retry {attempt + 1}/{max_retries} dalam {delay:.1f}s")
+            time.sleep(delay)
+
+
+def fetch_metadata(report, max_retries=None):
+    """Metadata Gemini untuk satu laporan, atau None kalau gagal."""
+    return _with_retry(report.id, request_report_metadata, report.description, report.title, max_retries=max_retries)
+
+
+def fetch_batch_metadata(reports, max_retries=None):
+    """
+    Metadata Gemini untuk banyak laporan dalam satu prompt.
+    Mengembalikan ({str(id): metadata}, total_token); laporan yang tidak ada
+    di hasil dianggap gagal dan boleh di-queue ulang oleh pemanggil.
+    """
+    items = [{'id': report.id, 'title': report.title, 'description': report.description} for report in reports]
+    result = _with_retry(f"batch({len(items)})", request_batch_metadata, items, max_retries=max_retries)
+    return result if result is not None else ({}, 0)
+
+
+def apply_metadata(report, ai_data):
+    """
+    Simpan hasil Gemini. Pakai UPDATE langsung supaya perubahan status dari
+    admin di antara waktu enqueue dan selesai tidak tertimpa. Slug tidak
+    diubah karena laporan sudah publik.
+    """
+    fields = {
+        'ai_summary': ai_data.get('summary') or '',
+        'sentiment_score': ai_data.get('sentiment') or 'Netral',
+        'updated_at': timezone.now(),
+    }
+    final_title = (ai_data.get('final_title') or '').strip()[:200]
+    if final_title and final_title != report.title:
+        fields['title'] = final_title
+    Report.objects.filter(pk=report.pk).update(**fields)
+    metrics.incr('enrichment.completed')
+    return fields
+
+
+def enrich_report(report_id, max_retries=None):
+    """Isi field AI satu laporan (dilewati kalau sudah terisi)."""
+    report = Report.objects.needs_enrichment().filter(pk=report_id).first()
+    if report is None:
+        return None
+    ai_data = fetch_metadata(report, max_retries=max_retries)
+    if ai_data is None:
+        return None
+    return apply_metadata(report, ai_data)
+
+
+def _run(report_id):
+    close_old_connections()
+    try:
+        with tracing.traced(report_id):
+            enrich_report(report_id)
+    except Exception as e:
+        print(f"❌ Enrichment {report_id} error: {e}")
+    finally:
+        _change_depth(-1)
+        close_old_connections()
+
+
+def _run_inline(report_id):
+    try:
+        with tracing.traced(report_id):
+            enrich_report(report_id, max_retries=getattr(settings, 'ENRICHMENT_INLINE_MAX_RETRIES', 1))
+    except Exception as e:
+        print(f"❌ Enrichment {report_id} error: {e}")
+
+
+def enqueue(report_id):
+    """
+    Jalankan enrichment (panggil lewat transaction.on_commit): langsung di
+    thread pemanggil kalau ENRICHMENT_INLINE, selain itu di thread pool.
+    """
+    metrics.incr('enrichment.enqueued')
+    if getattr(settings, 'ENRICHMENT_INLINE', False):
+        _run_inline(report_id)
+        return
+    _change_depth(1)
+    _executor.submit(_run, report_id)
+
+
+def stats():
+    return {
+        'queue_depth': queue_depth(),
+        'enqueued': metrics.get('enrichment.enqueued'),
+        'completed': metrics.get('enrichment.completed'),
+        'retried': metrics.get('enrichment.retried'),
+        'failed': metrics.get('enrichment.failed'),
+    }
+
+
+metrics.register('enrichment', stats)
@@ -0,0 +1,324 @@
+"""
+Ekstraksi teks lampiran dokumen (PDF / DOCX / TXT) untuk cek toxicity.
+
+PDF dan DOCX di-parse di worker process terpisah, bukan di thread request:
+- timeout keras per dokumen, dihitung sejak child mulai mengerjakan (alarm
+  di child + batas tunggu di parent; kalau child tetap macet, hanya child
+  itu yang dibunuh, job lain di worker lain jalan terus),
+- batas memori per child (RLIMIT_AS), jadi PDF/zip bomb cuma membunuh child,
+- halaman / paragraf dibaca satu per satu dan berhenti begitu budget
+  karakter terpenuhi.
+TXT cukup dibaca sebagian di proses sendiri (tidak perlu parse).
+Kalau platform tidak bisa membuat child process (serverless), PDF / DOCX
+diekstrak di proses sendiri supaya teks lampiran tetap dimoderasi.
+
+Statistik per tipe file (jumlah file, waktu, halaman/paragraf yang disentuh)
+masuk ke metrics dan tampil di /metrics/.
+"""
+import io
+import multiprocessing
+import signal
+import threading
+import time
+import zipfile
+from xml.etree.ElementTree import iterparse
+from django.conf import settings
+from webapp import metrics
+
+MAX_CHARS = 1000
+# Sampling: PDF cukup 2 halaman pertama
+MAX_PDF_PAGES = 2
+
+_W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# Dijalankan di child process (jangan sentuh Django / DB di sini)
+# ---------------------------------------------------------------------------
+
+def _limit_memory(memory_mb):
+    try:
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"⚠️ Tidak bisa membatasi memori ekstraksi: {e}")
+
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _iter_pdf(data):
+    import pypdf
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    for index, page in enumerate(reader.pages):
+        if index >= MAX_PDF_PAGES:
+            break
+        yield page.extract_text() or ''
+
+
+def _iter_docx(data):
+    """Stream paragraf dari word/document.xml tanpa membangun seluruh dokumen."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        with archive.open('word/document.xml') as xml:
+            for event, element in iterparse(xml, events=('end',)):
+                if element.tag == _W_NS + 'p':
+                    yield ''.join(node.text or '' for node in element.iter(_W_NS + 't'))
+                    element.clear()
+
+
+_READERS = {
+    'pdf': _iter_pdf,
+    'docx': _iter_docx,
+}
+
+
+def _collect(chunks, max_chars, deadline=None):
+    """Gabungkan halaman/paragraf sampai budget karakter (atau deadline) habis."""
+    parts, length, touched = [], 0, 0
+    try:
+        for chunk in chunks:
+            touched += 1
+            if chunk:
+                parts.append(chunk)
+                length += len(chunk) + 1
+            if length >= max_chars or (deadline is not None and time.monotonic() >= deadline):
+                break
+    except ExtractionTimeout:
+        # Alarm di child: kembalikan apa yang sudah terbaca
+        pass
+    return "\n".join(parts)[:max_chars], touched
+
+
+def _extract(kind, data, max_chars, timeout):
+    """Kembalikan (teks, jumlah halaman/paragraf yang dibaca)."""
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _collect(_READERS[kind](data), max_chars)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _serve(conn, memory_mb):
+    """Loop child: terima job lewat pipe, kirim 'started' lalu hasilnya."""
+    _limit_memory(memory_mb)
+    signal.signal(signal.SIGALRM, _on_alarm)
+    while True:
+        try:
+            kind, data, max_chars, timeout = conn.recv()
+        except (EOFError, OSError):
+            return
+        conn.send(('started', None))
+        try:
+            conn.send(('ok', _extract(kind, data, max_chars, timeout)))
+        except MemoryError:
+            # Kena RLIMIT_AS tapi child masih hidup
+            conn.send(('killed', None))
+        except Exception as e:
+            conn.send(('error', str(e)))
+
+
+# ---------------------------------------------------------------------------
+# Parent
+# ---------------------------------------------------------------------------
+
+# Batas tunggu child baru siap (spawn + import) dan antrian slot worker
+STARTUP_TIMEOUT = 30
+QUEUE_TIMEOUT = 30
+
+
+class _Worker:
+    """Satu child process dengan pipe sendiri, jadi bisa dibunuh tanpa mengganggu job lain."""
+
+    def __init__(self, context, memory_mb):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+
+class _WorkerPool:
+    """
+    Worker ekstraksi yang dipakai ulang. Tidak memakai ProcessPoolExecutor /
+    multiprocessing.Queue (butuh semaphore POSIX, tidak ada di AWS Lambda),
+    cukup Pipe per worker.
+    """
+
+    def __init__(self, size, memory_mb):
+        # spawn: child bersih (tanpa state Django / thread moderasi hasil fork)
+        self.context = multiprocessing.get_context('spawn')
+        self.memory_mb = memory_mb
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def _checkout(self):
+        with self.lock:
+            while self.idle:
+                worker = self.idle.pop()
+                if worker.process.is_alive():
+                    return worker
+                worker.kill()
+        return _Worker(self.context, self.memory_mb)
+
+    def run(self, kind, data, max_chars, timeout):
+        """(teks, touched, outcome). OSError / NotImplementedError kalau process tidak bisa dibuat."""
+        # Waktu menunggu slot tidak dihitung ke timeout dokumen
+        if not self.slots.acquire(timeout=QUEUE_TIMEOUT):
+            return "", 0, 'busy'
+        worker = None
+        try:
+            worker = self._checkout()
+            try:
+                worker.conn.send((kind, data, max_chars, timeout))
+                # Timeout dokumen baru mulai setelah child benar-benar mengambil job
+                if not worker.conn.poll(STARTUP_TIMEOUT) or worker.conn.recv()[0] != 'started':
+                    raise EOFError
+                # Child berhenti sendiri lewat alarm; grace period untuk kode C yang tidak bisa diinterupsi
+                if not worker.conn.poll(timeout + 1):
+                    worker.kill()
+                    worker = None
+                    return "", 0, 'timeout'
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                # Child mati (OOM / crash di C extension); hanya worker ini yang dibuang
+                worker.kill()
+                worker = None
+                return "", 0, 'killed'
+        finally:
+            if worker is not None:
+                with self.lock:
+                    self.idle.append(worker)
+            self.slots.release()
+
+        if status == 'ok':
+            text, touched = payload
+            return text, touched, 'ok'
+        if status == 'error':
+            print(f"Error parsing document: {payload}")
+        return "", 0, status
+
+
+_pool = None
+_pool_lock = threading.Lock()
+# True kalau platform tidak bisa membuat child process (misal serverless): ekstraksi di proses sendiri
+_pool_unavailable = False
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _WorkerPool(
+                getattr(settings, 'DOCUMENT_EXTRACT_WORKERS', 2),
+                getattr(settings, 'DOCUMENT_EXTRACT_MEMORY_MB', 512),
+            )
+        return _pool
+
+
+def _extract_inline(kind, data, max_chars, timeout):
+    """
+    Fallback tanpa child process: tanpa batas memori dan alarm (signal hanya
+    jalan di main thread), cukup berhenti di antara halaman/paragraf begitu
+    lewat timeout. Lebih baik daripada teks lampiran lolos tanpa dicek.
+    """
+    return _collect(_READERS[kind](data), max_chars, deadline=time.monotonic() + timeout)
+
+
+def file_kind(filename):
+    filename = filename.lower()
+    for kind in ('pdf', 'docx', 'txt'):
+        if filename.endswith('.' + kind):
+            return kind
+    return None
+
+
+def _read_txt(uploaded_file, max_chars):
+    # UTF-8 maksimal 4 byte per karakter, tidak perlu baca seluruh file
+    data = uploaded_file.read(max_chars * 4)
+    return data.decode('utf-8', errors='ignore')[:max_chars], 1
+
+
+def extract_text(uploaded_file, max_chars=MAX_CHARS, timeout=None):
+    """
+    Ekstrak maksimal `max_chars` karakter teks dari dokumen upload.
+    Mengembalikan "" untuk tipe tidak dikenal, dokumen rusak, timeout,
+    atau kehabisan memori. File pointer selalu dikembalikan ke awal.
+    """
+    global _pool_unavailable
+    kind = file_kind(uploaded_file.name)
+    if kind is None:
+        return ""
+    if timeout is None:
+        timeout = getattr(settings, 'DOCUMENT_EXTRACT_TIMEOUT', 5)
+
+    start = time.perf_counter()
+    text, touched, outcome = "", 0, 'ok'
+    try:
+        uploaded_file.seek(0)
+        if kind == 'txt':
+            text, touched = _read_txt(uploaded_file, max_chars)
+        else:
+            data = uploaded_file.read()
+            if not _pool_unavailable:
+                try:
+                    text, touched, outcome = _get_pool().run(kind, data, max_chars, timeout)
+                except (OSError, NotImplementedError) as e:
+                    print(f"⚠️ Process pool ekstraksi tidak tersedia ({e}), ekstraksi di proses sendiri")
+                    _pool_unavailable = True
+            if _pool_unavailable:
+                metrics.incr(f'doc_extract.{kind}.inline')
+                text, touched = _extract_inline(kind, data, max_chars, timeout)
+    except Exception as e:
+        print(f"Error parsing document: {e}")
+        outcome = 'error'
+    finally:
+        try:
+            uploaded_file.seek(0)
+        except Exception:
+            pass
+
+    elapsed = time.perf_counter() - start
+    # Import di sini: modul ini juga di-import child process yang tidak setup Django (models)
+    from . import tracing
+    tracing.record('document', elapsed, outcome)
+    metrics.incr(f'doc_extract.{kind}.files')
+    metrics.incr(f'doc_extract.{kind}.units', touched)
+    metrics.incr(f'doc_extract.{kind}.ms', round(elapsed * 1000, 1))
+    if outcome != 'ok':
+        metrics.incr(f'doc_extract.{kind}.{outcome}')
+        print(f"⚠️ Ekstraksi {kind} {uploaded_file.name}: {outcome} setelah {elapsed:.2f}s")
+    return text
+
+
+def stats():
+    data = {}
+    for kind in ('pdf', 'docx', 'txt'):
+        files = metrics.get(f'doc_extract.{kind}.files')
+        if not files:
+            continue
+        data[kind] = {
+            'files': files,
+            'avg_ms': round(metrics.get(f'doc_extract.{kind}.ms') / files, 1),
+            # halaman (PDF) / paragraf (DOCX) yang benar-benar dibaca
+            'avg_units': round(metrics.get(f'doc_extract.{kind}.units') / files, 2),
+            'timeouts': metrics.get(f'doc_extract.{kind}.timeout'),
+            'killed': metrics.get(f'doc_extract.{kind}.killed'),
+            'errors': metrics.get(f'doc_extract.{kind}.error'),
+            'busy': metrics.get(f'doc_extract.{kind}.busy'),
+            'inline': metrics.get(f'doc_extract.{kind}.inline'),
+        }
+    return data
+
+
+metrics.register('document_extraction', stats)
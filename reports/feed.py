@@ -0,0 +1,116 @@
+"""
+Feed JSON (versi API 1): data kartu laporan tanpa HTML.
+
+Query memakai .values() (tanpa model instance) dan hanya kolom yang dibutuhkan
+kartu; deskripsi dipotong di database (Substr) lalu dirapikan di batas kata,
+jadi deskripsi panjang tidak ikut terkirim utuh.
+"""
+import os
+from django.db.models import F
+from django.db.models.functions import Substr
+from django.urls import reverse
+from profiles.utils import avatar_urls_from_values
+from .models import Report, REACTION_COUNT_FIELDS
+from .pagination import keyset_page
+from .utiliyChoices import CATEGORY_CHOICES, STATUS_CHOICES
+
+FEED_API_VERSION = 1
+EXCERPT_CHARS = 280
+PER_PAGE = 6
+
+STATUS_LABELS = dict(STATUS_CHOICES)
+CATEGORY_LABELS = dict(CATEGORY_CHOICES)
+PREVIEW_EXTENSIONS = {'.pdf', '.jpg', '.jpeg', '.png'}
+ATTACHMENT_KINDS = {
+    '.pdf': 'pdf',
+    '.jpg': 'image', '.jpeg': 'image', '.png': 'image',
+    '.doc': 'document', '.docx': 'document',
+}
+
+FEED_FIELDS = (
+    'id', 'slug', 'title', 'ai_summary', 'status', 'category', 'created_at', 'updated_at', 'attachment',
+    *REACTION_COUNT_FIELDS.values(), 'total_reactions',
+    'author_id', 'author__username', 'author__first_name', 'author__last_name',
+)
+PROFILE_FIELDS = {
+    'avatar_image': F('author__profile__avatar_image'),
+    'avatar_animal': F('author__profile__avatar_animal'),
+    'avatar_version': F('author__profile__avatar_version'),
+}
+
+
+def project(queryset, *extra):
+    """Kolom kartu saja sebagai dict (dipakai feed dan hasil pencarian)."""
+    return queryset.values(
+        *FEED_FIELDS, *extra,
+        description_head=Substr('description', 1, EXCERPT_CHARS + 1),
+        **PROFILE_FIELDS,
+    )
+
+
+def feed_rows(cursor=None, per_page=PER_PAGE):
+    """(rows, next_cursor): satu halaman feed publik sebagai dict."""
+    return keyset_page(project(Report.objects.public()), cursor, per_page)
+
+
+def page_state(cursor=None, per_page=PER_PAGE):
+    """
+    Validator conditional GET satu halaman feed: kolom kunci baris halaman itu
+    saja (keyset, index-only order), tanpa deskripsi, avatar, maupun render.
+    """
+    queryset = Report.objects.public().values(
+        'id', 'created_at', 'updated_at', *REACTION_COUNT_FIELDS.values(),
+        'author_id', 'author__first_name', 'author__last_name', 'author__profile__avatar_version',
+    )
+    rows, next_cursor = keyset_page(queryset, cursor, per_page)
+    return tuple(tuple(row.values()) for row in rows), next_cursor
+
+
+def excerpt(text, limit=EXCERPT_CHARS):
+    text = ' '.join((text or '').split())
+    if len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(' ', 1)[0] or text[:limit]
+    return cut.rstrip(' ,.;:') + '…'
+
+
+def _attachment(report_id, name, storage):
+    if not name:
+        return None
+    ext = os.path.splitext(name)[1].lower()
+    return {
+        'name': os.path.basename(name),
+        'kind': ATTACHMENT_KINDS.get(ext, 'file'),
+        'url': storage.url(name),
+        'preview_url': reverse('reports:preview_file', args=[report_id]) if ext in PREVIEW_EXTENSIONS else None,
+    }
+
+
+def serialize(rows):
+    """Item JSON untuk setiap row dari feed_rows()."""
+    avatars = avatar_urls_from_values([{'user_id': row['author_id'], **row} for row in rows])
+    storage = Report._meta.get_field('attachment').storage
+    items = []
+    for row in rows:
+        display_name = f"{row['author__first_name']} {row['author__last_name']}".strip() or row['author__username']
+        items.append({
+            'id': str(row['id']),
+            'slug': row['slug'],
+            'title': row['title'],
+            'excerpt': excerpt(row['description_head']),
+            'summary': row['ai_summary'] or '',
+            'status': row['status'],
+            'status_label': STATUS_LABELS.get(row['status'], row['status']),
+            'category': row['category'],
+            'category_label': CATEGORY_LABELS.get(row['category'], row['category']),
+            'created_at': row['created_at'].isoformat(),
+            'counts': {rtype: row[field] for rtype, field in REACTION_COUNT_FIELDS.items()},
+            'total_reactions': row['total_reactions'],
+            'author': {
+                'username': row['author__username'],
+                'display_name': display_name,
+                'avatar': avatars.get(row['author_id'], ''),
+            },
+            'attachment': _attachment(row['id'], row['attachment'], storage),
+        })
+    return items
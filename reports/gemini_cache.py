@@ -0,0 +1,68 @@
+"""
+Cache persisten hasil Gemini untuk metadata laporan.
+
+Deskripsi laporan sering di-copy-paste (keluhan yang sama dari banyak
+mahasiswa). Hasil generate_report_metadata disimpan di tabel
+GeminiResponseCache dengan key sha256(deskripsi, judul, versi prompt, model):
+ubah PROMPT_VERSION di gemini_utils.py kalau prompt / schema berubah supaya
+hasil lama tidak terpakai. TTL dan batas jumlah baris lewat reports/db_cache.py.
+"""
+import hashlib
+import json
+from django.utils import timezone
+from webapp import metrics
+from .db_cache import DBCache
+from .models import GeminiResponseCache
+
+cache = DBCache(GeminiResponseCache, 'GEMINI_CACHE', default_ttl=30 * 86400, default_max_rows=20000)
+
+
+def cache_key(description, title, prompt_version, model):
+    payload = json.dumps([description.strip(), (title or '').strip(), prompt_version, model], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def lookup(key):
+    try:
+        row = cache.fresh().filter(key=key).values_list('response', flat=True).first()
+        if row is not None:
+            cache.record_hits(GeminiResponseCache.objects.filter(key=key))
+    except Exception as e:
+        print(f"⚠️ Gemini cache DB error: {e}")
+        return None
+
+    metrics.incr('gemini_cache.hit' if row is not None else 'gemini_cache.miss')
+    return row
+
+
+def store(key, response, prompt_version, model):
+    try:
+        GeminiResponseCache.objects.update_or_create(
+            key=key,
+            defaults={
+                'response': response,
+                'model': model,
+                'prompt_version': prompt_version,
+                'hits': 0,
+                'created_at': timezone.now(),
+                'last_hit_at': None,
+            },
+        )
+        cache.maybe_evict()
+    except Exception as e:
+        print(f"⚠️ Gemini cache DB error: {e}")
+
+
+def evict(max_rows=None):
+    return cache.evict(max_rows)
+
+
+def stats():
+    return {
+        'hits': metrics.get('gemini_cache.hit'),
+        'misses': metrics.get('gemini_cache.miss'),
+        'hit_ratio': metrics.ratio('gemini_cache.hit', 'gemini_cache.miss'),
+    }
+
+
+metrics.register('gemini_cache', stats)
@@ -1,48 +1,127 @@
 from google import genai
+from google.genai import errors, types
 import json
 from django.conf import settings
 import os
+from . import gemini_cache, tracing
 
 
 # Konfigurasi API Key (Pastikan ada di .env Anda)
-client = genai.Client(api_key=settings.GEMINI_API_KEY)
+client = genai.Client(
+    api_key=settings.GEMINI_API_KEY,
+    http_options=types.HttpOptions(base_url=settings.GEMINI_BASE_URL) if getattr(settings, 'GEMINI_BASE_URL', '') else None,
+)
+
+MODEL = 'gemini-2.5-flash'
+# Naikkan kalau prompt / schema berubah: ikut jadi bagian key GeminiResponseCache
+PROMPT_VERSION = 2
+
+SENTIMENTS = ['Positif', 'Negatif', 'Netral']
+
+# Structured output: Gemini dipaksa menjawab JSON sesuai schema, tidak perlu
+# membersihkan ```json ... ``` dari teks bebas
+_METADATA_PROPERTIES = {
+    'sentiment': types.Schema(type=types.Type.STRING, enum=SENTIMENTS),
+    'summary': types.Schema(type=types.Type.STRING),
+    'final_title': types.Schema(type=types.Type.STRING),
+}
+METADATA_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties=_METADATA_PROPERTIES,
+    required=['sentiment', 'summary', 'final_title'],
+)
+# Schema satu item hasil batch (metadata + id laporan)
+BATCH_ITEM_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties={'id': types.Schema(type=types.Type.STRING), **_METADATA_PROPERTIES},
+    required=['id', 'sentiment', 'summary', 'final_title'],
+)
+
+
+def is_retryable_error(error):
+    """Kuota habis (429 RESOURCE_EXHAUSTED) atau server Gemini sedang bermasalah (5xx)."""
+    if isinstance(error, errors.APIError):
+        return error.code == 429 or error.code >= 500
+    return 'RESOURCE_EXHAUSTED' in str(error)
+
+
+def _clean_metadata(data):
+    """Ambil field metadata yang valid dari jawaban Gemini, atau None."""
+    if not isinstance(data, dict):
+        return None
+    summary = data.get('summary')
+    sentiment = data.get('sentiment')
+    if not isinstance(summary, str) or not summary.strip() or sentiment not in SENTIMENTS:
+        return None
+    final_title = data.get('final_title')
+    return {
+        'sentiment': sentiment,
+        'summary': summary.strip(),
+        'final_title': final_title.strip() if isinstance(final_title, str) else '',
+    }
+
+
+def _generate_json(prompt, schema):
+    response = client.models.generate_content(
+        model=MODEL,
+        contents=prompt,
+        config=types.GenerateContentConfig(
+            response_mime_type='application/json',
+            response_schema=schema,
+        ),
+    )
+    usage = getattr(response, 'usage_metadata', None)
+    tokens = (getattr(usage, 'total_token_count', 0) or 0) if usage else 0
+    return json.loads(response.text), tokens
+
+
+def request_report_metadata(description, user_title=None):
+    """
+    Sama seperti generate_report_metadata tapi tanpa fallback: error API /
+    jawaban di luar schema di-raise supaya pemanggil (enrichment) bisa retry.
+    Hasil yang valid disimpan di GeminiResponseCache.
+    """
+    with tracing.stage('gemini') as stage:
+        return _request_report_metadata(description, user_title, stage)
+
+
+def _request_report_metadata(description, user_title, stage):
+    key = gemini_cache.cache_key(description, user_title, PROMPT_VERSION, MODEL)
+    cached = gemini_cache.lookup(key)
+    if cached is not None:
+        stage.cache = 'hit'
+        return cached
+    stage.cache = 'miss'
+
+    # Prompt Engineering: Kita suruh Gemini jadi admin yang pintar
+    prompt = f"""
+    Anda adalah asisten admin kampus. Analisis laporan mahasiswa berikut:
+
+    Laporan: "{description}"
+    Judul User: "{user_title if user_title else 'KOSONG'}"
+
+    Tugas Anda:
+    1. Tentukan Sentimen (Positif/Negatif/Netral).
+    2. Buat Ringkasan padat (maksimal 2 kalimat).
+    3. Jika 'Judul User' adalah KOSONG atau sangat tidak jelas (kurang dari 3 kata), buatkan Judul yang profesional dan deskriptif. Jika Judul User sudah bagus, gunakan judul user tersebut.
+    """
+
+    parsed, _ = _generate_json(prompt, METADATA_SCHEMA)
+    metadata = _clean_metadata(parsed)
+    if metadata is None:
+        raise ValueError(f"Jawaban Gemini tidak sesuai schema: {str(parsed)[:200]}")
+
+    gemini_cache.store(key, metadata, PROMPT_VERSION, MODEL)
+    return metadata
+
+
 def generate_report_metadata(description, user_title=None):
     """
     Mengirim deskripsi laporan ke Gemini untuk dianalisis.
-    Output: Dictionary {'summary': '...', 'sentiment': '...', 'suggested_title': '...'}
+    Output: Dictionary {'summary': '...', 'sentiment': '...', 'final_title': '...'}
     """
     try:
-        model = 'gemini-2.5-flash'
-        
-        # Prompt Engineering: Kita suruh Gemini jadi admin yang pintar
-        prompt = f"""
-        Anda adalah asisten admin kampus. Analisis laporan mahasiswa berikut:
-        
-        Laporan: "{description}"
-        Judul User: "{user_title if user_title else 'KOSONG'}"
-
-        Tugas Anda:
-        1. Tentukan Sentimen (Positif/Negatif/Netral).
-        2. Buat Ringkasan padat (maksimal 2 kalimat).
-        3. Jika 'Judul User' adalah KOSONG atau sangat tidak jelas (kurang dari 3 kata), buatkan Judul yang profesional dan deskriptif. Jika Judul User sudah bagus, gunakan judul user tersebut.
-
-        Keluarkan HANYA dalam format JSON:
-        {{
-            "sentiment": "Positif/Negatif/Netral",
-            "summary": "Ringkasan anda...",
-            "final_title": "Judul final..."
-        }}
-        """
-
-        response = client.models.generate_content(
-            model=model,
-            contents=prompt,
-        )
-        
-        # Bersihkan response (kadang Gemini kasih markdown ```json ... ```)
-        clean_text = response.text.replace('```json', '').replace('```', '').strip()
-        
-        return json.loads(clean_text)
+        return request_report_metadata(description, user_title)
 
     except Exception as e:
         print(f"Gemini Error: {e}")
@@ -51,4 +130,58 @@ def generate_report_metadata(description, user_title=None):
             "sentiment": "Netral",
             "summary": description[:100] + "...", # Potong manual
             "final_title": user_title if user_title else "Laporan Tanpa Judul"
-        }
\ No newline at end of file
+        }
+
+
+def request_batch_metadata(items):
+    """
+    Versi batch request_report_metadata untuk backfill: banyak laporan dalam
+    satu prompt, masing-masing dengan id.
+    items: list of {'id', 'title', 'description'}.
+    Mengembalikan ({id: metadata}, total_token). Item yang tidak ada / tidak
+    lengkap di jawaban Gemini tidak ikut dikembalikan (pemanggil re-queue).
+    Item yang sudah ada di cache tidak dikirim. Error API di-raise.
+    """
+    results, misses = {}, []
+    for item in items:
+        key = gemini_cache.cache_key(item['description'], item.get('title'), PROMPT_VERSION, MODEL)
+        cached = gemini_cache.lookup(key)
+        if cached is not None:
+            results[str(item['id'])] = cached
+        else:
+            misses.append((key, item))
+    if not misses:
+        return results, 0
+
+    reports_json = json.dumps([
+        {'id': str(item['id']), 'judul_user': item.get('title') or 'KOSONG', 'laporan': item['description']}
+        for _, item in misses
+    ], ensure_ascii=False)
+
+    prompt = f"""
+    Anda adalah asisten admin kampus. Berikut {len(misses)} laporan mahasiswa dalam format JSON:
+
+    {reports_json}
+
+    Untuk SETIAP laporan:
+    1. Tentukan Sentimen (Positif/Negatif/Netral).
+    2. Buat Ringkasan padat (maksimal 2 kalimat).
+    3. Jika 'judul_user' adalah KOSONG atau sangat tidak jelas (kurang dari 3 kata), buatkan Judul yang profesional dan deskriptif. Jika judul_user sudah bagus, gunakan judul user tersebut.
+
+    Kembalikan array JSON dengan satu objek per laporan, memakai "id" yang sama persis.
+    """
+
+    try:
+        parsed, tokens = _generate_json(prompt, types.Schema(type=types.Type.ARRAY, items=BATCH_ITEM_SCHEMA))
+    except (TypeError, ValueError) as e:
+        print(f"Gemini batch JSON error: {e}")
+        return results, 0
+
+    answers = {str(entry.get('id', '')): entry for entry in parsed if isinstance(entry, dict)} \
+        if isinstance(parsed, list) else {}
+    for key, item in misses:
+        metadata = _clean_metadata(answers.get(str(item['id'])))
+        if metadata is not None:
+            results[str(item['id'])] = metadata
+            gemini_cache.store(key, metadata, PROMPT_VERSION, MODEL)
+    return results, tokens
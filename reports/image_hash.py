@@ -0,0 +1,175 @@
+"""
+Perceptual hash untuk lampiran gambar.
+
+Meme / screenshot yang sama sering dilampirkan ke banyak laporan. dHash
+(difference hash, 64 bit) tahan terhadap resize, re-encode JPEG dan perubahan
+kecerahan, jadi gambar yang "sama" punya hash dengan jarak Hamming kecil.
+Skor NSFW gambar yang sudah pernah dinilai dipakai ulang tanpa memanggil HF.
+
+Pencarian tetangga memakai 4 band 16-bit yang di-index: jika jarak Hamming
+<= 3, minimal satu dari 4 band pasti identik (pigeonhole), jadi kandidat
+cukup diambil dengan OR antar band lalu jaraknya dihitung di Python.
+"""
+import io
+from django.db.models import Q
+from PIL import Image
+from webapp import metrics
+from .models import AttachmentImageHash
+
+HASH_SIZE = 8
+MAX_DISTANCE = 3
+BANDS = 4
+BAND_BITS = 64 // BANDS
+
+
+def compute_dhash(source):
+    """
+    dHash 64-bit (int unsigned) dari bytes / file-like, atau None kalau
+    gambar tidak bisa di-decode. File pointer dikembalikan ke awal.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        source.seek(0)
+        img = Image.open(source)
+        if img.format == 'JPEG':
+            img.draft('L', (HASH_SIZE * 4, HASH_SIZE * 4))
+        img = img.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+        pixels = list(img.getdata())
+    except Exception as e:
+        print(f"⚠️ Gagal menghitung hash gambar: {e}")
+        return None
+    finally:
+        try:
+            source.seek(0)
+        except Exception:
+            pass
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def to_signed(value):
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value):
+    return value & 0xFFFFFFFFFFFFFFFF
+
+
+def bands(value):
+    mask = (1 << BAND_BITS) - 1
+    return [(value >> (BAND_BITS * i)) & mask for i in range(BANDS)]
+
+
+def hamming(a, b):
+    return bin(to_unsigned(a) ^ to_unsigned(b)).count('1')
+
+
+def find_similar(value, max_distance=MAX_DISTANCE, scored_only=False):
+    """
+    Semua AttachmentImageHash dengan jarak Hamming <= max_distance dari
+    `value`, urut dari yang paling mirip. max_distance > 3 tidak dijamin
+    lengkap karena kandidat diambil lewat band.
+    """
+    condition = Q()
+    for i, band in enumerate(bands(value)):
+        condition |= Q(**{f'band{i}': band})
+    candidates = AttachmentImageHash.objects.filter(condition)
+    if scored_only:
+        candidates = candidates.filter(nsfw_score__isnull=False)
+
+    matches = []
+    for row in candidates:
+        distance = hamming(row.phash, value)
+        if distance <= max_distance:
+            row.distance = distance
+            matches.append(row)
+    matches.sort(key=lambda row: row.distance)
+    return matches
+
+
+def cached_nsfw_score(value):
+    """Skor NSFW gambar mirip yang sudah pernah dinilai, atau None."""
+    try:
+        matches = find_similar(value, scored_only=True)
+    except Exception as e:
+        print(f"⚠️ Image hash DB error: {e}")
+        return None
+    if not matches:
+        metrics.incr('image_hash.miss')
+        return None
+    metrics.incr('image_hash.hit')
+    return matches[0].nsfw_score
+
+
+def remember_score(value, score):
+    """Simpan skor ke semua lampiran dengan hash identik yang belum punya skor."""
+    if score is None:
+        return
+    try:
+        AttachmentImageHash.objects.filter(phash=to_signed(value), nsfw_score__isnull=True).update(nsfw_score=score)
+    except Exception as e:
+        print(f"⚠️ Image hash DB error: {e}")
+
+
+def image_hash_of(upload):
+    """dHash lampiran kalau berupa gambar (dilihat dari content_type upload), selain itu None."""
+    if upload and getattr(upload, 'content_type', '').startswith('image/'):
+        return compute_dhash(upload)
+    return None
+
+
+def stored_hash(report_id):
+    """dHash (unsigned) yang disimpan index_attachment untuk laporan ini, atau None."""
+    try:
+        value = AttachmentImageHash.objects.filter(report_id=report_id).values_list('phash', flat=True).first()
+    except Exception as e:
+        print(f"⚠️ Image hash DB error: {e}")
+        return None
+    return None if value is None else to_unsigned(value)
+
+
+def index_attachment(report, upload, value=None, nsfw_score=None):
+    """
+    Simpan hash lampiran gambar laporan (dipanggil saat upload). `value`
+    dipakai kalau hash-nya sudah dihitung, supaya gambar tidak di-decode dua kali;
+    `nsfw_score` kalau gambarnya sudah dinilai sebelum laporan disimpan.
+    """
+    if value is None:
+        value = compute_dhash(upload)
+    if value is None:
+        return None
+    AttachmentImageHash.objects.update_or_create(
+        report=report,
+        defaults={
+            'phash': to_signed(value),
+            **{f'band{i}': band for i, band in enumerate(bands(value))},
+            **({'nsfw_score': nsfw_score} if nsfw_score is not None else {}),
+        },
+    )
+    return value
+
+
+def reports_sharing_image(report_ids, max_distance=MAX_DISTANCE):
+    """ID semua laporan yang gambarnya sama / mirip dengan laporan di `report_ids`."""
+    found = set()
+    hashes = AttachmentImageHash.objects.filter(report_id__in=report_ids).values_list('phash', flat=True)
+    for value in set(hashes):
+        found.update(row.report_id for row in find_similar(value, max_distance))
+    return found
+
+
+def stats():
+    return {
+        'hits': metrics.get('image_hash.hit'),
+        'misses': metrics.get('image_hash.miss'),
+        'hit_ratio': metrics.ratio('image_hash.hit', 'image_hash.miss'),
+    }
+
+
+metrics.register('image_hash', stats)
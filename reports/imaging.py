@@ -0,0 +1,74 @@
+"""
+Pre-processing gambar sebelum dikirim ke model NSFW.
+
+Falconsai/nsfw_image_detection (ViT) bekerja di resolusi 224px, jadi foto HP
+12 MB cukup dikirim sebagai JPEG kecil. Untuk JPEG dipakai draft mode supaya
+decoder langsung men-decode di skala 1/2, 1/4 atau 1/8 tanpa membangun
+bitmap resolusi penuh.
+"""
+import io
+from django.conf import settings
+from PIL import Image, ImageOps
+from webapp import metrics
+
+NSFW_INPUT_SIZE = 224
+
+
+def _read_all(source):
+    source.seek(0)
+    return source.read()
+
+
+def prepare_image_for_nsfw(source, size=None, image_format=None, quality=None):
+    """
+    Downscale (sisi terpendek = size) dan re-encode ke JPEG/WEBP.
+    `source` boleh bytes atau file-like (upload Django / file storage);
+    file-like dibaca langsung oleh Pillow tanpa disalin utuh ke memori.
+    Kalau gambar tidak bisa di-decode atau hasilnya malah lebih besar,
+    bytes asli dikembalikan apa adanya.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    source.seek(0, io.SEEK_END)
+    original_size = source.tell()
+    source.seek(0)
+
+    size = size or getattr(settings, 'NSFW_IMAGE_SIZE', NSFW_INPUT_SIZE)
+    image_format = image_format or getattr(settings, 'NSFW_IMAGE_FORMAT', 'JPEG')
+    quality = quality or getattr(settings, 'NSFW_IMAGE_QUALITY', 85)
+
+    try:
+        img = Image.open(source)
+        if img.format == 'JPEG':
+            # Decoder memilih skala terkecil yang masih >= (size, size)
+            img.draft('RGB', (size, size))
+        img = ImageOps.exif_transpose(img)
+
+        if img.mode != 'RGB':
+            # PNG transparan: tempel di background putih
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img = img.convert('RGBA')
+                background = Image.new('RGB', img.size, (255, 255, 255))
+                background.paste(img, mask=img.split()[-1])
+                img = background
+            else:
+                img = img.convert('RGB')
+
+        width, height = img.size
+        scale = size / min(width, height)
+        if scale < 1:
+            img = img.resize((max(1, round(width * scale)), max(1, round(height * scale))), Image.LANCZOS)
+
+        out = io.BytesIO()
+        img.save(out, format=image_format, quality=quality)
+        processed = out.getvalue()
+    except Exception as e:
+        print(f"⚠️ Gagal pre-process gambar, kirim asli: {e}")
+        return _read_all(source)
+
+    if len(processed) >= original_size:
+        return _read_all(source)
+
+    metrics.incr('nsfw_image.bytes_original', original_size)
+    metrics.incr('nsfw_image.bytes_sent', len(processed))
+    return processed
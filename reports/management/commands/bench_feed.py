@@ -0,0 +1,151 @@
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import connection
+from reports.models import Report
+from reports.pagination import FEED_ORDERING, encode_cursor, keyset_page
+
+SEED_BATCH = 5000
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Benchmark pagination feed laporan di database test: Paginator (COUNT + OFFSET) '
+            'dibanding keyset cursor pada halaman awal dan halaman dalam')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=1_000_000, help='Jumlah laporan yang di-seed')
+        parser.add_argument('--pages', default='1,5000', help='Nomor halaman yang diukur, pisahkan dengan koma')
+        parser.add_argument('--per-page', type=int, default=6)
+        parser.add_argument('--repeat', type=int, default=20, help='Pengulangan per pengukuran')
+        parser.add_argument('--keepdb', action='store_true', help='Pakai ulang database test (seed dilewati kalau sudah cukup)')
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), 'bench_feed.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=kwargs['keepdb'])
+        try:
+            self._seed(kwargs['reports'])
+            self._run(kwargs)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=kwargs['keepdb'])
+
+    # -----------------------------------------------------------------------
+    # Seed
+    # -----------------------------------------------------------------------
+
+    def _seed(self, target):
+        from django.contrib.auth.models import User
+
+        existing = Report.objects.count()
+        if existing >= target:
+            self.stdout.write(f'📦 {existing} laporan sudah ada, seed dilewati.')
+            return
+
+        authors = list(User.objects.filter(username__startswith='bench_feed_').values_list('id', flat=True))
+        if not authors:
+            User.objects.bulk_create([User(username=f'bench_feed_{i}') for i in range(100)])
+            authors = list(User.objects.filter(username__startswith='bench_feed_').values_list('id', flat=True))
+
+        missing = target - existing
+        self.stdout.write(f'🌱 Seed {missing} laporan...')
+        started = time.perf_counter()
+        if connection.vendor == 'postgresql':
+            self._seed_postgres(existing, missing, authors)
+        else:
+            self._seed_bulk(existing, missing, authors)
+        self.stdout.write(f'   selesai dalam {time.perf_counter() - started:.1f}s')
+
+    def _seed_postgres(self, start, count, authors):
+        # Satu INSERT ... SELECT generate_series jauh lebih cepat dari bulk_create untuk jutaan baris
+        table = connection.ops.quote_name(Report._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                INSERT INTO {table} (
+                    id, author_id, type, category, title, slug, description, status, moderation_reason,
+                    created_at, updated_at, agree_count, support_count, sad_count, shock_count,
+                    confused_count, total_reactions
+                )
+                SELECT md5('bench-feed-' || i)::uuid, (%(authors)s::int[])[1 + i %% %(n_authors)s],
+                       'complaint', 'facility', 'Laporan ' || i, 'bench-feed-' || i,
+                       'Deskripsi laporan benchmark nomor ' || i, 'pending', '',
+                       now() - i * interval '1 second', now() - i * interval '1 second', 0, 0, 0, 0, 0, 0
+                FROM generate_series(%(start)s, %(stop)s) AS i
+            """, {'authors': authors, 'n_authors': len(authors), 'start': start, 'stop': start + count - 1})
+            cursor.execute(f'ANALYZE {table}')
+
+    def _seed_bulk(self, start, count, authors):
+        # created_at diisi auto_now_add per objek (beda mikrodetik, kadang sama -> ikut menguji tie-break id)
+        for offset in range(start, start + count, SEED_BATCH):
+            batch = [
+                Report(
+                    id=uuid.uuid4(), author_id=authors[i % len(authors)], type='complaint', category='facility',
+                    title=f'Laporan {i}', slug=f'bench-feed-{i}', description=f'Deskripsi laporan benchmark nomor {i}',
+                    status='pending',
+                )
+                for i in range(offset, min(start + count, offset + SEED_BATCH))
+            ]
+            Report.objects.bulk_create(batch)
+            self.stdout.write(f'   {offset + len(batch) - start}/{count}')
+
+    # -----------------------------------------------------------------------
+    # Pengukuran
+    # -----------------------------------------------------------------------
+
+    def _measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), _percentile(timings, 95)
+
+    def _run(self, kwargs):
+        per_page = max(1, kwargs['per_page'])
+        repeat = max(1, kwargs['repeat'])
+        pages = [int(page) for page in kwargs['pages'].split(',') if page.strip()]
+        queryset = Report.objects.public().select_related('author')
+
+        self.stdout.write(f"⏱️  {repeat}x per pengukuran, {per_page} laporan per halaman (median / p95 ms)")
+        results = {}
+        for page in pages:
+            def offset_page():
+                # Paginator baru setiap kali, sama seperti satu request scroll
+                page_obj = Paginator(queryset.order_by('-created_at'), per_page).get_page(page)
+                list(page_obj.object_list)
+                page_obj.has_next()
+
+            # Cursor halaman ini = baris terakhir halaman sebelumnya (diambil di luar pengukuran)
+            cursor = None
+            if page > 1:
+                last = queryset.order_by(*FEED_ORDERING)[(page - 1) * per_page - 1]
+                cursor = encode_cursor(last)
+
+            def cursor_page():
+                keyset_page(queryset, cursor, per_page)
+
+            results[page] = {
+                'offset': self._measure(offset_page, repeat),
+                'keyset': self._measure(cursor_page, repeat),
+            }
+            offset_ms, keyset_ms = results[page]['offset'], results[page]['keyset']
+            self.stdout.write(
+                f"   halaman {page:>7}: offset {offset_ms[0]:8.2f} / {offset_ms[1]:8.2f}   "
+                f"keyset {keyset_ms[0]:8.2f} / {keyset_ms[1]:8.2f}"
+            )
+
+        if len(pages) > 1:
+            first, last = results[pages[0]], results[pages[-1]]
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ Halaman {pages[-1]} vs {pages[0]}: offset {last['offset'][0] / first['offset'][0]:.1f}x, "
+                f"keyset {last['keyset'][0] / first['keyset'][0]:.1f}x"
+            ))
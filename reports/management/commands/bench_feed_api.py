@@ -0,0 +1,118 @@
+import gzip
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+from reports.models import Report
+
+SENTENCES = [
+    "Toilet di gedung A sudah rusak sejak minggu lalu dan belum diperbaiki.",
+    "Dosen mata kuliah statistik sering tidak masuk tanpa pemberitahuan.",
+    "Wifi perpustakaan sangat lambat, tolong ditambah access point.",
+    "Pembayaran UKT semester ini tidak jelas batas waktunya.",
+    "Parkiran motor penuh setiap pagi, mohon ditambah slot parkir.",
+    "Mohon informasi beasiswa diumumkan lebih awal di website kampus.",
+    "AC di ruang kelas lantai tiga mati dan ruangan jadi sangat panas.",
+]
+ATTACHMENTS = ['', '', 'report_attachments/bukti.pdf', 'report_attachments/foto.jpg', 'report_attachments/surat.docx']
+
+
+class Command(BaseCommand):
+    help = ('Benchmark feed: HTML chunk (JsonResponse berisi HTML kartu) dibanding feed JSON /api/v1/feed/ '
+            '— ukuran payload dan waktu serialisasi per halaman, di database test')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=300, help='Jumlah laporan yang di-seed')
+        parser.add_argument('--pages', type=int, default=10, help='Jumlah halaman feed yang diukur')
+        parser.add_argument('--repeat', type=int, default=5, help='Pengulangan per halaman')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **kwargs):
+        from django.test.utils import setup_test_environment
+
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), 'bench_feed_api.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        setup_test_environment()
+        try:
+            self._seed(kwargs['reports'], random.Random(kwargs['seed']))
+            self._run(kwargs)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def _seed(self, count, rng):
+        from django.contrib.auth.models import User
+
+        User.objects.bulk_create([User(username=f'bench_api_{i}', first_name=f'Mahasiswa {i}') for i in range(20)])
+        authors = list(User.objects.filter(username__startswith='bench_api_'))
+        reports = []
+        for i in range(count):
+            description = ' '.join(rng.choice(SENTENCES) for _ in range(rng.randint(4, 25)))
+            reports.append(Report(
+                author=rng.choice(authors), type='complaint', category='facility', status='pending',
+                title=rng.choice(SENTENCES)[:60], slug=f'bench-api-{i}', description=description,
+                ai_summary=rng.choice(SENTENCES) if rng.random() < 0.7 else '',
+                attachment=rng.choice(ATTACHMENTS) or None,
+                agree_count=rng.randint(0, 50), support_count=rng.randint(0, 20),
+            ))
+        Report.objects.bulk_create(reports)
+        self.stdout.write(f'🌱 {count} laporan di-seed.')
+
+    def _timed(self, func):
+        started = time.perf_counter()
+        result = func()
+        return result, (time.perf_counter() - started) * 1000
+
+    def _run(self, kwargs):
+        from django.test import Client
+
+        client = Client(secure=True)
+        html_url = reverse('reports:reports')
+        api_url = reverse('reports:feed_api')
+        samples = {name: {'ms': [], 'bytes': [], 'gzip': []} for name in ('html_cold', 'html_warm', 'json', 'json_304')}
+
+        def record(name, response, ms):
+            samples[name]['ms'].append(ms)
+            samples[name]['bytes'].append(len(response.content))
+            samples[name]['gzip'].append(len(gzip.compress(response.content)) if response.content else 0)
+
+        html_cursor = api_cursor = ''
+        for _ in range(kwargs['pages']):
+            for _ in range(kwargs['repeat']):
+                cache.clear()
+                response, ms = self._timed(lambda: client.get(html_url, {'cursor': html_cursor}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'))
+                record('html_cold', response, ms)
+                response, ms = self._timed(lambda: client.get(html_url, {'cursor': html_cursor}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'))
+                record('html_warm', response, ms)
+
+                response, ms = self._timed(lambda: client.get(api_url, {'cursor': api_cursor}))
+                record('json', response, ms)
+                etag = response['ETag']
+                not_modified, ms = self._timed(lambda: client.get(api_url, {'cursor': api_cursor}, HTTP_IF_NONE_MATCH=etag))
+                record('json_304', not_modified, ms)
+
+            html_cursor = json.loads(client.get(html_url, {'cursor': html_cursor}, HTTP_X_REQUESTED_WITH='XMLHttpRequest').content)['next_cursor']
+            api_cursor = json.loads(client.get(api_url, {'cursor': api_cursor}).content)['next_cursor']
+            if not html_cursor or not api_cursor:
+                break
+
+        self.stdout.write(f"⏱️  Per halaman, {kwargs['repeat']}x per halaman (median):")
+        for name, data in samples.items():
+            self.stdout.write(
+                f"   {name:<10} {statistics.median(data['ms']):8.2f} ms   "
+                f"{statistics.fmean(data['bytes']):9.0f} byte   {statistics.fmean(data['gzip']):8.0f} byte gzip"
+            )
+
+        html_bytes, json_bytes = statistics.fmean(samples['html_warm']['bytes']), statistics.fmean(samples['json']['bytes'])
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Payload JSON {json_bytes / html_bytes * 100:.0f}% dari HTML chunk; "
+            f"waktu JSON {statistics.median(samples['json']['ms']):.2f} ms vs HTML "
+            f"{statistics.median(samples['html_cold']['ms']):.2f} ms (cache dingin) / "
+            f"{statistics.median(samples['html_warm']['ms']):.2f} ms (cache hangat)"
+        ))
@@ -0,0 +1,79 @@
+import io
+import os
+import random
+import time
+from django.core.management.base import BaseCommand
+from PIL import Image, ImageDraw, ImageFilter
+from reports.api_config_urls import HF_API_URL_NSFW
+from reports.imaging import prepare_image_for_nsfw
+
+
+def synthetic_photo(width, height, seed):
+    """Gambar 'foto' sintetis: gradien + bentuk acak + noise, supaya JPEG-nya realistis besar."""
+    rng = random.Random(seed)
+    img = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    draw = ImageDraw.Draw(img)
+    for _ in range(60):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randrange(20, max(21, width // 6))
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+    noise = Image.effect_noise((width, height), 40).convert('RGB')
+    img = Image.blend(img, noise, 0.25).filter(ImageFilter.DETAIL)
+    out = io.BytesIO()
+    img.save(out, format='JPEG', quality=95)
+    return out.getvalue()
+
+
+class Command(BaseCommand):
+    help = 'Benchmark ukuran upload dan latency cek NSFW sebelum vs sesudah downscale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='*', help='File gambar (kosong = pakai gambar sintetis)')
+        parser.add_argument('--uplink-mbps', type=float, default=10.0, help='Estimasi bandwidth upload (Mbps) untuk mode offline')
+        parser.add_argument('--live', action='store_true', help='Kirim sungguhan ke HF NSFW endpoint (butuh HUGGINGFACE_API_KEY)')
+
+    def handle(self, *args, **kwargs):
+        samples = []
+        for path in kwargs['files']:
+            with open(path, 'rb') as f:
+                samples.append((os.path.basename(path), f.read()))
+        if not samples:
+            for i, (w, h) in enumerate([(4032, 3024), (3000, 4000), (1920, 1080), (800, 600)]):
+                samples.append((f"synthetic_{w}x{h}.jpg", synthetic_photo(w, h, seed=i)))
+
+        uplink = kwargs['uplink_mbps'] * 1e6 / 8  # bytes/detik
+        live = kwargs['live']
+        total_before = total_after = 0
+
+        self.stdout.write(f"{'file':<26}{'before':>10}{'after':>10}{'prep ms':>9}{'e2e before':>12}{'e2e after':>11}")
+        for name, data in samples:
+            start = time.perf_counter()
+            processed = prepare_image_for_nsfw(data)
+            prep = time.perf_counter() - start
+
+            if live:
+                before = self._post(data)
+                after = prep + self._post(processed)
+            else:
+                before = len(data) / uplink
+                after = prep + len(processed) / uplink
+
+            total_before += len(data)
+            total_after += len(processed)
+            self.stdout.write(
+                f"{name:<26}{len(data) / 1024:>9.0f}K{len(processed) / 1024:>9.1f}K"
+                f"{prep * 1000:>9.1f}{before * 1000:>10.0f}ms{after * 1000:>9.0f}ms"
+            )
+
+        mode = 'live HF' if live else f"estimasi {kwargs['uplink_mbps']} Mbps"
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Total dikirim {total_before / 1e6:.2f} MB -> {total_after / 1e6:.3f} MB "
+            f"({total_before / max(1, total_after):.0f}x lebih kecil, {mode})"
+        ))
+
+    def _post(self, payload):
+        from reports.utils import headers
+        from webapp import http_client
+        start = time.perf_counter()
+        http_client.post('nsfw', HF_API_URL_NSFW, headers={'Content-Type': 'application/octet-stream', **headers}, data=payload)
+        return time.perf_counter() - start
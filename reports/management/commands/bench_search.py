@@ -0,0 +1,155 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from reports import feed, search
+from reports.models import Report
+from reports.pagination import keyset_page
+
+SEED_BATCH = 100_000
+
+# Kosakata deskripsi seed; `kode<n>` (n = i % 10000) membuat kata langka (~0.01% baris)
+WORDS = [
+    'toilet', 'gedung', 'rusak', 'minggu', 'lalu', 'belum', 'diperbaiki', 'dosen', 'kuliah', 'statistik',
+    'sering', 'tidak', 'masuk', 'tanpa', 'pemberitahuan', 'wifi', 'perpustakaan', 'lambat', 'tolong',
+    'access', 'point', 'pembayaran', 'ukt', 'semester', 'batas', 'waktu', 'parkiran', 'motor', 'penuh',
+    'pagi', 'slot', 'parkir', 'beasiswa', 'diumumkan', 'website', 'kampus', 'ac', 'ruang', 'kelas',
+    'lantai', 'mati', 'panas', 'kantin', 'mahal', 'kotor', 'lift', 'macet', 'jadwal', 'bentrok', 'nilai',
+    'keluar', 'terlambat', 'administrasi', 'ribet', 'antrian', 'panjang', 'laboratorium', 'alat', 'kurang',
+]
+
+# (label, kata kunci, facet)
+QUERIES = [
+    ('kata umum', 'wifi', {}),
+    ('kata langka', 'kode4242', {}),
+    ('frasa', '"ruang kelas"', {}),
+    ('kata + facet', 'parkir', {'category': 'facility'}),
+    ('facet saja', '', {'category': 'academic', 'status': 'verified'}),
+]
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Benchmark pencarian laporan di database test PostgreSQL: icontains (seq scan) '
+            'dibanding full-text tsvector + GIN dan filter facet dengan index komposit')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=1_000_000, help='Jumlah laporan yang di-seed')
+        parser.add_argument('--repeat', type=int, default=10, help='Pengulangan per pengukuran')
+        parser.add_argument('--keepdb', action='store_true', help='Pakai ulang database test (seed dilewati kalau sudah cukup)')
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Benchmark pencarian butuh PostgreSQL (tsvector + GIN).')
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=kwargs['keepdb'])
+        try:
+            self._seed(kwargs['reports'])
+            self._run(max(1, kwargs['repeat']))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=kwargs['keepdb'])
+
+    # -----------------------------------------------------------------------
+    # Seed
+    # -----------------------------------------------------------------------
+
+    def _seed(self, target):
+        from django.contrib.auth.models import User
+
+        existing = Report.objects.count()
+        if existing >= target:
+            self.stdout.write(f'📦 {existing} laporan sudah ada, seed dilewati.')
+            return
+
+        authors = list(User.objects.filter(username__startswith='bench_search_').values_list('id', flat=True))
+        if not authors:
+            User.objects.bulk_create([User(username=f'bench_search_{i}') for i in range(100)])
+            authors = list(User.objects.filter(username__startswith='bench_search_').values_list('id', flat=True))
+
+        missing = target - existing
+        self.stdout.write(f'🌱 Seed {missing} laporan (search_vector dihitung PostgreSQL saat insert)...')
+        started = time.perf_counter()
+        table = connection.ops.quote_name(Report._meta.db_table)
+        for offset in range(existing, target, SEED_BATCH):
+            stop = min(target, offset + SEED_BATCH) - 1
+            with connection.cursor() as cursor:
+                # Judul 2-4 kata & deskripsi 15-45 kata acak dari WORDS; subquery berkorelasi dengan i
+                # supaya random() dihitung ulang per baris
+                cursor.execute(f"""
+                    INSERT INTO {table} (
+                        id, author_id, type, category, title, slug, description, ai_summary, status,
+                        moderation_reason, created_at, updated_at, agree_count, support_count, sad_count,
+                        shock_count, confused_count, total_reactions
+                    )
+                    SELECT md5('bench-search-' || i)::uuid,
+                           (%(authors)s::int[])[1 + i %% %(n_authors)s],
+                           (ARRAY['complaint', 'suggestion'])[1 + i %% 2],
+                           (ARRAY['academic', 'facility', 'financial', 'student_affairs', 'other'])[1 + i %% 5],
+                           (SELECT string_agg((%(words)s::text[])[1 + floor(random() * %(n_words)s)::int], ' ')
+                              FROM generate_series(1, 2 + i %% 3)),
+                           'bench-search-' || i,
+                           (SELECT string_agg((%(words)s::text[])[1 + floor(random() * %(n_words)s)::int], ' ')
+                              FROM generate_series(1, 15 + i %% 31)) || ' kode' || (i %% 10000),
+                           CASE WHEN i %% 3 = 0 THEN 'Ringkasan laporan ' || i ELSE NULL END,
+                           (ARRAY['pending', 'verified', 'rejected'])[1 + (i / 5) %% 3], '',
+                           now() - i * interval '1 second', now() - i * interval '1 second', 0, 0, 0, 0, 0, 0
+                    FROM generate_series(%(start)s, %(stop)s) AS i
+                """, {
+                    'authors': authors, 'n_authors': len(authors), 'words': WORDS, 'n_words': len(WORDS),
+                    'start': offset, 'stop': stop,
+                })
+            self.stdout.write(f'   {stop + 1 - existing}/{missing}')
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {table}')
+        self.stdout.write(f'   selesai dalam {time.perf_counter() - started:.1f}s')
+
+    # -----------------------------------------------------------------------
+    # Pengukuran
+    # -----------------------------------------------------------------------
+
+    def _measure(self, func, repeat):
+        func()  # warm-up (cache halaman PostgreSQL)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), _percentile(timings, 95)
+
+    def _icontains_page(self, text, facets):
+        queryset = Report.objects.public().filter(**facets)
+        if text:
+            text = text.strip('"')
+            queryset = queryset.filter(
+                Q(title__icontains=text) | Q(description__icontains=text) | Q(ai_summary__icontains=text)
+            )
+        return keyset_page(feed.project(queryset), None, feed.PER_PAGE)
+
+    def _uses_index(self, text, facets):
+        queryset = Report.objects.public().filter(**facets)
+        if text:
+            queryset, _ = search.match(queryset, text)
+        plan = queryset.order_by('-created_at', '-id')[:feed.PER_PAGE].explain()
+        for name in (search.INDEX, 'report_category_feed_idx', 'report_type_feed_idx', 'report_status_feed_idx'):
+            if name in plan:
+                return name
+        return 'seq scan' if 'Seq Scan' in plan else '-'
+
+    def _run(self, repeat):
+        self.stdout.write(f"⏱️  {repeat}x per pengukuran, {feed.PER_PAGE} hasil per halaman (median / p95 ms)")
+        for label, text, facets in QUERIES:
+            baseline = self._measure(lambda: self._icontains_page(text, facets), repeat)
+            indexed = self._measure(lambda: search.search_rows(text, facets), repeat)
+            rows, _ = search.search_rows(text, facets)
+            self.stdout.write(
+                f"   {label:<13} icontains {baseline[0]:9.2f} / {baseline[1]:9.2f}   "
+                f"search {indexed[0]:8.2f} / {indexed[1]:8.2f}   "
+                f"({len(rows)} hasil, index: {self._uses_index(text, facets)})"
+            )
+        self.stdout.write(self.style.SUCCESS('✅ Selesai'))
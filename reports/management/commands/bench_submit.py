@@ -0,0 +1,357 @@
+import argparse
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+
+CLEAN_SENTENCES = [
+    "Toilet di gedung A sudah rusak sejak minggu lalu dan belum diperbaiki.",
+    "Dosen mata kuliah statistik sering tidak masuk tanpa pemberitahuan.",
+    "Wifi perpustakaan sangat lambat, tolong ditambah access point.",
+    "Pembayaran UKT semester ini tidak jelas batas waktunya.",
+    "The projector in room 301 has been broken for two weeks.",
+    "Parkiran motor penuh setiap pagi, mohon ditambah slot parkir.",
+    "Mohon informasi beasiswa diumumkan lebih awal di website kampus.",
+]
+SPAM_SENTENCES = [
+    "Situs terpercaya hari ini, bonus new member 100%, klik link alternatif.",
+    "bandar resmi, wd berapapun dibayar lunas",
+]
+
+# URL stub dikirim ke child process lewat env (HF_ROUTER_URL, GOOGLE_TRANSLATE_URL,
+# GEMINI_BASE_URL), karena harus sudah di-set sebelum reports.utils di-import
+DB_ENV = 'BENCH_DATABASE_NAME'
+RESULT_PREFIX = 'BENCH_RESULT '
+
+
+# ---------------------------------------------------------------------------
+# Stub server model eksternal
+# ---------------------------------------------------------------------------
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, sama seperti endpoint asli
+
+    def do_GET(self):
+        self.server.handle_stub(self)
+
+    def do_POST(self):
+        self.server.handle_stub(self)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    """Server lokal dengan latency (gauss mean/jitter) dan error rate yang bisa diatur."""
+    daemon_threads = True
+
+    def __init__(self, name, respond, latency_ms, jitter_ms, error_rate, error_status, seed):
+        super().__init__(('127.0.0.1', 0), _StubHandler)
+        self.name = name
+        self.respond = respond
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def handle_stub(self, handler):
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else b''
+        with self._lock:
+            delay = max(0.0, self.rng.gauss(self.latency, self.jitter))
+            failed = self.rng.random() < self.error_rate
+            self.counts['errors' if failed else 'ok'] += 1
+        time.sleep(delay)
+
+        if failed:
+            status, content_type, payload = self.error_status, 'application/json', json.dumps({
+                'error': {'code': self.error_status, 'message': 'stub error', 'status': 'RESOURCE_EXHAUSTED'},
+            }).encode()
+        else:
+            status, content_type, payload = 200, *self.respond(handler, body)
+
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True, name=f'stub-{self.name}').start()
+        return self
+
+
+def _hf_response(handler, body):
+    if 'nsfw' in handler.path:
+        data = [{'label': 'normal', 'score': 0.97}, {'label': 'nsfw', 'score': 0.03}]
+    else:
+        inputs = json.loads(body or b'{}').get('inputs') or []
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        # Index 0 dipakai model toxic, LABEL_1 dipakai model spam: dua-duanya skor rendah
+        data = [[{'label': 'LABEL_1', 'score': 0.05}, {'label': 'LABEL_0', 'score': 0.95}] for _ in inputs]
+    return 'application/json', json.dumps(data).encode()
+
+
+def _translate_response(handler, body):
+    text = parse_qs(urlparse(handler.path).query).get('q', [''])[0]
+    # deep_translator mengambil <div class="t0">
+    return 'text/html', f'<html><body><div class="t0">[en] {text}</div></body></html>'.encode()
+
+
+def _gemini_response(handler, body):
+    metadata = {'sentiment': 'Netral', 'summary': 'Ringkasan dari stub server.', 'final_title': ''}
+    data = {
+        'candidates': [{'content': {'role': 'model', 'parts': [{'text': json.dumps(metadata)}]}, 'finishReason': 'STOP'}],
+        'usageMetadata': {'promptTokenCount': 200, 'candidatesTokenCount': 40, 'totalTokenCount': 240},
+    }
+    return 'application/json', json.dumps(data).encode()
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = ('Benchmark submit_report_api offline: stub server HF / Google Translate / Gemini lokal, '
+            'view asli dipanggil lewat Django test client dengan concurrency tertentu')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Jumlah submission')
+        parser.add_argument('--concurrency', type=int, default=8, help='Submission bersamaan')
+        parser.add_argument('--spam-ratio', type=float, default=0.1, help='Proporsi submission berisi spam')
+        parser.add_argument('--duplicate-ratio', type=float, default=0.0, help='Proporsi submission yang mengulang teks sebelumnya')
+        parser.add_argument('--attachment-ratio', type=float, default=0.0, help='Proporsi submission dengan lampiran gambar')
+        parser.add_argument('--async', dest='screening_async', action='store_true',
+                            help='Ukur mode REPORT_SCREENING_ASYNC (tanpa moderasi di request)')
+        parser.add_argument('--seed', type=int, default=42)
+        for name, latency, jitter in (('hf', 80, 30), ('translate', 120, 40), ('gemini', 1500, 400)):
+            parser.add_argument(f'--{name}-latency-ms', type=float, default=latency)
+            parser.add_argument(f'--{name}-jitter-ms', type=float, default=jitter)
+            parser.add_argument(f'--{name}-error-rate', type=float, default=0.0)
+        parser.add_argument('--drain-timeout', type=float, default=30.0,
+                            help='Tunggu enrichment Gemini di background selesai (detik)')
+        parser.add_argument('--keepdb', action='store_true', help='Pakai ulang database test')
+        parser.add_argument('--save-baseline', metavar='FILE', help='Simpan hasil sebagai baseline JSON')
+        parser.add_argument('--baseline', metavar='FILE', help='Bandingkan hasil dengan baseline JSON')
+        parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **kwargs):
+        if kwargs['child']:
+            return self._child(kwargs)
+
+        seed = kwargs['seed']
+        stubs = {
+            'hf': StubServer('hf', _hf_response, kwargs['hf_latency_ms'], kwargs['hf_jitter_ms'],
+                             kwargs['hf_error_rate'], 503, seed).start(),
+            'translate': StubServer('translate', _translate_response, kwargs['translate_latency_ms'],
+                                    kwargs['translate_jitter_ms'], kwargs['translate_error_rate'], 429, seed + 1).start(),
+            'gemini': StubServer('gemini', _gemini_response, kwargs['gemini_latency_ms'], kwargs['gemini_jitter_ms'],
+                                 kwargs['gemini_error_rate'], 429, seed + 2).start(),
+        }
+        env = {
+            **os.environ,
+            'HF_ROUTER_URL': stubs['hf'].url,
+            'GOOGLE_TRANSLATE_URL': stubs['translate'].url + '/m',
+            'GEMINI_BASE_URL': stubs['gemini'].url,
+            'REPORT_SCREENING_ASYNC': str(kwargs['screening_async']),
+        }
+
+        # Database test dibuat di proses ini supaya bisa di-drop setelah child (dan semua koneksinya) selesai
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.gettempdir(), 'bench_submit.sqlite3')
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=kwargs['keepdb'])
+        env[DB_ENV] = str(connection.settings_dict['NAME'])
+        connection.close()
+
+        child_args = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'bench_submit', '--child']
+        for key in ('requests', 'concurrency', 'spam_ratio', 'duplicate_ratio', 'attachment_ratio', 'seed', 'drain_timeout'):
+            child_args += [f"--{key.replace('_', '-')}", str(kwargs[key])]
+
+        self.stdout.write(f"🚀 {kwargs['requests']} submission, concurrency {kwargs['concurrency']}, "
+                          f"{'async' if kwargs['screening_async'] else 'screening di request'}")
+        try:
+            proc = subprocess.run(child_args, env=env, capture_output=True, text=True)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=kwargs['keepdb'])
+            for stub in stubs.values():
+                stub.shutdown()
+
+        result_lines = [line for line in proc.stdout.splitlines() if line.startswith(RESULT_PREFIX)]
+        if proc.returncode != 0 or not result_lines:
+            self.stderr.write(proc.stdout[-3000:])
+            self.stderr.write(proc.stderr[-3000:])
+            raise CommandError('Benchmark child process gagal')
+
+        result = json.loads(result_lines[-1][len(RESULT_PREFIX):])
+        result['outbound'] = {name: dict(stub.counts) for name, stub in stubs.items()}
+        self._print(result)
+
+        if kwargs['baseline']:
+            with open(kwargs['baseline']) as f:
+                self._compare(json.load(f), result)
+        if kwargs['save_baseline']:
+            with open(kwargs['save_baseline'], 'w') as f:
+                json.dump(result, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"💾 Baseline disimpan ke {kwargs['save_baseline']}"))
+
+    # -----------------------------------------------------------------------
+    # Child: Django sudah di-setup dengan URL stub dari env
+    # -----------------------------------------------------------------------
+
+    def _child(self, kwargs):
+        from django.contrib.auth.models import User
+        from django.db import connections
+        from django.test import Client
+        from django.test.utils import setup_test_environment
+        from reports import enrichment
+
+        settings.DATABASES['default']['NAME'] = os.environ[DB_ENV]
+        connection.settings_dict['NAME'] = os.environ[DB_ENV]
+        setup_test_environment()
+
+        rng = random.Random(kwargs['seed'])
+        n_requests = kwargs['requests']
+        concurrency = max(1, kwargs['concurrency'])
+
+        # Satu user per submission supaya rate limit per user tidak ikut terukur
+        run_id = f"{int(time.time())}"
+        users = User.objects.bulk_create([User(username=f"bench_{run_id}_{i}") for i in range(n_requests)])
+        payloads = []
+        for i in range(n_requests):
+            if payloads and rng.random() < kwargs['duplicate_ratio']:
+                title, description = rng.choice(payloads)[:2]
+            else:
+                sentences = rng.sample(CLEAN_SENTENCES, 3)
+                if rng.random() < kwargs['spam_ratio']:
+                    sentences.insert(rng.randrange(4), rng.choice(SPAM_SENTENCES))
+                title = sentences[0][:60]
+                description = " ".join(sentences) + f" (ref {run_id}-{i})"
+            image = self._image(rng) if rng.random() < kwargs['attachment_ratio'] else None
+            payloads.append((title, description, image))
+
+        latencies, statuses = [], Counter()
+        lock = threading.Lock()
+        next_index = iter(range(n_requests))
+        submit_url = reverse('reports:submit_report_api')
+
+        def worker():
+            client = Client(secure=True)
+            while True:
+                with lock:
+                    i = next(next_index, None)
+                if i is None:
+                    break
+                title, description, image = payloads[i]
+                data = {'title': title, 'description': description, 'type': 'keluhan', 'category': 'fasilitas'}
+                if image is not None:
+                    data['attachment'] = io.BytesIO(image)
+                    data['attachment'].name = f'bench_{i}.jpg'
+                client.force_login(users[i])
+                start = time.perf_counter()
+                response = client.post(submit_url, data)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[response.status_code] += 1
+            connections.close_all()
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker, name=f'bench-{i}') for i in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+
+        # Enrichment Gemini jalan di background setelah commit
+        drain_deadline = time.monotonic() + kwargs['drain_timeout']
+        while enrichment.queue_depth() and time.monotonic() < drain_deadline:
+            time.sleep(0.1)
+
+        result = {
+            'requests': n_requests,
+            'concurrency': concurrency,
+            'wall_seconds': round(wall, 3),
+            'requests_per_second': round(n_requests / wall, 2) if wall else 0.0,
+            'latency_ms': {
+                'p50': round(_percentile(latencies, 50) * 1000, 1),
+                'p99': round(_percentile(latencies, 99) * 1000, 1),
+                'mean': round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+                'max': round(max(latencies, default=0.0) * 1000, 1),
+            },
+            'status_codes': {str(code): count for code, count in sorted(statuses.items())},
+            'enrichment_pending': enrichment.queue_depth(),
+        }
+        connections.close_all()
+        self.stdout.write(RESULT_PREFIX + json.dumps(result))
+
+    def _image(self, rng):
+        from PIL import Image
+        img = Image.effect_noise((640, 480), rng.randrange(20, 80)).convert('RGB')
+        out = io.BytesIO()
+        img.save(out, format='JPEG', quality=85)
+        return out.getvalue()
+
+    # -----------------------------------------------------------------------
+    # Output
+    # -----------------------------------------------------------------------
+
+    def _print(self, result):
+        latency = result['latency_ms']
+        self.stdout.write(
+            f"   latency p50 {latency['p50']:.1f} ms  p99 {latency['p99']:.1f} ms  "
+            f"mean {latency['mean']:.1f} ms  max {latency['max']:.1f} ms"
+        )
+        self.stdout.write(f"   status {result['status_codes']}")
+        for name, counts in result['outbound'].items():
+            total = counts.get('ok', 0) + counts.get('errors', 0)
+            self.stdout.write(f"   outbound {name:<10} {total:6d} call ({counts.get('errors', 0)} error), "
+                              f"{total / max(1, result['requests']):.2f}/submission")
+        if result['enrichment_pending']:
+            self.stdout.write(self.style.WARNING(f"   {result['enrichment_pending']} enrichment belum selesai saat drain timeout"))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result['requests_per_second']:.1f} req/s ({result['requests']} submission dalam {result['wall_seconds']:.1f}s)"
+        ))
+
+    def _compare(self, baseline, result):
+        rows = [
+            ('req/s', baseline['requests_per_second'], result['requests_per_second'], True),
+            ('p50 ms', baseline['latency_ms']['p50'], result['latency_ms']['p50'], False),
+            ('p99 ms', baseline['latency_ms']['p99'], result['latency_ms']['p99'], False),
+        ]
+        for name in result['outbound']:
+            before = sum(baseline.get('outbound', {}).get(name, {}).values())
+            after = sum(result['outbound'][name].values())
+            rows.append((f'{name} calls', before, after, False))
+
+        self.stdout.write('📊 Dibanding baseline:')
+        for label, before, after, higher_is_better in rows:
+            change = (after - before) / before * 100 if before else 0.0
+            better = change > 0 if higher_is_better else change < 0
+            style = self.style.SUCCESS if better or not change else self.style.ERROR
+            self.stdout.write(style(f"   {label:<16} {before:>10} -> {after:>10} ({change:+.1f}%)"))
+
@@ -0,0 +1,72 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.core.management.base import BaseCommand
+from reports.models import Report
+from reports.enrichment import fetch_batch_metadata, apply_metadata
+
+
+class Command(BaseCommand):
+    help = 'Backfill ai_summary / sentiment_score untuk laporan yang field AI-nya masih kosong'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=0, help='Maksimal N laporan (0 = semua)')
+        parser.add_argument('--dry-run', action='store_true', help='Hanya hitung laporan yang perlu di-enrich')
+        parser.add_argument('--batch-size', type=int, default=20, help='Laporan per prompt Gemini')
+        parser.add_argument('--concurrency', type=int, default=4, help='Maksimal panggilan Gemini bersamaan')
+        parser.add_argument('--max-attempts', type=int, default=3, help='Berapa kali laporan yang gagal di-queue ulang')
+
+    def handle(self, *args, **kwargs):
+        limit = kwargs['limit']
+        batch_size = max(1, kwargs['batch_size'])
+        concurrency = max(1, kwargs['concurrency'])
+        max_attempts = max(1, kwargs['max_attempts'])
+
+        queryset = Report.objects.needs_enrichment().order_by('created_at')
+        backlog = queryset.count()
+        self.stdout.write(f'📋 {backlog} laporan belum punya ringkasan AI.')
+        if kwargs['dry_run'] or not backlog:
+            return
+
+        if limit:
+            queryset = queryset[:limit]
+        pending = deque(queryset.only('id', 'title', 'description'))
+        attempts = {}
+        done = failed = tokens = calls = 0
+        started = time.perf_counter()
+
+        # Panggilan Gemini di thread pool, semua tulis ke DB tetap di thread utama
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='enrich') as pool:
+            running = {}
+            while pending or running:
+                while pending and len(running) < concurrency:
+                    batch = [pending.popleft() for _ in range(min(batch_size, len(pending)))]
+                    running[pool.submit(fetch_batch_metadata, batch)] = batch
+                    calls += 1
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    batch = running.pop(future)
+                    results, used_tokens = future.result()
+                    tokens += used_tokens
+                    for report in batch:
+                        ai_data = results.get(str(report.id))
+                        if ai_data is not None:
+                            apply_metadata(report, ai_data)
+                            done += 1
+                            continue
+                        # Hanya item yang gagal / hilang dari jawaban yang diulang
+                        attempts[report.id] = attempts.get(report.id, 0) + 1
+                        if attempts[report.id] < max_attempts:
+                            pending.append(report)
+                        else:
+                            failed += 1
+                self.stdout.write(f'   {done} selesai, {len(pending)} antri, {failed} gagal')
+
+        elapsed = time.perf_counter() - started
+        per_minute = done / elapsed * 60 if elapsed else 0.0
+        per_report = tokens / done if done else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Selesai: {done} laporan di-enrich, {failed} gagal, {calls} panggilan Gemini '
+            f'dalam {elapsed:.1f}s ({per_minute:.1f} laporan/menit, {per_report:.0f} token/laporan).'
+        ))
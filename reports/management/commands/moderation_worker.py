@@ -0,0 +1,45 @@
+import time
+from django.core.management.base import BaseCommand
+from reports.screening import process_next_report
+
+
+class Command(BaseCommand):
+    help = 'Worker moderasi: memproses laporan berstatus screening (aman dijalankan beberapa instance sekaligus)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Proses antrian sampai kosong lalu berhenti')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Jeda (detik) saat antrian kosong')
+        parser.add_argument('--max-reports', type=int, default=0, help='Berhenti setelah N laporan (0 = tanpa batas)')
+
+    def handle(self, *args, **kwargs):
+        once = kwargs['once']
+        sleep = kwargs['sleep']
+        max_reports = kwargs['max_reports']
+        processed = 0
+
+        self.stdout.write(self.style.SUCCESS('🛡️ Moderation worker berjalan...'))
+
+        while True:
+            try:
+                report = process_next_report()
+            except Exception as e:
+                # Transaksi sudah rollback, laporan tetap 'screening' dan akan dicoba lagi
+                self.stdout.write(self.style.ERROR(f'❌ Gagal screening: {e}'))
+                if once:
+                    break
+                time.sleep(sleep)
+                continue
+
+            if report is None:
+                if once:
+                    break
+                time.sleep(sleep)
+                continue
+
+            processed += 1
+            self.stdout.write(f'   {report.id} -> {report.status} {report.moderation_reason}'.rstrip())
+
+            if max_reports and processed >= max_reports:
+                break
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Selesai, {processed} laporan diproses.'))
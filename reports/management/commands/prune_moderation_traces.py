@@ -0,0 +1,20 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from reports.models import ModerationTrace
+
+
+class Command(BaseCommand):
+    help = 'Menghapus moderation trace yang lebih tua dari N hari'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Hapus trace lebih tua dari N hari')
+
+    def handle(self, *args, **kwargs):
+        expiration_date = timezone.now() - timedelta(days=kwargs['days'])
+        deleted, _ = ModerationTrace.objects.filter(created_at__lt=expiration_date).delete()
+
+        if deleted:
+            self.stdout.write(self.style.SUCCESS(f'✅ Berhasil menghapus {deleted} trace lama.'))
+        else:
+            self.stdout.write(self.style.WARNING('🧹 Tidak ada trace yang perlu dihapus.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from webapp import ratelimit
+
+
+class Command(BaseCommand):
+    help = 'Menghapus bucket rate limit yang kuotanya sudah penuh kembali'
+
+    def handle(self, *args, **kwargs):
+        deleted = ratelimit.purge()
+
+        if deleted:
+            self.stdout.write(self.style.SUCCESS(f'✅ Berhasil menghapus {deleted} bucket rate limit.'))
+        else:
+            self.stdout.write(self.style.WARNING('🧹 Tidak ada bucket yang perlu dihapus.'))
@@ -0,0 +1,34 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from reports.models import TranslationCache
+
+
+class Command(BaseCommand):
+    help = 'Menghapus cache terjemahan yang sudah lama dan membatasi jumlah baris tabel'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='Hapus entry lebih tua dari N hari')
+        parser.add_argument('--max-rows', type=int, default=50000, help='Sisakan maksimal N entry terbaru (0 = tanpa batas)')
+
+    def handle(self, *args, **kwargs):
+        days = kwargs['days']
+        max_rows = kwargs['max_rows']
+
+        # 1. Hapus berdasarkan umur
+        expiration_date = timezone.now() - timedelta(days=days)
+        expired, _ = TranslationCache.objects.filter(created_at__lt=expiration_date).delete()
+
+        # 2. Batasi ukuran tabel: cari created_at entry ke-N, hapus yang lebih tua
+        overflow = 0
+        if max_rows:
+            cutoff = TranslationCache.objects.order_by('-created_at')\
+                                             .values_list('created_at', flat=True)[max_rows:max_rows + 1]
+            cutoff = list(cutoff)
+            if cutoff:
+                overflow, _ = TranslationCache.objects.filter(created_at__lte=cutoff[0]).delete()
+
+        if expired or overflow:
+            self.stdout.write(self.style.SUCCESS(f'✅ Berhasil menghapus {expired} entry kadaluarsa dan {overflow} entry kelebihan.'))
+        else:
+            self.stdout.write(self.style.WARNING('🧹 Tidak ada cache terjemahan yang perlu dihapus.'))
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from reports.models import Report, REACTION_COUNT_FIELDS
+
+COUNTER_FIELDS = [*REACTION_COUNT_FIELDS.values(), 'total_reactions']
+
+
+class Command(BaseCommand):
+    help = 'Hitung ulang counter reaction di Report dari tabel Reaction'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Hanya tampilkan laporan yang counternya meleset')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Jumlah baris per bulk_update')
+
+    def handle(self, *args, **kwargs):
+        # Satu query agregat: COUNT(...) FILTER (WHERE type = ...) per laporan, GROUP BY report
+        annotations = {
+            f'actual_{field}': Count('reactions', filter=Q(reactions__type=rtype))
+            for rtype, field in REACTION_COUNT_FIELDS.items()
+        }
+        annotations['actual_total_reactions'] = Count('reactions')
+        queryset = Report.objects.order_by().annotate(**annotations).only('id', *COUNTER_FIELDS)
+
+        batch_size = max(1, kwargs['batch_size'])
+        dry_run = kwargs['dry_run']
+        checked = fixed = 0
+        pending = []
+        for report in queryset.iterator(chunk_size=batch_size):
+            checked += 1
+            changed = False
+            for field in COUNTER_FIELDS:
+                actual = getattr(report, f'actual_{field}')
+                if getattr(report, field) != actual:
+                    setattr(report, field, actual)
+                    changed = True
+            if not changed:
+                continue
+            fixed += 1
+            if dry_run:
+                continue
+            pending.append(report)
+            if len(pending) >= batch_size:
+                self._flush(pending)
+
+        if dry_run:
+            self.stdout.write(f'📋 {fixed} dari {checked} laporan counternya meleset.')
+            return
+        self._flush(pending)
+
+        if fixed:
+            self.stdout.write(self.style.SUCCESS(f'✅ Counter {fixed} dari {checked} laporan diperbaiki.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Semua counter {checked} laporan sudah sesuai.'))
+
+    def _flush(self, reports):
+        # bulk_update tidak menyentuh updated_at (auto_now hanya jalan di save())
+        if reports:
+            Report.objects.bulk_update(reports, COUNTER_FIELDS)
+            reports.clear()
@@ -1,9 +1,26 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils.text import slugify
-from .utiliyChoices import REPORT_TYPE_CHOICES, CATEGORY_CHOICES, STATUS_CHOICES, REACTION_CHOICES
+from .utiliyChoices import REPORT_TYPE_CHOICES, CATEGORY_CHOICES, STATUS_CHOICES, REACTION_CHOICES, MODERATION_REASON_CHOICES
 import uuid
 
+# Kolom counter per tipe reaction di Report, misal 'agree' -> 'agree_count'
+REACTION_COUNT_FIELDS = {value: f'{value}_count' for value, _ in REACTION_CHOICES}
+
+
+class ReportQuerySet(models.QuerySet):
+    def public(self):
+        """
+        Laporan yang boleh tampil ke publik: sudah lolos screening dan
+        bukan hasil tolak otomatis dari moderasi.
+        """
+        return self.exclude(status='screening').exclude(status='rejected', moderation_reason__gt='')
+
+    def needs_enrichment(self):
+        """Laporan publik yang ai_summary-nya belum diisi Gemini."""
+        return self.public().filter(models.Q(ai_summary__isnull=True) | models.Q(ai_summary=''))
+
+
 class Report(models.Model):
     # ID Unik
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -28,11 +45,35 @@ class Report(models.Model):
 
     # Status
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # Diisi worker moderasi jika laporan ditolak otomatis (kosong = lolos / ditolak admin)
+    moderation_reason = models.CharField(max_length=20, choices=MODERATION_REASON_CHOICES, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Counter reaction (denormalisasi), diubah atomik (x = x + 1) di reports/reactions.py.
+    # Hitung ulang dari tabel Reaction: `python manage.py reconcile_reaction_counts`
+    agree_count = models.PositiveIntegerField(default=0)
+    support_count = models.PositiveIntegerField(default=0)
+    sad_count = models.PositiveIntegerField(default=0)
+    shock_count = models.PositiveIntegerField(default=0)
+    confused_count = models.PositiveIntegerField(default=0)
+    total_reactions = models.PositiveIntegerField(default=0)
+
+    objects = ReportQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Antrian moderation_worker: WHERE status='screening' ORDER BY created_at
+            models.Index(fields=['status', 'created_at'], name='report_status_created_idx'),
+            # Keyset pagination feed: ORDER BY created_at DESC, id DESC (reports/pagination.py)
+            models.Index(fields=['-created_at', '-id'], name='report_created_id_idx'),
+            # Filter facet pencarian (reports/search.py) dengan urutan feed yang sama
+            models.Index(fields=['category', '-created_at', '-id'], name='report_category_feed_idx'),
+            models.Index(fields=['type', '-created_at', '-id'], name='report_type_feed_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='report_status_feed_idx'),
+            # Full-text: kolom search_vector + index GIN dibuat lewat post_migrate (reports/search.py)
+        ]
 
     def get_status_color(self):
         """
@@ -40,6 +81,7 @@ class Report(models.Model):
         Menggunakan style 'Subtle' (Background pudar, Teks tebal) agar elegan.
         """
         colors = {
+            'screening': 'bg-info bg-opacity-50 text-info border-info',
             'pending': 'bg-warning bg-opacity-50 text-warning border-warning',
             'verified': 'bg-success bg-opacity-50 text-success border-success',
             'rejected': 'bg-danger bg-opacity-50 text-danger border-danger',
@@ -78,4 +120,107 @@ class Reaction(models.Model):
         unique_together = ('user', 'report')
 
     def __str__(self):
-        return f"{self.user.username} reacted {self.type} on {self.report.id}"
\ No newline at end of file
+        return f"{self.user.username} reacted {self.type} on {self.report.id}"
+
+
+class TranslationCache(models.Model):
+    """
+    Level 2 cache translate_to_english (dibagi semua worker lewat DB).
+    key = sha256 dari sample 500 karakter yang sudah dinormalisasi.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    translated = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.key[:12]}: {self.translated[:50]}"
+
+
+
+class ModerationVerdict(models.Model):
+    """
+    Cache skor moderasi (gambling / toxicity) per fingerprint teks dan endpoint
+    model. Dibagi semua worker lewat DB, jadi resubmit spam yang sama tidak
+    memanggil HF lagi. Lihat reports/verdict_cache.py.
+    """
+    fingerprint = models.CharField(max_length=64)
+    endpoint = models.CharField(max_length=20)
+    score = models.FloatField()
+    hits = models.PositiveIntegerField(default=0)
+    sample = models.CharField(max_length=120, blank=True, help_text="Potongan teks asli untuk admin")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    last_hit_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        unique_together = ('fingerprint', 'endpoint')
+
+    def __str__(self):
+        return f"[{self.endpoint}] {self.fingerprint[:12]} = {self.score:.3f}"
+
+
+class AttachmentImageHash(models.Model):
+    """
+    Perceptual hash (dHash 64-bit) lampiran gambar sebuah laporan, dihitung
+    saat upload. Dipakai untuk memakai ulang skor NSFW gambar yang sama /
+    hampir sama, dan untuk mencari semua laporan dengan gambar yang sama.
+    Lihat reports/image_hash.py.
+    """
+    report = models.OneToOneField(Report, on_delete=models.CASCADE, related_name='image_hash')
+    # 64-bit unsigned disimpan sebagai bigint signed
+    phash = models.BigIntegerField(db_index=True)
+    # 4 potongan 16-bit: dua hash dengan jarak Hamming <= 3 pasti sama di minimal satu band
+    band0 = models.IntegerField(db_index=True)
+    band1 = models.IntegerField(db_index=True)
+    band2 = models.IntegerField(db_index=True)
+    band3 = models.IntegerField(db_index=True)
+    nsfw_score = models.FloatField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.phash & 0xFFFFFFFFFFFFFFFF:016x} ({self.report_id})"
+
+
+class GeminiResponseCache(models.Model):
+    """
+    Cache persisten hasil generate_report_metadata.
+    key = sha256(deskripsi, judul, versi prompt, model), jadi laporan copy-paste
+    tidak memanggil Gemini lagi. Lihat reports/gemini_cache.py.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    response = models.JSONField()
+    model = models.CharField(max_length=50)
+    prompt_version = models.PositiveSmallIntegerField()
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    last_hit_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.key[:12]} ({self.model} v{self.prompt_version})"
+
+
+class ModerationTrace(models.Model):
+    """
+    Satu baris per stage pipeline moderasi per submission (trace_id sama untuk
+    satu submission). Ditulis bulk di akhir request / screening, lihat
+    reports/tracing.py. Dipakai dashboard latency p50/p95/p99 di admin.
+    """
+    trace_id = models.UUIDField(db_index=True)
+    report = models.ForeignKey(Report, on_delete=models.SET_NULL, blank=True, null=True, related_name='traces')
+    stage = models.CharField(max_length=40)
+    duration_ms = models.FloatField()
+    # ok | error | timeout | cancelled | fallback
+    outcome = models.CharField(max_length=20, default='ok')
+    score = models.FloatField(blank=True, null=True)
+    # hit | miss | prefilter | '' (stage tanpa cache)
+    cache = models.CharField(max_length=10, blank=True, default='')
+    error_class = models.CharField(max_length=60, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Dashboard: WHERE created_at >= ... GROUP BY stage
+            models.Index(fields=['created_at', 'stage'], name='trace_created_stage_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.stage} {self.duration_ms:.0f}ms {self.outcome}"
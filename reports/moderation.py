@@ -0,0 +1,220 @@
+"""
+Moderation executor untuk submit_report_api.
+
+Semua cek (gambling, toxicity, lampiran) saling independen, jadi dikirim
+sekaligus ke thread pool bersama. Satu submission punya satu deadline global;
+cek yang belum selesai saat deadline lewat dianggap skor 0.0 (sama seperti
+fallback di utils.py saat API error).
+"""
+import time
+import mimetypes
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from django.core.files.base import ContentFile
+from webapp import http_client
+from .utils import (
+    detect_gambling_probability,
+    detect_toxicity_probability,
+    score_image_nsfw,
+    extract_text_from_document,
+)
+from . import image_hash, tracing
+
+# Threshold yang sebelumnya hardcode di views.py
+GAMBLING_THRESHOLD = 0.25
+VIOLATION_THRESHOLD = 0.42
+
+# Bobot weighted penalty (title 20%, deskripsi 40%, lampiran 40%)
+TOXIC_WEIGHTS = {
+    'toxic_title': 0.2,
+    'toxic_description': 0.4,
+    'attachment': 0.4,
+}
+
+GAMBLING_CHECKS = ('gambling_title', 'gambling_description')
+
+# Pool dibagi semua request di worker ini, jadi jumlah thread tetap terbatas
+# walaupun banyak submission masuk bersamaan.
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'MODERATION_MAX_WORKERS', 8),
+    thread_name_prefix='moderation',
+)
+
+
+class ModerationResult:
+    """Hasil moderasi satu submission: skor, durasi, dan outcome per cek."""
+
+    def __init__(self):
+        self.scores = {}
+        self.timings = {}
+        self.outcomes = {}
+        self.verdict = 'approved'  # approved | gambling | violation
+        self.elapsed = 0.0
+        # Skor NSFW dari HF / cache hash, None kalau tidak dinilai (fallback, timeout, bukan gambar)
+        self.nsfw_score = None
+
+    @property
+    def gambling_score(self):
+        return sum(self.scores.get(name, 0.0) for name in GAMBLING_CHECKS)
+
+    @property
+    def weighted_score(self):
+        return sum(self.scores.get(name, 0.0) * weight for name, weight in TOXIC_WEIGHTS.items())
+
+    @property
+    def is_rejected(self):
+        return self.verdict != 'approved'
+
+    def as_dict(self):
+        return {
+            'verdict': self.verdict,
+            'elapsed_ms': round(self.elapsed * 1000, 1),
+            'scores': self.scores,
+            'timings_ms': {k: round(v * 1000, 1) for k, v in self.timings.items()},
+            'outcomes': self.outcomes,
+        }
+
+
+def _timed(func, *args):
+    """Jalankan func di worker thread dan kembalikan (hasil, durasi)."""
+    start = time.perf_counter()
+    value = func(*args)
+    return value, time.perf_counter() - start
+
+
+def _check_document(uploaded_file):
+    extracted_text = extract_text_from_document(uploaded_file)
+    if not extracted_text:
+        return 0.0
+    return detect_toxicity_probability(extracted_text)
+
+
+def _check_image(image_file, value=None):
+    """
+    Skor NSFW lampiran gambar. Gambar yang sama / hampir sama (jarak dHash
+    kecil) dengan lampiran yang sudah pernah dinilai tidak dikirim ke HF lagi.
+    `value`: dHash yang sudah dihitung / disimpan pemanggil (kalau None dihitung di sini).
+    """
+    with tracing.stage('nsfw') as stage:
+        if value is None:
+            value = image_hash.compute_dhash(image_file)
+        score = image_hash.cached_nsfw_score(value) if value is not None else None
+        stage.cache = 'hit' if score is not None else 'miss'
+        if score is None:
+            score = score_image_nsfw(image_file)
+        if value is not None:
+            image_hash.remember_score(value, score)
+        stage.score = score
+        if score is None:
+            stage.outcome = 'fallback'
+        return score
+
+
+def _snapshot_attachment(attachment):
+    """
+    Salin isi lampiran ke ContentFile terpisah supaya worker thread tidak
+    berbagi file pointer dengan upload asli (yang nanti disimpan ke storage,
+    bisa saja sebelum cek lampiran selesai kalau deadline lewat).
+    """
+    data = attachment.read()
+    attachment.seek(0)
+    snapshot = ContentFile(data, name=attachment.name)
+    snapshot.content_type = getattr(attachment, 'content_type', '') or mimetypes.guess_type(attachment.name)[0] or ''
+    return snapshot
+
+
+def _attachment_check(attachment):
+    """Pilih fungsi cek lampiran sesuai tipe file (None jika tidak dicek)."""
+    if not attachment:
+        return None
+    # File dari storage (worker screening) tidak punya content_type, tebak dari nama
+    content_type = getattr(attachment, 'content_type', '') or mimetypes.guess_type(attachment.name)[0] or ''
+    filename = attachment.name.lower()
+    if content_type.startswith('image/'):
+        return _check_image
+    if filename.endswith(('.pdf', '.docx', '.txt')):
+        return _check_document
+    return None
+
+
+def run_moderation_checks(title, description, attachment=None, deadline=None, image_hash_value=None):
+    """
+    Fan-out semua cek moderasi ke thread pool dan tunggu dengan deadline global.
+    `image_hash_value`: dHash lampiran gambar yang sudah diketahui pemanggil.
+
+    Begitu skor gambling sudah melewati threshold, cek toxicity yang belum
+    jalan dibatalkan dan hasilnya langsung 'gambling'.
+    """
+    if deadline is None:
+        deadline = getattr(settings, 'MODERATION_DEADLINE_SECONDS', 20)
+
+    result = ModerationResult()
+    started = time.perf_counter()
+
+    checks = {
+        'gambling_title': (detect_gambling_probability, title),
+        'gambling_description': (detect_gambling_probability, description),
+        'toxic_title': (detect_toxicity_probability, title),
+        'toxic_description': (detect_toxicity_probability, description),
+    }
+    attachment_func = _attachment_check(attachment)
+    image_check = attachment_func is _check_image
+    if image_check and image_hash_value is not None:
+        attachment_func = partial(_check_image, value=image_hash_value)
+    if attachment_func:
+        checks['attachment'] = (attachment_func, _snapshot_attachment(attachment))
+
+    # Panggilan HF di dalam cek ikut deadline ini: retry berhenti saat waktunya habis
+    with http_client.time_budget(deadline):
+        futures = {
+            tracing.submit(_executor, _timed, func, arg): name
+            for name, (func, arg) in checks.items()
+        }
+    pending = set(futures)
+
+    while pending:
+        remaining = deadline - (time.perf_counter() - started)
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            name = futures[future]
+            try:
+                score, duration = future.result()
+                if name == 'attachment' and image_check:
+                    result.nsfw_score = score
+                result.scores[name] = float(score or 0.0)
+                result.timings[name] = duration
+                result.outcomes[name] = 'ok'
+            except Exception as e:
+                print(f"❌ Moderation check '{name}' failed: {e}")
+                result.scores[name] = 0.0
+                result.outcomes[name] = f"error:{type(e).__name__}"
+
+        # Fail-fast: gambling sudah pasti ditolak, toxicity tidak perlu ditunggu
+        if result.gambling_score > GAMBLING_THRESHOLD:
+            result.verdict = 'gambling'
+            break
+
+    for future in pending:
+        name = futures[future]
+        future.cancel()
+        result.scores.setdefault(name, 0.0)
+        result.outcomes[name] = 'cancelled' if result.verdict == 'gambling' else 'timeout'
+
+    if result.verdict == 'approved' and result.weighted_score > VIOLATION_THRESHOLD:
+        result.verdict = 'violation'
+
+    result.elapsed = time.perf_counter() - started
+    for name in checks:
+        # Cek yang timeout / dibatalkan ditunggu selama durasi moderasi penuh
+        outcome, _, error = result.outcomes.get(name, 'ok').partition(':')
+        tracing.record(
+            f'check.{name}', result.timings.get(name, result.elapsed), outcome,
+            score=result.scores.get(name), error=error,
+        )
+    tracing.record('moderation', result.elapsed, result.verdict)
+    print(f"Moderation {result.verdict} in {result.elapsed:.2f}s: {result.as_dict()['timings_ms']}")
+    return result
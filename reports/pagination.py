@@ -0,0 +1,108 @@
+"""
+Keyset (cursor) pagination untuk feed infinite scroll.
+
+Paginator biasa menjalankan COUNT(*) seluruh laporan di setiap scroll dan
+OFFSET yang makin lambat di halaman dalam. Di sini halaman berikutnya
+diambil dengan WHERE (created_at, id) < (cursor) ORDER BY created_at DESC,
+id DESC LIMIT n+1, memakai index report_created_id_idx, jadi biayanya sama
+di halaman 1 maupun halaman ke-5000.
+
+Cursor dikirim ke client sebagai token opaque (base64 dari created_at + id
+baris terakhir). Hasil pencarian (reports/search.py) memakai varian dengan
+rank di depan: (rank, created_at, id).
+"""
+import base64
+import uuid
+from datetime import datetime
+from django.db.models import Q
+
+FEED_ORDERING = ('-created_at', '-id')
+SEARCH_ORDERING = ('-rank', '-created_at', '-id')
+
+
+def _encode(raw):
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def _decode(token):
+    return base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+
+
+def encode_cursor(report):
+    """Token dari baris terakhir halaman (model instance atau dict hasil .values())."""
+    if isinstance(report, dict):
+        created_at, report_id = report['created_at'], report['id']
+    else:
+        created_at, report_id = report.created_at, report.id
+    return _encode(f"{created_at.isoformat()}|{report_id}")
+
+
+def decode_cursor(token):
+    """(created_at, id) dari token, atau None kalau token kosong / tidak valid."""
+    if not token:
+        return None
+    try:
+        created_at, report_id = _decode(token).split('|', 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(report_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_page(queryset, cursor=None, per_page=6):
+    """
+    Satu halaman setelah `cursor` (token dari halaman sebelumnya).
+    Mengembalikan (items, next_cursor); next_cursor None kalau sudah habis.
+    """
+    queryset = queryset.order_by(*FEED_ORDERING)
+    position = decode_cursor(cursor)
+    if position is not None:
+        created_at, report_id = position
+        # created_at__lte ikut ditulis supaya planner memakai range scan index
+        queryset = queryset.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=report_id),
+            created_at__lte=created_at,
+        )
+
+    items = list(queryset[:per_page + 1])
+    if len(items) > per_page:
+        items = items[:per_page]
+        return items, encode_cursor(items[-1])
+    return items, None
+
+
+def encode_ranked_cursor(row):
+    """Token hasil pencarian dari dict baris terakhir (punya key `rank`)."""
+    return _encode(f"{row['rank']!r}|{row['created_at'].isoformat()}|{row['id']}")
+
+
+def decode_ranked_cursor(token):
+    if not token:
+        return None
+    try:
+        rank, created_at, report_id = _decode(token).split('|', 2)
+        return float(rank), datetime.fromisoformat(created_at), uuid.UUID(report_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def ranked_keyset_page(queryset, cursor=None, per_page=6):
+    """
+    Seperti keyset_page tapi urut (rank, created_at, id) menurun; queryset
+    harus punya annotation `rank`. Rank dihitung ulang di setiap request,
+    jadi cursor hanya berlaku untuk kata kunci yang sama.
+    """
+    queryset = queryset.order_by(*SEARCH_ORDERING)
+    position = decode_ranked_cursor(cursor)
+    if position is not None:
+        rank, created_at, report_id = position
+        queryset = queryset.filter(
+            Q(rank__lt=rank)
+            | Q(rank=rank, created_at__lt=created_at)
+            | Q(rank=rank, created_at=created_at, id__lt=report_id)
+        )
+
+    items = list(queryset[:per_page + 1])
+    if len(items) > per_page:
+        items = items[:per_page]
+        return items, encode_ranked_cursor(items[-1])
+    return items, None
@@ -0,0 +1,87 @@
+"""
+Toggle reaction dalam satu transaksi pendek, maksimal 3 statement:
+
+1. DELETE reaction user ini di laporan ini RETURNING type lamanya
+2. INSERT tipe baru ... ON CONFLICT DO NOTHING (dilewati kalau user klik
+   tipe yang sama = unlike)
+3. UPDATE counter di Report (x = x + delta, updated_at = now) RETURNING
+   semua counter; updated_at ikut naik supaya validator conditional GET
+   (max updated_at) berubah setiap ada reaction
+
+Delta counter hanya diambil dari baris yang benar-benar dihapus / disisipkan
+oleh statement kita sendiri, jadi double-click paralel tidak memicu
+IntegrityError unique_together dan counter tetap sama dengan isi tabel
+Reaction.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Report, Reaction, REACTION_COUNT_FIELDS
+
+COUNTER_FIELDS = [*REACTION_COUNT_FIELDS.values(), 'total_reactions']
+
+
+def _sql():
+    reaction = connection.ops.quote_name(Reaction._meta.db_table)
+    report = connection.ops.quote_name(Report._meta.db_table)
+    delta_columns = ', '.join(f'{field} = {field} + %s' for field in COUNTER_FIELDS)
+    return {
+        'delete': f'DELETE FROM {reaction} WHERE user_id = %s AND report_id = %s RETURNING type',
+        'insert': (
+            f'INSERT INTO {reaction} (user_id, report_id, type, created_at) VALUES (%s, %s, %s, %s) '
+            f'ON CONFLICT (user_id, report_id) DO NOTHING RETURNING id'
+        ),
+        'counters': (
+            f'UPDATE {report} SET {delta_columns}, updated_at = %s WHERE id = %s '
+            f'RETURNING {", ".join(COUNTER_FIELDS)}'
+        ),
+    }
+
+
+def toggle_reaction(user_id, report_id, rtype):
+    """
+    Mengembalikan (action, counts, total_reactions); action salah satu dari
+    'created', 'updated', 'removed', atau 'unchanged' (kalah race dengan
+    request lain dari user yang sama). Raise Report.DoesNotExist kalau
+    laporan tidak ada (transaksi di-rollback).
+    """
+    sql = _sql()
+    report_pk = Report._meta.pk.get_db_prep_value(report_id, connection)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(sql['delete'], [user_id, report_pk])
+        row = cursor.fetchone()
+        removed = row[0] if row else None
+
+        added = None
+        if removed != rtype:
+            cursor.execute(sql['insert'], [user_id, report_pk, rtype, now])
+            if cursor.fetchone():
+                added = rtype
+
+        deltas = dict.fromkeys(COUNTER_FIELDS, 0)
+        if removed:
+            if removed in REACTION_COUNT_FIELDS:
+                deltas[REACTION_COUNT_FIELDS[removed]] -= 1
+            deltas['total_reactions'] -= 1
+        if added:
+            deltas[REACTION_COUNT_FIELDS[added]] += 1
+            deltas['total_reactions'] += 1
+
+        cursor.execute(sql['counters'], [*deltas.values(), now, report_pk])
+        row = cursor.fetchone()
+        if row is None:
+            raise Report.DoesNotExist(report_id)
+
+    if added and removed:
+        action = 'updated'
+    elif added:
+        action = 'created'
+    elif removed:
+        action = 'removed'
+    else:
+        action = 'unchanged'
+
+    values = dict(zip(COUNTER_FIELDS, row))
+    counts = {key: values[field] for key, field in REACTION_COUNT_FIELDS.items()}
+    return action, counts, values['total_reactions']
@@ -0,0 +1,145 @@
+"""
+Screening laporan: moderasi lalu status 'pending' atau 'rejected'.
+
+Default (REPORT_SCREENING_ASYNC=False, deploy tanpa worker): create_screened_report
+memoderasi teks dan lampiran yang masih di memori, baru kemudian menyimpan
+Report dengan status akhirnya. Lampiran laporan yang ditolak tidak pernah
+di-upload ke storage.
+
+REPORT_SCREENING_ASYNC=True: submit_report_api menyimpan Report 'screening',
+lalu worker (python manage.py moderation_worker) mengambil laporan satu per
+satu dengan SELECT ... FOR UPDATE SKIP LOCKED dan menjalankan screen_report.
+Lampiran laporan yang ditolak dihapus dari storage.
+
+Ringkasan Gemini diisi belakangan oleh reports/enrichment.py setelah
+transaksi commit.
+"""
+from functools import partial
+from django.db import transaction
+from .models import Report
+from .moderation import run_moderation_checks
+from . import enrichment, image_hash, tracing
+
+REJECTION_MESSAGES = {
+    'gambling': 'System detected gambling or spam content. Submission rejected.',
+    'violation': 'Laporan mengandung konten yang melanggar aturan.',
+}
+
+
+def status_payload(status, reason=''):
+    """Bentuk JSON yang dipakai endpoint submit & polling status."""
+    if status == 'screening':
+        return {'status': 'screening', 'message': 'Laporan sedang diperiksa...'}
+    if status == 'rejected' and reason:
+        return {'status': 'rejected', 'reason': reason, 'message': REJECTION_MESSAGES.get(reason, 'Laporan ditolak.')}
+    return {'status': 'success', 'message': 'Laporan berhasil dikirim!', 'redirect_url': '/reports/'}
+
+
+def _approve(report):
+    # Gemini jalan setelah commit, jadi laporan sudah terlihat dengan judul user
+    transaction.on_commit(partial(enrichment.enqueue, report.id))
+
+
+def index_image(report, attachment, value=None, nsfw_score=None):
+    """
+    Hash perceptual lampiran gambar: dipakai cek NSFW (cache) dan pencarian
+    admin. Mengembalikan hash-nya (None kalau bukan gambar / gagal).
+    """
+    if value is None:
+        value = image_hash.image_hash_of(attachment)
+    if value is None:
+        return None
+    # Hash tetap disimpan untuk laporan yang ditolak: skor NSFW-nya dipakai ulang kalau gambarnya dikirim lagi
+    try:
+        image_hash.index_attachment(report, attachment, value, nsfw_score)
+    except Exception as e:
+        print(f"⚠️ Gagal menyimpan hash lampiran: {e}")
+    return value
+
+
+def create_screened_report(attachment=None, **fields):
+    """
+    Moderasi submission (lampiran masih UploadedFile di memori) lalu simpan
+    Report dengan status akhirnya. Mengembalikan (report, ModerationResult).
+    """
+    # Gambar di-decode sekali: hash yang sama dipakai cek NSFW dan disimpan ke index
+    value = image_hash.image_hash_of(attachment)
+    with tracing.traced() as trace:
+        moderation = run_moderation_checks(
+            fields.get('title', ''), fields['description'], attachment, image_hash_value=value)
+        rejected = moderation.is_rejected
+        report = Report.objects.create(
+            **fields,
+            # Lampiran yang ditolak (mis. gambar NSFW) tidak ikut di-upload
+            attachment=None if rejected else attachment,
+            status='rejected' if rejected else 'pending',
+            moderation_reason=moderation.verdict if rejected else '',
+        )
+        trace.report_id = report.id
+
+    # Moderasi jalan sebelum baris hash ada, jadi skor NSFW-nya ikut disimpan di sini
+    index_image(report, attachment, value, moderation.nsfw_score)
+    if not rejected:
+        _approve(report)
+    return report, moderation
+
+
+def screen_report(report):
+    """
+    Jalankan moderasi untuk satu laporan 'screening' (lampiran dibaca dari
+    storage) dan jadwalkan enrichment Gemini kalau lolos. Mengembalikan
+    ModerationResult.
+    """
+    attachment = None
+    if report.attachment:
+        try:
+            report.attachment.open('rb')
+            attachment = report.attachment
+        except Exception as e:
+            print(f"❌ Gagal membuka lampiran {report.id}: {e}")
+
+    try:
+        # Hash sudah disimpan saat submit (index_image), tidak perlu decode gambar lagi
+        value = image_hash.stored_hash(report.id) if attachment else None
+        with tracing.traced(report.id):
+            moderation = run_moderation_checks(
+                report.title, report.description, attachment, image_hash_value=value)
+    finally:
+        if attachment:
+            attachment.close()
+
+    if moderation.is_rejected:
+        report.status = 'rejected'
+        report.moderation_reason = moderation.verdict
+        update_fields = ['status', 'moderation_reason', 'updated_at']
+        if report.attachment:
+            # Konten yang ditolak (mis. gambar NSFW) tidak disimpan di storage
+            try:
+                report.attachment.delete(save=False)
+                update_fields.append('attachment')
+            except Exception as e:
+                print(f"⚠️ Gagal menghapus lampiran {report.id}: {e}")
+        report.save(update_fields=update_fields)
+        return moderation
+
+    report.status = 'pending'
+    report.save(update_fields=['status', 'updated_at'])
+    _approve(report)
+    return moderation
+
+
+def process_next_report():
+    """
+    Ambil satu laporan 'screening' tertua yang belum dikunci worker lain.
+    Row lock dipegang sampai screening selesai; kalau worker mati di tengah
+    jalan, transaksi rollback dan laporan tetap 'screening' untuk diambil ulang.
+    """
+    with transaction.atomic():
+        report = Report.objects.select_for_update(skip_locked=True)\
+                               .filter(status='screening')\
+                               .order_by('created_at')\
+                               .first()
+        if report is None:
+            return None
+        screen_report(report)
+        return report
@@ -0,0 +1,109 @@
+"""
+Pencarian full-text + filter facet atas laporan publik.
+
+PostgreSQL: kolom `search_vector` (tsvector GENERATED ALWAYS ... STORED)
+dari judul (bobot A), ringkasan AI (B) dan deskripsi (C) dengan config
+'simple' (tanpa stemming/stopword bahasa Inggris, jadi kata Indonesia
+dicocokkan apa adanya), plus index GIN. Kolom ini sengaja tidak ada di
+model karena Django tidak boleh ikut menulis generated column; dibuat lewat
+post_migrate seperti tabel rate limiter.
+
+Hasil pencarian diurutkan ts_rank lalu (created_at, id) dan dipaginasi
+keyset. Filter category / type / status memakai index B-tree komposit
+(facet, created_at, id) di Report.Meta, jadi tanpa kata kunci pun urutan
+feed tetap diambil dari index.
+
+Backend lain (SQLite untuk development) jatuh ke icontains tanpa ranking.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db import connection, connections, DEFAULT_DB_ALIAS
+from django.db.models import Expression, F, FloatField, Q
+from django.db.models.functions import Cast
+from . import feed
+from .models import Report
+from .pagination import keyset_page, ranked_keyset_page
+from .utiliyChoices import CATEGORY_CHOICES, REPORT_TYPE_CHOICES, STATUS_CHOICES
+
+SEARCH_CONFIG = 'simple'
+COLUMN = 'search_vector'
+INDEX = 'report_search_gin_idx'
+MAX_QUERY_CHARS = 200
+
+# Nilai yang boleh dipakai per facet (status 'screening' tidak pernah tampil ke publik)
+FACETS = {
+    'category': {value for value, _ in CATEGORY_CHOICES},
+    'type': {value for value, _ in REPORT_TYPE_CHOICES},
+    'status': {value for value, _ in STATUS_CHOICES if value != 'screening'},
+}
+
+
+def create_search_column(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Dipanggil dari post_migrate (lihat reports/apps.py); aman dijalankan berulang."""
+    db = connections[using]
+    if db.vendor != 'postgresql':
+        return
+    table = db.ops.quote_name(Report._meta.db_table)
+    with db.cursor() as cursor:
+        cursor.execute(f"""
+            ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {COLUMN} tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(ai_summary, '')), 'B') ||
+                setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(description, '')), 'C')
+            ) STORED
+        """)
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {INDEX} ON {table} USING GIN ({COLUMN})')
+
+
+class SearchDocument(Expression):
+    """Kolom search_vector tabel utama query (alias ikut benar di dalam subquery)."""
+    output_field = SearchVectorField()
+
+    def as_sql(self, compiler, connection):
+        alias = compiler.query.get_initial_alias()
+        return f'{compiler.quote_name_unless_alias(alias)}.{COLUMN}', []
+
+
+def clean_query(text):
+    return ' '.join((text or '').split())[:MAX_QUERY_CHARS]
+
+
+def parse_facets(params):
+    """{field: value} dari query string; ValueError kalau nilainya tidak dikenal."""
+    facets = {}
+    for field, allowed in FACETS.items():
+        value = params.get(field, '').strip()
+        if not value:
+            continue
+        if value not in allowed:
+            raise ValueError(f"Nilai {field} tidak dikenal: {value}")
+        facets[field] = value
+    return facets
+
+
+def match(queryset, text):
+    """
+    (queryset, ranked): laporan yang cocok dengan `text`. Di PostgreSQL
+    queryset diberi annotation `rank` dan `ranked` True.
+    """
+    if connection.vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        queryset = queryset.alias(document=SearchDocument()).filter(document=query)
+        # ts_rank mengembalikan real (float4); di-cast ke double supaya nilai di cursor
+        # (float Python) sama persis saat dibandingkan lagi (rank = %s) di halaman berikutnya
+        return queryset.annotate(rank=Cast(SearchRank(F('document'), query), FloatField())), True
+    return queryset.filter(
+        Q(title__icontains=text) | Q(description__icontains=text) | Q(ai_summary__icontains=text)
+    ), False
+
+
+def search_rows(text='', facets=None, cursor=None, per_page=feed.PER_PAGE):
+    """(rows, next_cursor) dalam format feed.feed_rows(), ditambah `rank` kalau ada."""
+    queryset = Report.objects.public().filter(**(facets or {}))
+    text = clean_query(text)
+    if not text:
+        return keyset_page(feed.project(queryset), cursor, per_page)
+
+    queryset, ranked = match(queryset, text)
+    if ranked:
+        return ranked_keyset_page(feed.project(queryset, 'rank'), cursor, per_page)
+    return keyset_page(feed.project(queryset), cursor, per_page)
@@ -0,0 +1,154 @@
+"""
+Pre-filter leksikal offline untuk spam judi online.
+
+Spam judol ("slot gacor", "maxwin", "depo pulsa", ...) sangat repetitif, jadi
+bisa ditolak dalam hitungan mikrodetik sebelum bayar translate + HF.
+Daftar istilah ada di reports/data/gambling_terms.txt (bisa diedit, otomatis
+di-reload saat file berubah). Semua istilah digabung jadi satu regex berbentuk
+trie supaya satu kali scan teks cukup untuk semua istilah.
+"""
+import os
+import re
+import threading
+import unicodedata
+from django.conf import settings
+
+SPAM_SCORE_THRESHOLD = 1.0
+# Bobot minimal istilah "kuat" (nama situs / brand / frasa khas judol). Penolakan langsung butuh
+# minimal satu istilah kuat; gabungan istilah lemah ("deposit", "daftar sekarang", "klik link")
+# juga muncul di keluhan kampus biasa, jadi cukup ditandai borderline dan diputuskan model.
+STRONG_TERM_WEIGHT = 1.0
+
+DEFAULT_TERMS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'gambling_terms.txt')
+
+# Leetspeak umum di spam judol: "sl0t g4c0r", "m4xw1n", "d3p0"
+_LEET = str.maketrans({
+    '0': 'o', '1': 'i', '2': 'z', '3': 'e', '4': 'a',
+    '5': 's', '6': 'g', '7': 't', '8': 'b', '9': 'g',
+    '@': 'a', '$': 's',
+})
+_NON_LETTER = re.compile(r'[^a-z]+')
+_REPEATED = re.compile(r'([a-z])\1+')
+
+
+def normalize(text):
+    """
+    Lowercase, buang diakritik (ｓｌｏｔ / slöt -> slot), leetspeak -> huruf,
+    huruf berulang dirapatkan (gacorrr -> gacor), selain huruf jadi spasi.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.lower().translate(_LEET)
+    text = _NON_LETTER.sub(' ', text)
+    text = _REPEATED.sub(r'\1', text)
+    return f" {text.strip()} "
+
+
+def _trie_pattern(words):
+    """Bangun regex dari trie, contoh: slot, slot gacor, situs -> s(?:lot(?: gacor)?|itus)"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        optional = '' in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if optional else group
+
+    return build(trie)
+
+
+class GamblingMatcher:
+    """Matcher terkompilasi: satu scan regex untuk seluruh daftar istilah."""
+
+    def __init__(self, terms):
+        # terms: {istilah_asli: bobot}; key internal memakai bentuk normal
+        self.weights = {}
+        for term, weight in terms.items():
+            key = normalize(term).strip()
+            if key:
+                self.weights[key] = max(weight, self.weights.get(key, 0.0))
+        pattern = _trie_pattern(self.weights) if self.weights else r'(?!x)x'
+        self.regex = re.compile(r'(?<![a-z])(?:' + pattern + r')(?![a-z])')
+
+    def find_terms(self, text):
+        if not text:
+            return set()
+        return {m.group(0) for m in self.regex.finditer(normalize(text))}
+
+    def score(self, text):
+        """Jumlah bobot istilah unik yang ditemukan, plus daftar istilahnya."""
+        found = self.find_terms(text)
+        return sum(self.weights[t] for t in found), sorted(found)
+
+    def verdict(self, score, found):
+        """'spam' (pasti, ada istilah kuat), 'borderline' (istilah lemah saja) atau 'clean'."""
+        if score >= SPAM_SCORE_THRESHOLD and any(self.weights[t] >= STRONG_TERM_WEIGHT for t in found):
+            return 'spam'
+        return 'borderline' if found else 'clean'
+
+    def is_obvious_spam(self, text):
+        return self.verdict(*self.score(text)) == 'spam'
+
+
+def load_terms(path):
+    terms = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.rsplit(None, 1)
+            try:
+                weight = float(parts[1]) if len(parts) == 2 else 1.0
+                term = parts[0] if len(parts) == 2 else line
+            except ValueError:
+                term, weight = line, 1.0
+            terms[term] = weight
+    return terms
+
+
+_matcher = None
+_matcher_mtime = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    """Matcher singleton; dibangun ulang kalau file daftar istilah diubah."""
+    global _matcher, _matcher_mtime
+    path = getattr(settings, 'GAMBLING_TERMS_FILE', DEFAULT_TERMS_FILE)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    if _matcher is None or mtime != _matcher_mtime:
+        with _matcher_lock:
+            if _matcher is None or mtime != _matcher_mtime:
+                try:
+                    terms = load_terms(path)
+                except OSError as e:
+                    print(f"⚠️ Gagal membaca daftar istilah judol {path}: {e}")
+                    terms = {}
+                _matcher = GamblingMatcher(terms)
+                _matcher_mtime = mtime
+    return _matcher
+
+
+def prefilter_gambling(*texts):
+    """
+    Cek cepat gabungan beberapa teks (judul, deskripsi, ...).
+    Kembalikan (verdict, score, matched_terms); verdict 'spam' hanya kalau
+    pasti (lihat GamblingMatcher.verdict).
+    """
+    matcher = get_matcher()
+    score, matched = matcher.score("\n".join(t for t in texts if t))
+    return matcher.verdict(score, matched), score, matched
@@ -1,3 +1,639 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+import zipfile
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, close_old_connections
+from django.db.models import Count, Q
+from django.conf import settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from webapp import http_client, ratelimit
+from .models import AttachmentImageHash, GeminiResponseCache, ModerationVerdict, Report, Reaction, REACTION_COUNT_FIELDS
+from . import enrichment, extraction, feed, gemini_cache, image_hash, moderation, screening, search, utils, verdict_cache
+from .moderation import ModerationResult
+from .reactions import toggle_reaction
+from .spam_filter import prefilter_gambling
+from .pagination import FEED_ORDERING, decode_ranked_cursor, encode_ranked_cursor, keyset_page
 
-# Create your tests here.
+
+def _make_report(author):
+    return Report.objects.create(
+        author=author, title='Jalan rusak', description='Lubang besar di jalan utama',
+        type='complaint', category='facility', status='pending',
+    )
+
+
+def _actual_counts(report):
+    annotations = {field: Count('id', filter=Q(type=rtype)) for rtype, field in REACTION_COUNT_FIELDS.items()}
+    return Reaction.objects.filter(report=report).aggregate(total_reactions=Count('id'), **annotations)
+
+
+def _stored_counts(report):
+    return Report.objects.filter(pk=report.pk).values(*REACTION_COUNT_FIELDS.values(), 'total_reactions').get()
+
+
+class GamblingPrefilterTests(TestCase):
+    CAMPUS_REPORTS = [
+        "Website KRS down, tolong sediakan link alternatif untuk pengisian",
+        "Jadwal konsultasi dosen wali pakai slot online di SIAKAD",
+        "Pembayaran UKT via deposit tidak bisa di withdraw, tolong daftar sekarang dibuka",
+        "Bonus nilai tidak jelas, daftar sekarang untuk remedial, klik link di grup",
+    ]
+
+    def test_campus_phrasing_is_not_hard_rejected(self):
+        for text in self.CAMPUS_REPORTS:
+            with self.subTest(text=text):
+                self.assertNotEqual(prefilter_gambling('Keluhan', text)[0], 'spam')
+
+    def test_weak_terms_only_are_borderline(self):
+        verdict, score, _ = prefilter_gambling('', self.CAMPUS_REPORTS[2])
+        self.assertEqual(verdict, 'borderline')
+        self.assertGreaterEqual(score, 1.0)
+
+    def test_anti_gambling_complaint_is_not_rejected(self):
+        verdict, _, terms = prefilter_gambling(
+            'Judol di asrama', 'Banyak mahasiswa di asrama kecanduan judi online, mohon kampus bertindak tegas')
+        self.assertEqual(verdict, 'borderline')
+        self.assertIn('judi online', terms)
+
+    def test_topic_with_promo_wording_is_rejected(self):
+        self.assertEqual(prefilter_gambling('', 'Judi online gacor hari ini, bonus new member 100%')[0], 'spam')
+
+    def test_strong_term_is_rejected(self):
+        self.assertEqual(prefilter_gambling('Info', 'Situs sl0t g4c0rrr hari ini pasti maxwin')[0], 'spam')
+        self.assertEqual(prefilter_gambling('Laporan', 'AC di ruang kelas mati')[0], 'clean')
+
+
+def _docx_bytes(paragraphs):
+    body = ''.join(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs)
+    xml = f'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>{body}</w:body></w:document>'
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('word/document.xml', xml)
+    return buffer.getvalue()
+
+
+def _moderation(verdict):
+    result = ModerationResult()
+    result.verdict = verdict
+    return result
+
+
+class ScreeningAttachmentTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        storage = override_settings(
+            MEDIA_ROOT=self.media, DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+        storage.enable()
+        self.addCleanup(storage.disable)
+        self.author = User.objects.create_user('pelapor')
+
+    def _upload(self):
+        return SimpleUploadedFile('bukti.txt', b'isi lampiran', content_type='text/plain')
+
+    def _stored_files(self):
+        return [name for _, _, names in os.walk(self.media) for name in names]
+
+    def test_inline_moderates_upload_before_saving(self):
+        upload = self._upload()
+        with mock.patch.object(screening, 'run_moderation_checks', return_value=_moderation('violation')) as checks:
+            report, _ = screening.create_screened_report(
+                attachment=upload, author=self.author, title='Judul', description='Isi', type='complaint', category='other')
+        self.assertIs(checks.call_args.args[2], upload)
+        self.assertEqual((report.status, report.moderation_reason), ('rejected', 'violation'))
+        self.assertFalse(report.attachment)
+        self.assertEqual(self._stored_files(), [])
+
+    def test_inline_approved_keeps_attachment(self):
+        with mock.patch.object(screening, 'run_moderation_checks', return_value=_moderation('approved')):
+            report, _ = screening.create_screened_report(
+                attachment=self._upload(), author=self.author, title='Judul', description='Isi', type='complaint', category='other')
+        self.assertEqual(report.status, 'pending')
+        self.assertEqual(len(self._stored_files()), 1)
+
+    def test_worker_rejection_deletes_stored_attachment(self):
+        report = Report.objects.create(
+            author=self.author, title='Judul', description='Isi', type='complaint', category='other',
+            attachment=self._upload(), status='screening')
+        self.assertEqual(len(self._stored_files()), 1)
+        with mock.patch.object(screening, 'run_moderation_checks', return_value=_moderation('violation')):
+            screening.screen_report(report)
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'rejected')
+        self.assertFalse(report.attachment)
+        self.assertEqual(self._stored_files(), [])
+
+
+def _png_upload(name='bukti.png'):
+    buffer = io.BytesIO()
+    Image.linear_gradient('L').resize((64, 64)).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageHashReuseTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('pelapor')
+        for name in ('detect_gambling_probability', 'detect_toxicity_probability'):
+            patcher = mock.patch.object(moderation, name, return_value=0.0)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _screen(self, func, *args, **kwargs):
+        with mock.patch.object(moderation, 'score_image_nsfw', return_value=0.1), \
+                mock.patch.object(image_hash, 'compute_dhash', wraps=image_hash.compute_dhash) as dhash, \
+                mock.patch.object(Report.attachment.field.storage, 'save', side_effect=lambda name, content, **kw: name), \
+                mock.patch.object(Report.attachment.field.storage, 'open', side_effect=lambda name, mode='rb': _png_upload()):
+            func(*args, **kwargs)
+        return dhash.call_count
+
+    def test_inline_submission_hashes_image_once(self):
+        calls = self._screen(screening.create_screened_report, attachment=_png_upload(), author=self.author,
+                             title='Judul', description='Isi', type='complaint', category='other')
+        self.assertEqual(calls, 1)
+        self.assertEqual(AttachmentImageHash.objects.get().nsfw_score, 0.1)
+
+    def test_worker_uses_stored_hash(self):
+        upload = _png_upload()
+        report = Report.objects.create(author=self.author, title='Judul', description='Isi',
+                                       type='complaint', category='other', status='screening')
+        screening.index_image(report, upload)
+        Report.objects.filter(pk=report.pk).update(attachment='report_attachments/bukti.png')
+        report.refresh_from_db()
+        self.assertEqual(self._screen(screening.screen_report, report), 0)
+
+
+class EnrichmentModeTests(TestCase):
+    AI_DATA = {'summary': 'Ringkasan AI', 'sentiment': 'Negatif', 'final_title': ''}
+
+    def _submit(self):
+        with mock.patch.object(screening, 'run_moderation_checks', return_value=_moderation('approved')), \
+                self.captureOnCommitCallbacks(execute=True):
+            report, _ = screening.create_screened_report(
+                author=User.objects.create_user('pelapor'), title='Judul', description='Isi',
+                type='complaint', category='other')
+        report.refresh_from_db()
+        return report
+
+    @override_settings(ENRICHMENT_INLINE=True)
+    def test_inline_enrichment_finishes_within_request(self):
+        with mock.patch.object(enrichment, 'request_report_metadata', return_value=self.AI_DATA), \
+                mock.patch.object(enrichment._executor, 'submit') as submit:
+            report = self._submit()
+        self.assertEqual(report.ai_summary, 'Ringkasan AI')
+        submit.assert_not_called()
+
+    @override_settings(ENRICHMENT_INLINE=False)
+    def test_background_enrichment_uses_thread_pool(self):
+        with mock.patch.object(enrichment._executor, 'submit') as submit:
+            report = self._submit()
+        submit.assert_called_once_with(enrichment._run, report.id)
+        enrichment._change_depth(-1)
+
+
+class DocumentExtractionTests(TestCase):
+    def test_falls_back_in_process_when_workers_cannot_start(self):
+        upload = SimpleUploadedFile('lampiran.docx', _docx_bytes(['Dosen sering telat', 'Ruang kelas panas']))
+        with mock.patch.object(extraction, '_Worker', side_effect=OSError('no semaphores')), \
+                mock.patch.object(extraction, '_pool', None), \
+                mock.patch.object(extraction, '_pool_unavailable', False):
+            text = extraction.extract_text(upload)
+            self.assertTrue(extraction._pool_unavailable)
+        self.assertEqual(text, 'Dosen sering telat\nRuang kelas panas')
+        self.assertEqual(upload.tell(), 0)
+
+
+class TranslateFallbackVerdictTests(TestCase):
+    TEXT = 'Ayo daftar sekarang, dijamin menang banyak setiap hari di situs kami'
+
+    def setUp(self):
+        utils._translation_cache.clear()
+
+    def test_score_from_untranslated_text_is_not_cached(self):
+        with mock.patch.object(utils, '_google_translator', side_effect=RuntimeError('down')), \
+                mock.patch.object(utils._spam_batcher, 'score', return_value=0.1) as score:
+            self.assertEqual(utils.detect_gambling_probability(self.TEXT), 0.1)
+            self.assertEqual(score.call_args.args[0], self.TEXT)
+        self.assertFalse(ModerationVerdict.objects.exists())
+
+    def test_score_from_translated_text_is_cached(self):
+        translator = mock.Mock()
+        translator.translate.return_value = 'Register now, guaranteed to win big every day on our site'
+        with mock.patch.object(utils, '_google_translator', return_value=translator), \
+                mock.patch.object(utils._spam_batcher, 'score', return_value=0.9):
+            utils.detect_gambling_probability(self.TEXT)
+        self.assertEqual(ModerationVerdict.objects.get().score, 0.9)
+
+
+class DBCacheTests(TestCase):
+    def test_evict_drops_expired_then_least_recently_hit(self):
+        for cache, make in (
+            (verdict_cache.cache, lambda i: ModerationVerdict(fingerprint=f'f{i}', endpoint='spam', score=0.5)),
+            (gemini_cache.cache, lambda i: GeminiResponseCache(key=f'k{i}', response={}, model='m', prompt_version=1)),
+        ):
+            model = cache.model
+            model.objects.bulk_create([make(i) for i in range(4)])
+            pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            model.objects.filter(pk=pks[0]).update(created_at=timezone.now() - cache.ttl() - timedelta(seconds=1))
+            cache.record_hits(model.objects.filter(pk__in=pks[2:]))
+
+            self.assertEqual(cache.evict(max_rows=2), (1, 1))
+            self.assertEqual(set(model.objects.values_list('pk', flat=True)), set(pks[2:]))
+            self.assertEqual(set(cache.fresh().values_list('hits', flat=True)), {1})
+
+
+class HttpClientTests(TestCase):
+    ENDPOINT = 'test-endpoint'
+
+    def tearDown(self):
+        http_client._breakers.pop(self.ENDPOINT, None)
+
+    def test_half_open_probe_released_after_unexpected_exception(self):
+        breaker = http_client.get_breaker(self.ENDPOINT)
+        breaker.state, breaker.opened_at = 'open', time.monotonic() - breaker.reset_timeout - 1
+
+        with mock.patch.object(http_client._session, 'post', side_effect=ValueError('bug')):
+            with self.assertRaises(ValueError):
+                http_client.post(self.ENDPOINT, 'http://hf.test')
+        self.assertEqual(breaker.state, 'half_open')
+
+        with mock.patch.object(http_client._session, 'post', return_value=mock.Mock(status_code=200)):
+            self.assertEqual(http_client.post(self.ENDPOINT, 'http://hf.test').status_code, 200)
+        self.assertEqual(breaker.state, 'closed')
+
+    def test_retries_stop_when_budget_is_spent(self):
+        with mock.patch.object(http_client._session, 'post', return_value=mock.Mock(status_code=503, headers={})) as post, \
+                mock.patch.object(http_client, '_backoff', return_value=0.5), \
+                mock.patch.object(http_client.time, 'sleep') as sleep:
+            with http_client.time_budget(0.2):
+                response = http_client.post(self.ENDPOINT, 'http://hf.test')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(post.call_count, 1)
+        self.assertLessEqual(max(post.call_args.kwargs['timeout']), 0.2)
+        sleep.assert_not_called()
+
+    def test_spent_deadline_sends_nothing(self):
+        with mock.patch.object(http_client._session, 'post') as post:
+            with self.assertRaises(http_client.DeadlineExceeded):
+                http_client.post(self.ENDPOINT, 'http://hf.test', deadline=time.monotonic() - 1)
+        post.assert_not_called()
+        self.assertEqual(http_client.get_breaker(self.ENDPOINT).failures, 0)
+
+
+class RateLimitTests(TestCase):
+    def test_burst_then_reject(self):
+        for _ in range(3):
+            self.assertTrue(ratelimit.hit('test:burst', limit=3, period=60)[0])
+        allowed, retry_after = ratelimit.hit('test:burst', limit=3, period=60)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        self.assertLessEqual(retry_after, 20)
+
+    def test_refund_returns_quota(self):
+        self.assertTrue(ratelimit.hit('test:refund', limit=1, period=60)[0])
+        self.assertFalse(ratelimit.hit('test:refund', limit=1, period=60)[0])
+        ratelimit.refund('test:refund', limit=1, period=60)
+        self.assertTrue(ratelimit.hit('test:refund', limit=1, period=60)[0])
+
+    def test_keys_are_independent(self):
+        self.assertTrue(ratelimit.hit('test:a', limit=1, period=60)[0])
+        self.assertTrue(ratelimit.hit('test:b', limit=1, period=60)[0])
+
+    def test_client_ip_uses_trusted_forwarded_hop(self):
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='1.1.1.1, 203.0.113.7')
+        with self.settings(RATELIMIT_PROXY_HOPS=1):
+            self.assertEqual(ratelimit.client_ip(request), '203.0.113.7')
+        with self.settings(RATELIMIT_PROXY_HOPS=2):
+            self.assertEqual(ratelimit.client_ip(request), '1.1.1.1')
+        with self.settings(RATELIMIT_PROXY_HOPS=0):
+            self.assertEqual(ratelimit.client_ip(request), '10.0.0.1')
+
+    def test_otp_limited_per_session_across_emails_and_ips(self):
+        User.objects.create_user('tamu', password='rahasia')
+        self.client.login(username='tamu', password='rahasia')
+        url = reverse('profiles:request-otp')
+        limit = settings.RATELIMIT_OTP_SESSION_PER_10_MIN
+        with mock.patch('profiles.views.send_otp_email', return_value=True):
+            for i in range(limit + 1):
+                response = self.client.post(url, {'email': f'mhs{i}@kampus.ac.id'}, secure=True,
+                                            HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')
+        self.assertEqual(response.status_code, 429)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'butuh PostgreSQL (koneksi paralel)')
+class RateLimitConcurrencyTests(TransactionTestCase):
+    """Banyak thread (masing-masing koneksi DB sendiri, seperti worker berbeda) menembak key yang sama."""
+
+    THREADS = 32
+    LIMIT = 5
+
+    def test_exact_limit_under_parallel_load(self):
+        ratelimit.create_table()
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                barrier.wait()
+                allowed, _ = ratelimit.hit('test:parallel', limit=self.LIMIT, period=60)
+                with lock:
+                    results.append(allowed)
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), self.THREADS)
+        self.assertEqual(results.count(True), self.LIMIT)
+
+
+class ReactionToggleTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('pelapor')
+        self.report = _make_report(self.user)
+
+    def _toggle(self, rtype, user=None):
+        with CaptureQueriesContext(connection) as ctx:
+            result = toggle_reaction((user or self.user).id, self.report.id, rtype)
+        # SAVEPOINT / RELEASE hanya muncul karena TestCase membungkus test dengan transaksi
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql'].upper()]
+        return result, statements
+
+    def test_create_update_remove(self):
+        (action, counts, total), statements = self._toggle('agree')
+        self.assertEqual(action, 'created')
+        self.assertEqual((counts['agree'], total), (1, 1))
+        self.assertEqual(len(statements), 3)
+
+        (action, counts, total), statements = self._toggle('sad')
+        self.assertEqual(action, 'updated')
+        self.assertEqual((counts['agree'], counts['sad'], total), (0, 1, 1))
+        self.assertEqual(len(statements), 3)
+
+        (action, counts, total), statements = self._toggle('sad')
+        self.assertEqual(action, 'removed')
+        self.assertEqual((counts['sad'], total), (0, 0))
+        self.assertEqual(len(statements), 2)
+        self.assertFalse(Reaction.objects.exists())
+
+    def test_counts_match_reaction_rows(self):
+        others = [User.objects.create_user(f'warga{i}') for i in range(4)]
+        for user, rtype in zip(others, ['agree', 'agree', 'support', 'shock']):
+            self._toggle(rtype, user)
+        self._toggle('confused', others[0])
+        self.assertEqual(_stored_counts(self.report), _actual_counts(self.report))
+
+    def test_missing_report_rolls_back(self):
+        with self.assertRaises(Report.DoesNotExist):
+            toggle_reaction(self.user.id, uuid.uuid4(), 'agree')
+        self.assertFalse(Reaction.objects.exists())
+
+
+class KeysetPaginationTests(TestCase):
+    def test_walk_matches_full_ordering_with_ties(self):
+        author = User.objects.create_user('pelapor')
+        reports = [_make_report(author) for _ in range(14)]
+        # Beberapa laporan dengan created_at sama persis: urutan ditentukan id
+        Report.objects.filter(pk__in=[r.pk for r in reports[3:8]]).update(created_at=reports[3].created_at)
+        expected = list(Report.objects.order_by(*FEED_ORDERING).values_list('pk', flat=True))
+
+        seen, cursor = [], None
+        while True:
+            items, cursor = keyset_page(Report.objects.all(), cursor, per_page=4)
+            seen += [item.pk for item in items]
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_starts_from_first_page(self):
+        author = User.objects.create_user('pelapor')
+        _make_report(author)
+        items, cursor = keyset_page(Report.objects.all(), 'bukan-cursor', per_page=4)
+        self.assertEqual(len(items), 1)
+        self.assertIsNone(cursor)
+
+
+class FeedApiTests(TestCase):
+    def setUp(self):
+        self.url = reverse('reports:feed_api')
+
+    def test_projection_excerpt_and_cursor(self):
+        author = User.objects.create_user('pelapor', first_name='Budi')
+        reports = [_make_report(author) for _ in range(8)]
+        Report.objects.filter(pk=reports[-1].pk).update(description='kata ' * 200)
+
+        data = self.client.get(self.url, secure=True).json()
+        self.assertEqual(data['version'], 1)
+        self.assertEqual(len(data['items']), 6)
+        first = data['items'][0]
+        self.assertEqual(first['id'], str(reports[-1].pk))
+        self.assertLessEqual(len(first['excerpt']), 281)
+        self.assertTrue(first['excerpt'].endswith('…'))
+        self.assertEqual(first['author']['display_name'], 'Budi')
+        self.assertNotIn('description', first)
+
+        rest = self.client.get(self.url, {'cursor': data['next_cursor']}, secure=True).json()
+        self.assertEqual(len(rest['items']), 2)
+        self.assertIsNone(rest['next_cursor'])
+
+    def test_etag_revalidation(self):
+        report = _make_report(User.objects.create_user('pelapor'))
+        response = self.client.get(self.url, secure=True)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(self.url, secure=True, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Report.objects.filter(pk=report.pk).update(agree_count=1, total_reactions=1)
+        self.assertEqual(self.client.get(self.url, secure=True, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user('pelapor', password='rahasia')
+        self.reader = User.objects.create_user('pembaca', password='rahasia')
+        self.report = _make_report(self.author)
+        self.client.login(username='pembaca', password='rahasia')
+
+    def _get(self, url, client=None, **extra):
+        return (client or self.client).get(url, secure=True, **extra)
+
+    def _revalidate(self, url):
+        # Request pertama memasang cookie csrf (bagian dari ETag per pembaca)
+        self._get(url)
+        response = self._get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.templates)
+        etag = response['ETag']
+        return etag, self._get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_feed_is_304_without_rendering(self):
+        etag, response = self._revalidate(reverse('reports:reports'))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.templates)
+        self.assertEqual(response.content, b'')
+
+    def test_reaction_invalidates_feed_and_profile(self):
+        for url in (reverse('reports:reports'), reverse('public_profile', args=['pelapor'])):
+            with self.subTest(url=url):
+                etag, response = self._revalidate(url)
+                self.assertEqual(response.status_code, 304)
+                toggle_reaction(self.reader.pk, self.report.pk, 'agree')
+                response = self._get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+                self.assertTrue(response.templates)
+
+    def test_etag_differs_per_viewer(self):
+        url = reverse('reports:reports')
+        response = self._get(url)
+        self.assertEqual(response.status_code, 200)
+        other = Client()
+        other.login(username='pelapor', password='rahasia')
+        self.assertEqual(self._get(url, other, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class SearchApiTests(TestCase):
+    def setUp(self):
+        self.url = reverse('reports:search_api')
+        self.author = User.objects.create_user('pelapor')
+
+    def _ids(self, **params):
+        response = self.client.get(self.url, params, secure=True)
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['items']]
+
+    def test_query_and_facets(self):
+        wifi = _make_report(self.author)
+        Report.objects.filter(pk=wifi.pk).update(title='Wifi perpustakaan lambat', category='academic')
+        other = _make_report(self.author)
+        hidden = _make_report(self.author)
+        Report.objects.filter(pk=hidden.pk).update(title='Wifi asrama', status='screening')
+
+        self.assertEqual(self._ids(q='wifi'), [str(wifi.pk)])
+        self.assertEqual(self._ids(category='facility'), [str(other.pk)])
+        self.assertEqual(self._ids(q='wifi', category='facility'), [])
+
+    def test_unknown_facet_is_rejected(self):
+        response = self.client.get(self.url, {'status': 'screening'}, secure=True)
+        self.assertEqual(response.status_code, 400)
+
+
+class SearchHelpersTests(SimpleTestCase):
+    """Tanpa database: jalan juga di SQLite, walaupun FullTextSearchTests di-skip."""
+
+    def test_clean_query(self):
+        self.assertEqual(search.clean_query('  wifi \n  lambat\t'), 'wifi lambat')
+        self.assertEqual(search.clean_query(None), '')
+        self.assertEqual(len(search.clean_query('a' * 1000)), search.MAX_QUERY_CHARS)
+
+    def test_parse_facets(self):
+        self.assertEqual(search.parse_facets({'category': ' facility ', 'type': ''}), {'category': 'facility'})
+        for params in ({'status': 'screening'}, {'category': 'kantin'}):
+            with self.subTest(params=params), self.assertRaises(ValueError):
+                search.parse_facets(params)
+
+    def test_ranked_cursor_round_trip(self):
+        # Nilai ts_rank (float4) yang sudah di-cast ke double harus kembali persis sama
+        row = {'rank': struct.unpack('f', struct.pack('f', 0.0607927))[0], 'created_at': timezone.now(), 'id': uuid.uuid4()}
+        self.assertEqual(decode_ranked_cursor(encode_ranked_cursor(row)), (row['rank'], row['created_at'], row['id']))
+        self.assertIsNone(decode_ranked_cursor('bukan-cursor'))
+        self.assertIsNone(decode_ranked_cursor(''))
+
+    def test_postgres_rank_is_cast_to_double(self):
+        # SQL dikompilasi untuk backend PostgreSQL tanpa membuka koneksi
+        from django.db.backends.postgresql.base import DatabaseWrapper as PostgresWrapper
+        offline = PostgresWrapper({**connection.settings_dict, 'NAME': 'offline'}, alias='offline')
+        with mock.patch.object(search, 'connection', offline):
+            queryset, ranked = search.match(Report.objects.public(), 'wifi')
+        sql, _ = feed.project(queryset, 'rank').query.get_compiler(connection=offline).as_sql()
+        self.assertTrue(ranked)
+        self.assertIn('(ts_rank("reports_report".search_vector, websearch_to_tsquery(%s::regconfig, %s)))'
+                      '::double precision AS "rank"', sql)
+        self.assertIn('"reports_report".search_vector @@', sql)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'butuh PostgreSQL (tsvector)')
+class FullTextSearchTests(TestCase):
+    def test_title_match_ranks_first_and_cursor_walks_all(self):
+        author = User.objects.create_user('pelapor')
+        in_description = [_make_report(author) for _ in range(7)]
+        Report.objects.filter(pk__in=[r.pk for r in in_description]).update(description='Parkiran motor penuh setiap pagi')
+        in_title = _make_report(author)
+        Report.objects.filter(pk=in_title.pk).update(title='Parkiran penuh')
+
+        rows, cursor = search.search_rows('parkiran', per_page=4)
+        self.assertEqual(rows[0]['id'], in_title.pk)
+        seen = [row['id'] for row in rows]
+        while cursor:
+            rows, cursor = search.search_rows('parkiran', cursor=cursor, per_page=4)
+            seen += [row['id'] for row in rows]
+        self.assertEqual(sorted(seen), sorted([in_title.pk] + [r.pk for r in in_description]))
+
+    def test_walk_with_tied_ranks_and_created_at(self):
+        # Teks identik -> rank sama persis; sebagian juga created_at sama (tie-break id)
+        author = User.objects.create_user('pelapor')
+        reports = [_make_report(author) for _ in range(11)]
+        Report.objects.filter(pk__in=[r.pk for r in reports]).update(description='Wifi perpustakaan lambat')
+        Report.objects.filter(pk__in=[r.pk for r in reports[2:7]]).update(created_at=reports[2].created_at)
+        expected = list(Report.objects.order_by(*FEED_ORDERING).values_list('pk', flat=True))
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = search.search_rows('wifi', cursor=cursor, per_page=3)
+            seen += [row['id'] for row in rows]
+            if cursor is None:
+                break
+        self.assertEqual(seen, expected)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'butuh PostgreSQL (koneksi paralel)')
+class ReactionToggleConcurrencyTests(TransactionTestCase):
+    """Double-click & banyak user paralel: tidak ada IntegrityError dan counter = isi tabel Reaction."""
+
+    def test_parallel_toggles_keep_counters_exact(self):
+        author = User.objects.create_user('pelapor')
+        report = _make_report(author)
+        users = [User.objects.create_user(f'warga{i}') for i in range(8)]
+        # Setiap user menembak 4 toggle sekaligus (double-click + ganti tipe)
+        jobs = [(user.id, rtype) for user in users for rtype in ('agree', 'agree', 'sad', 'support')]
+        barrier = threading.Barrier(len(jobs))
+        errors = []
+
+        def worker(user_id, rtype):
+            try:
+                barrier.wait()
+                toggle_reaction(user_id, report.id, rtype)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=job) for job in jobs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(_stored_counts(report), _actual_counts(report))
+        self.assertLessEqual(Reaction.objects.filter(report=report).count(), len(users))
@@ -0,0 +1,135 @@
+"""
+Trace per-stage pipeline moderasi (translate, HF spam/toxic, NSFW, dokumen,
+Gemini, ...).
+
+Setiap stage dicatat ke trace yang aktif di context saat ini (contextvars,
+ikut terbawa ke thread pool moderasi lewat submit()), lalu semua baris
+ModerationTrace ditulis sekaligus dengan bulk_create di akhir request /
+screening. Kode di luar trace (misal management command) tetap jalan normal,
+stage-nya saja yang tidak dicatat.
+"""
+import contextvars
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from functools import wraps
+from .models import ModerationTrace
+
+_current = contextvars.ContextVar('moderation_trace', default=None)
+
+
+class Trace:
+    def __init__(self):
+        self.trace_id = uuid.uuid4()
+        self.report_id = None
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def add(self, stage, duration, outcome='ok', score=None, cache='', error=''):
+        row = ModerationTrace(
+            trace_id=self.trace_id,
+            stage=stage,
+            duration_ms=round(duration * 1000, 2),
+            outcome=outcome,
+            score=score,
+            cache=cache,
+            error_class=error,
+        )
+        with self._lock:
+            self.rows.append(row)
+
+    def save(self):
+        with self._lock:
+            rows, self.rows = self.rows, []
+        if not rows:
+            return
+        for row in rows:
+            row.report_id = self.report_id
+        try:
+            ModerationTrace.objects.bulk_create(rows)
+        except Exception as e:
+            print(f"⚠️ Gagal menyimpan moderation trace: {e}")
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def traced(report_id=None):
+    """
+    Mulai trace baru (disimpan saat blok selesai), atau pakai trace yang
+    sudah aktif kalau dipanggil bersarang (disimpan oleh pemilik trace).
+    """
+    trace = _current.get()
+    if trace is not None:
+        if report_id is not None:
+            trace.report_id = report_id
+        yield trace
+        return
+
+    trace = Trace()
+    trace.report_id = report_id
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.save()
+
+
+class _Stage:
+    __slots__ = ('outcome', 'score', 'cache', 'error')
+
+    def __init__(self):
+        self.outcome = 'ok'
+        self.score = None
+        self.cache = ''
+        self.error = ''
+
+
+@contextmanager
+def stage(name):
+    """
+    Ukur satu stage. Pemanggil boleh mengisi .score, .cache ('hit'/'miss')
+    dan .outcome; exception dicatat sebagai outcome 'error' lalu di-raise lagi.
+    """
+    info = _Stage()
+    start = time.perf_counter()
+    try:
+        yield info
+    except Exception as e:
+        info.outcome = 'error'
+        info.error = type(e).__name__
+        raise
+    finally:
+        trace = _current.get()
+        if trace is not None:
+            trace.add(name, time.perf_counter() - start, info.outcome, info.score, info.cache, info.error)
+
+
+def record(name, duration, outcome='ok', score=None, cache='', error=''):
+    """Catat stage yang durasinya sudah diukur sendiri."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, duration, outcome, score, cache, error)
+
+
+def submit(executor, func, *args):
+    """executor.submit yang membawa context (trace aktif) ke worker thread."""
+    return executor.submit(contextvars.copy_context().run, func, *args)
+
+
+def traced_view(stage_name):
+    """Decorator view: semua stage di dalam request masuk satu trace, plus durasi total request."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            with traced():
+                start = time.perf_counter()
+                response = view_func(request, *args, **kwargs)
+                record(stage_name, time.perf_counter() - start, str(response.status_code))
+            return response
+        return wrapper
+    return decorator
@@ -5,8 +5,13 @@ app_name = 'reports'
 
 urlpatterns = [
   path('',views.reports,name="reports"),
+  # Feed JSON berversi (data kartu tanpa HTML)
+  path('api/v1/feed/', views.feed_api, name='feed_api'),
+  # Pencarian full-text + filter category / type / status
+  path('api/v1/search/', views.search_api, name='search_api'),
   # API endpoint for AJAX submission
   path('api/submit/', views.submit_report_api, name="submit_report_api"),
+  path('api/status/<uuid:report_id>/', views.report_status_api, name="report_status_api"),
   path('preview/<uuid:report_id>/', views.preview_file, name='preview_file'),
   path('api/reaction/<uuid:report_id>/', views.toggle_reaction_api, name='toggle_reaction_api'),
 ]
\ No newline at end of file
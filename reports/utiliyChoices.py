@@ -12,11 +12,19 @@ CATEGORY_CHOICES = [
 ]
 
 STATUS_CHOICES = [
+    # Baru masuk, belum lolos moderasi otomatis (tidak tampil di feed)
+    ('screening', 'Screening'),
     ('pending', 'Waiting for Verification'),
     ('verified', 'Verified'),
     ('rejected', 'Rejected'),
 ]
 
+# Alasan penolakan dari moderasi otomatis (Report.moderation_reason)
+MODERATION_REASON_CHOICES = [
+    ('gambling', 'Gambling / Spam'),
+    ('violation', 'Konten Melanggar'),
+]
+
 REACTION_CHOICES = [
         ('agree', '👍 Agree'),
         ('support', '🔥 Support'),
@@ -1,83 +1,360 @@
-import requests
-import pypdf
+import hashlib
+import queue
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future
 from django.conf import settings
 from .api_config_urls import HF_API_URL_NSFW,HF_API_URL_SPAM, HF_API_URL_TOXIC
-from docx import Document
 from deep_translator import GoogleTranslator
-from django.conf import settings
+from webapp import metrics, http_client
+from .caching import LRUCache
+from .langid import is_english
+from .imaging import prepare_image_for_nsfw
+from .extraction import extract_text
+from .spam_filter import get_matcher
+from . import verdict_cache, tracing
+from .models import TranslationCache
 
 headers = {"Authorization": f"Bearer {settings.HUGGINGFACE_API_KEY}"}
 
+# Nama endpoint di webapp.http_client (timeout, retry & circuit breaker per endpoint)
+HF_ENDPOINTS = {
+    HF_API_URL_SPAM: 'spam',
+    HF_API_URL_TOXIC: 'toxic',
+    HF_API_URL_NSFW: 'nsfw',
+}
+
+# Micro-batching: tunggu maksimal beberapa ms untuk mengumpulkan teks lain sebelum kirim
+HF_BATCH_WINDOW = getattr(settings, 'HF_BATCH_WINDOW_MS', 5) / 1000
+HF_BATCH_MAX_SIZE = getattr(settings, 'HF_BATCH_MAX_SIZE', 16)
+
+# Level 1 cache terjemahan (per worker), level 2 ada di tabel TranslationCache
+_translation_cache = LRUCache(
+    maxsize=getattr(settings, 'TRANSLATION_CACHE_SIZE', 2048),
+    ttl=getattr(settings, 'TRANSLATION_CACHE_TTL', 86400),
+)
+metrics.register('translation_cache', lambda: {
+    **_translation_cache.stats(),
+    'db_hits': metrics.get('translation.db_hit'),
+    'db_misses': metrics.get('translation.db_miss'),
+})
+
+def translation_cache_key(text_sample):
+    """Hash dari sample yang dinormalisasi (unicode NFC + whitespace dirapikan)."""
+    normalized = " ".join(unicodedata.normalize('NFC', text_sample).split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def _google_translator():
+    translator = GoogleTranslator(source='auto', target='en')
+    # deep_translator tidak punya parameter base_url, override untuk stub server (bench_submit)
+    if getattr(settings, 'GOOGLE_TRANSLATE_URL', ''):
+        translator._base_url = settings.GOOGLE_TRANSLATE_URL
+    return translator
+
+class TranslationUnavailable(Exception):
+    """Google Translate gagal / kosong; pemanggil memakai teks asli."""
+
+
 def translate_to_english(text):
     """
-    Helper: Translate ID -> EN untuk kebutuhan model Gambling.
-    Maksimal 500 char biar cepat.
+    Helper: Translate ID -> EN untuk model English-only (lihat prepare_text_for_model).
+    Maksimal 500 char biar cepat. Hasil di-cache (LRU in-process -> DB).
+    Raise TranslationUnavailable kalau translate gagal (hasil gagal tidak di-cache).
     """
     if not text: return ""
+    with tracing.stage('translation') as stage:
+        return _translate_cached(text, stage)
+
+def _translate_cached(text, stage):
+    # Cut the text so it doesn't take too long to translate.
+    text_sample = text[:500]
+    key = translation_cache_key(text_sample)
+
+    cached = _translation_cache.get(key)
+    if cached is not None:
+        stage.cache = 'hit'
+        return cached
+
     try:
-        # Cut the text so it doesn't take too long to translate.
-        text_sample = text[:500] 
-        translated = GoogleTranslator(source='auto', target='en').translate(text_sample)
-        return translated
-    except:
-        return text # Fallback: return the original text if it fails
+        cached = TranslationCache.objects.filter(key=key).values_list('translated', flat=True).first()
+    except Exception as e:
+        print(f"⚠️ Translation cache DB error: {e}")
+        cached = None
+    if cached is not None:
+        metrics.incr('translation.db_hit')
+        stage.cache = 'hit'
+        _translation_cache.set(key, cached)
+        return cached
+    metrics.incr('translation.db_miss')
+    stage.cache = 'miss'
 
-def detect_gambling_probability(text):
-    if not text: return 0.0
-    
-    # 1. Gambling WAJIB Translate (Karena modelnya English)
     try:
-        english_text = translate_to_english(text)
-    except:
-        english_text = text # Fallback
+        translated = _google_translator().translate(text_sample)
+    except Exception as e:
+        stage.outcome, stage.error = 'fallback', type(e).__name__
+        raise TranslationUnavailable(type(e).__name__) from e
+    if not translated:
+        stage.outcome = 'fallback'
+        raise TranslationUnavailable('empty')
+
+    _translation_cache.set(key, translated)
     try:
-        response = requests.post(HF_API_URL_SPAM, headers=headers, json={"inputs": english_text}, timeout=10)
+        TranslationCache.objects.get_or_create(key=key, defaults={'translated': translated})
+    except Exception as e:
+        print(f"⚠️ Translation cache DB error: {e}")
+    return translated
+
+def _spam_score(labels):
+    """Cari Label 'SPAM' atau 'LABEL_1' dengan Looping (JANGAN HARDCODE INDEX)"""
+    for item in labels:
+        label = item['label'].upper()
+        if label == 'SPAM' or label == 'LABEL_1':
+            return item['score']
+    return 0.0
+
+def _toxic_score(labels):
+    """Model toxic mengembalikan label teratas di index 0."""
+    return labels[0]['score'] if labels else 0.0
+
+def score_texts(api_url, texts, pick_score, default=0.0, deadline=None):
+    """
+    Batched inference: kirim semua teks untuk satu model dalam satu request
+    {"inputs": [...]} lalu petakan skor kembali ke urutan input.
+    Teks kosong / duplikat tidak ikut dikirim. Error API -> skor `default`.
+    `deadline` diteruskan ke http_client.post (batas retry).
+    """
+    scores = [default] * len(texts)
+    unique_texts = list(dict.fromkeys(t for t in texts if t))
+    if not unique_texts:
+        return scores
+
+    try:
+        response = http_client.post(HF_ENDPOINTS.get(api_url, 'hf'), api_url, deadline=deadline,
+                                    headers=headers, json={"inputs": unique_texts})
         data = response.json()
 
-        # 2. Cek Error API
+        # Cek Error API
         if isinstance(data, dict) and 'error' in data:
-            print(f"⚠️ Gambling API Error: {data['error']}")
-            return 0.0
-
-        # 3. Cari Label 'SPAM' atau 'LABEL_1' dengan Looping (JANGAN HARDCODE INDEX)
-        if isinstance(data, list) and len(data) > 0:
-            # Data biasanya list of list: [[{'label': 'HAM', 'score':..}, ...]]
-            for item in data[0]:
-                label = item['label'].upper()
-                if label == 'SPAM' or label == 'LABEL_1':
-                    print(f"Gambling Score: {item['score']}")
-                    return item['score']
-                    
+            print(f"⚠️ HF API Error ({api_url.rsplit('/', 1)[-1]}): {data['error']}")
+            return scores
+
+        if not isinstance(data, list) or len(data) != len(unique_texts):
+            print(f"⚠️ HF API unexpected batch response: {str(data)[:200]}")
+            return scores
+
+        # Data per input biasanya list of labels: [{'label': 'HAM', 'score':..}, ...]
+        # (beberapa pipeline mengembalikan satu dict saja per input)
+        by_text = {}
+        for text, labels in zip(unique_texts, data):
+            if isinstance(labels, dict):
+                labels = [labels]
+            by_text[text] = float(pick_score(labels))
+
+        scores = [by_text.get(t, default) for t in texts]
+
+    except http_client.CircuitOpenError as e:
+        print(f"⏭️ {e}, pakai skor fallback")
     except Exception as e:
-        print(f"❌ Gambling Check Error: {e}")
-        
-    return 0.0
+        print(f"❌ HF Batch Error: {e}")
+
+    return scores
+
+
+class MicroBatcher:
+    """
+    Menggabungkan teks dari beberapa thread (cek moderasi paralel / submission
+    bersamaan) yang datang dalam jendela beberapa milidetik menjadi satu
+    request batched ke HF.
+    """
+
+    def __init__(self, api_url, pick_score, window=0.005, max_batch=16):
+        self.api_url = api_url
+        self.pick_score = pick_score
+        self.window = window
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def score(self, text):
+        """Skor satu teks, None jika API gagal (supaya tidak masuk verdict cache)."""
+        if not text: return None
+        future = Future()
+        # Thread batcher tidak membawa context pemanggil, deadline ikut di antrian
+        self._queue.put((text, future, http_client.current_deadline()))
+        self._ensure_thread()
+        return future.result()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True, name='hf-batcher')
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            # Deadline terlama di batch: pemanggil yang deadline-nya lebih dulu habis sudah berhenti menunggu
+            deadlines = [item_deadline for _, _, item_deadline in batch]
+            batch_deadline = None if None in deadlines else max(deadlines)
+            scores = score_texts(self.api_url, [text for text, _, _ in batch], self.pick_score,
+                                 default=None, deadline=batch_deadline)
+            for (_, future, _), value in zip(batch, scores):
+                future.set_result(value)
+
+
+_spam_batcher = MicroBatcher(HF_API_URL_SPAM, _spam_score, window=HF_BATCH_WINDOW, max_batch=HF_BATCH_MAX_SIZE)
+_toxic_batcher = MicroBatcher(HF_API_URL_TOXIC, _toxic_score, window=HF_BATCH_WINDOW, max_batch=HF_BATCH_MAX_SIZE)
+
+# Model spam (bert-tiny) hanya paham English; model toxic (XLM-R) multilingual
+ENGLISH_ONLY_MODELS = {HF_API_URL_SPAM}
+
+metrics.register('language_routing', lambda: {
+    'translated': metrics.get('langid.translated'),
+    # Translate gagal -> teks asli dinilai model English-only, skor tidak di-cache
+    'translate_fallback': metrics.get('langid.translate_fallback'),
+    'skipped_english': metrics.get('langid.skipped_english'),
+    'skipped_multilingual': metrics.get('langid.skipped_multilingual'),
+    'skip_ratio': round(
+        (metrics.get('langid.skipped_english') + metrics.get('langid.skipped_multilingual'))
+        / max(1, metrics.get('langid.translated') + metrics.get('langid.skipped_english') + metrics.get('langid.skipped_multilingual')),
+        4,
+    ),
+})
+
+def prepare_text_for_model(text, api_url):
+    """
+    Translate hanya jika model target English-only DAN teks belum English
+    (dideteksi offline lewat langid). Sample tetap dipotong 500 karakter.
+
+    Mengembalikan (teks_model, degraded). degraded True kalau translate gagal
+    dan teks asli (Indonesia) terpaksa dinilai model English-only: skornya
+    dipakai untuk request ini saja, jangan disimpan ke verdict cache.
+    """
+    if not text: return "", False
+    if api_url not in ENGLISH_ONLY_MODELS:
+        metrics.incr('langid.skipped_multilingual')
+        return text[:500], False
+    if is_english(text):
+        metrics.incr('langid.skipped_english')
+        return text[:500], False
+    metrics.incr('langid.translated')
+    try:
+        return translate_to_english(text), False
+    except Exception:
+        metrics.incr('langid.translate_fallback')
+        return text, True # Fallback
+
+def detect_gambling_probability(text):
+    if not text: return 0.0
+    with tracing.stage('hf_spam') as stage:
+        # Spam judol yang jelas tidak perlu translate + HF sama sekali
+        if get_matcher().is_obvious_spam(text):
+            metrics.incr('spam_prefilter.hit')
+            stage.cache, stage.score = 'prefilter', 1.0
+            return 1.0
+
+        # Teks yang sama persis (setelah normalisasi) sudah pernah dinilai
+        cached = verdict_cache.lookup('spam', text)
+        if cached is not None:
+            stage.cache, stage.score = 'hit', cached
+            return cached
+
+        # Gambling WAJIB English (modelnya English), translate kalau perlu
+        english_text, degraded = prepare_text_for_model(text, HF_API_URL_SPAM)
+        score = _spam_batcher.score(english_text)
+        # Skor dari teks yang gagal di-translate tidak di-cache (dinilai ulang setelah translate pulih)
+        if score is not None and not degraded:
+            verdict_cache.store('spam', text, score)
+        print(f"Gambling Score: {score}")
+        stage.cache, stage.score = 'miss', score
+        if score is None:
+            stage.outcome = 'fallback'
+        return score or 0.0
 
 def detect_toxicity_probability(text):
     """
     Returns a float (0.0 to 1.0) representing how toxic the text is.
     """
     if not text: return 0.0
-    english_text = translate_to_english(text)
-    respone = requests.post(HF_API_URL_TOXIC, headers=headers, json={"inputs": english_text})
-    data = respone.json()
-    scoreToxic = data[0][0]['score']
-    print(f"toxicty probabilty score {scoreToxic}")
-    return scoreToxic
+    with tracing.stage('hf_toxic') as stage:
+        cached = verdict_cache.lookup('toxic', text)
+        if cached is not None:
+            stage.cache, stage.score = 'hit', cached
+            return cached
+
+        model_text, degraded = prepare_text_for_model(text, HF_API_URL_TOXIC)
+        score = _toxic_batcher.score(model_text)
+        if score is not None and not degraded:
+            verdict_cache.store('toxic', text, score)
+        print(f"toxicty probabilty score {score}")
+        stage.cache, stage.score = 'miss', score
+        if score is None:
+            stage.outcome = 'fallback'
+        return score or 0.0
+
+def _score_with_verdict_cache(endpoint, api_url, texts, pick_score):
+    """Verdict cache dulu, sisanya satu request batch ke HF lalu disimpan ke cache."""
+    known = verdict_cache.lookup_many(endpoint, texts)
+    misses = list(dict.fromkeys(t for t in texts if t and t not in known))
+    if misses:
+        prepared = [prepare_text_for_model(t, api_url) for t in misses]
+        fresh = score_texts(api_url, [model_text for model_text, _ in prepared], pick_score, default=None)
+        fresh = dict(zip(misses, fresh))
+        # Hanya skor dari teks yang berhasil disiapkan (translate tidak gagal) yang di-cache
+        verdict_cache.store_many(endpoint, {
+            t: score for (t, score), (_, degraded) in zip(fresh.items(), prepared) if not degraded
+        })
+        known.update({t: score for t, score in fresh.items() if score is not None})
+    return [known.get(t, 0.0) if t else 0.0 for t in texts]
+
+def detect_gambling_probabilities(texts):
+    """Versi batch: satu request HF untuk semua teks, urutan skor = urutan input."""
+    matcher = get_matcher()
+    obvious = [bool(t) and matcher.is_obvious_spam(t) for t in texts]
+    # Teks yang sudah pasti spam tidak ikut dikirim (string kosong di-skip)
+    scores = _score_with_verdict_cache(
+        'spam', HF_API_URL_SPAM, ["" if spam else t for t, spam in zip(texts, obvious)], _spam_score,
+    )
+    return [1.0 if spam else score for score, spam in zip(scores, obvious)]
+
+def detect_toxicity_probabilities(texts):
+    """Versi batch dari detect_toxicity_probability."""
+    return _score_with_verdict_cache('toxic', HF_API_URL_TOXIC, texts, _toxic_score)
 
 def detect_image_vulgarity(image_file):
     """
     Returns a float (0.0 to 1.0) representing NSFW probability.
     """
     if not image_file: return 0.0
+    return score_image_nsfw(image_file) or 0.0
+
+def score_image_nsfw(image_file):
+    """
+    Sama seperti detect_image_vulgarity, tapi mengembalikan None kalau API
+    gagal (supaya fallback 0.0 tidak ikut disimpan ke cache pHash).
+    """
+    if not image_file: return None
 
     # Accept either a Django UploadedFile (InMemoryUploadedFile / TemporaryUploadedFile)
-    # or a file path string. For uploaded files, use the file-like object's read()
-    # and then reset the pointer so callers can still save the file.
+    # or a file path string. Gambar di-downscale ke resolusi model (224px) dan
+    # di-encode ulang sebelum upload; pointer file asli di-reset supaya
+    # caller tetap bisa menyimpan file ke storage.
     try:
         if hasattr(image_file, 'read'):
             # Django InMemoryUploadedFile or similar
-            image_data = image_file.read()
+            image_data = prepare_image_for_nsfw(image_file)
             # reset pointer for later use
             try:
                 image_file.seek(0)
@@ -86,21 +363,21 @@ def detect_image_vulgarity(image_file):
         else:
             # Treat as file path
             with open(image_file, 'rb') as f:
-                image_data = f.read()
+                image_data = prepare_image_for_nsfw(f)
 
         if not image_data:
-            return 0.0
+            return None
 
-        resp = requests.post(HF_API_URL_NSFW, headers={'Content-Type': 'application/octet-stream', **headers}, data=image_data, timeout=30)
+        resp = http_client.post('nsfw', HF_API_URL_NSFW, headers={'Content-Type': 'application/octet-stream', **headers}, data=image_data)
         if resp.status_code != 200:
             print(f"HF NSFW API returned status {resp.status_code}: {resp.text[:500]}")
-            return 0.0
+            return None
 
         try:
             result = resp.json()
         except ValueError as e:
             print(f"Error decoding HF NSFW JSON: {e}; raw: {resp.text[:500]}")
-            return 0.0
+            return None
 
         # Result format can vary; try to extract a reasonable NSFW score.
         # If it's a list of labels, search for common NSFW labels.
@@ -127,45 +404,13 @@ def detect_image_vulgarity(image_file):
                 image_file.seek(0)
         except Exception:
             pass
-        return 0.0
+        return None
 
 def extract_text_from_document(uploaded_file):
     """
     Mengekstrak teks dari file PDF, DOCX, atau TXT.
     Mengembalikan string (maksimal 1000 karakter untuk efisiensi API).
+    Parsing PDF/DOCX berjalan di process pool dengan timeout & batas memori
+    (lihat reports/extraction.py); pointer file selalu di-reset ke awal.
     """
-    text_content = ""
-    filename = uploaded_file.name.lower()
-
-    try:
-        # 1. Handle PDF
-        if filename.endswith('.pdf'):
-            reader = pypdf.PdfReader(uploaded_file)
-            # Ambil maksimal 2 halaman pertama saja (Sampling)
-            max_pages = min(len(reader.pages), 2) 
-            for i in range(max_pages):
-                page_text = reader.pages[i].extract_text()
-                if page_text:
-                    text_content += page_text + "\n"
-
-        # 2. Handle DOCX
-        elif filename.endswith('.docx'):
-            doc = Document(uploaded_file)
-            # Gabungkan semua paragraf
-            text_content = "\n".join([p.text for p in doc.paragraphs])
-
-        # 3. Handle TXT
-        elif filename.endswith('.txt'):
-            text_content = uploaded_file.read().decode('utf-8', errors='ignore')
-
-        # PENTING: Reset pointer file agar bisa disimpan ke DB/Storage nantinya
-        uploaded_file.seek(0)
-        
-        # TRUNCATE: Potong teks agar tidak overload API Hugging Face
-        # 1000 
-        return text_content[:1000] 
-
-    except Exception as e:
-        print(f"Error parsing document: {e}")
-        uploaded_file.seek(0) # Tetap reset pointer meski error
-        return ""
\ No newline at end of file
+    return extract_text(uploaded_file, max_chars=1000)
@@ -0,0 +1,94 @@
+"""
+Verdict cache moderasi berbasis fingerprint konten.
+
+Fingerprint = sha256 dari teks yang dinormalisasi (huruf kecil, tanda baca
+dibuang, spasi dirapatkan), jadi "SLOT gacor!!" dan "slot  gacor" dianggap
+sama. Disimpan per endpoint model di tabel ModerationVerdict dengan TTL dan
+batas jumlah baris.
+"""
+import hashlib
+import re
+import unicodedata
+from webapp import metrics
+from .db_cache import DBCache
+from .models import ModerationVerdict
+
+_PUNCTUATION = re.compile(r'[\W_]+', re.UNICODE)
+
+cache = DBCache(ModerationVerdict, 'VERDICT_CACHE', default_ttl=7 * 86400, default_max_rows=100000)
+
+
+def fingerprint(text):
+    normalized = unicodedata.normalize('NFKC', text).casefold()
+    normalized = " ".join(_PUNCTUATION.sub(' ', normalized).split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def lookup_many(endpoint, texts):
+    """Kembalikan {text: score} untuk teks yang sudah punya verdict belum kadaluarsa."""
+    fingerprints = {t: fingerprint(t) for t in texts if t}
+    if not fingerprints:
+        return {}
+    unique = set(fingerprints.values())
+
+    try:
+        found = dict(cache.fresh().filter(
+            endpoint=endpoint,
+            fingerprint__in=unique,
+        ).values_list('fingerprint', 'score'))
+        if found:
+            cache.record_hits(ModerationVerdict.objects.filter(endpoint=endpoint, fingerprint__in=list(found)))
+    except Exception as e:
+        print(f"⚠️ Verdict cache DB error: {e}")
+        return {}
+
+    metrics.incr(f'verdict_cache.{endpoint}.hit', len(found))
+    metrics.incr(f'verdict_cache.{endpoint}.miss', len(unique) - len(found))
+    return {t: found[fp] for t, fp in fingerprints.items() if fp in found}
+
+
+def lookup(endpoint, text):
+    return lookup_many(endpoint, [text]).get(text)
+
+
+def store_many(endpoint, scores):
+    """Simpan {text: score}. Skor None (API gagal / fallback) tidak disimpan."""
+    rows = {}
+    for text, score in scores.items():
+        if text and score is not None:
+            fp = fingerprint(text)
+            rows[fp] = ModerationVerdict(fingerprint=fp, endpoint=endpoint, score=score, sample=text[:120])
+    if not rows:
+        return
+
+    try:
+        # Entry kadaluarsa dengan fingerprint sama dihapus dulu supaya bisa diisi ulang
+        ModerationVerdict.objects.filter(
+            endpoint=endpoint, fingerprint__in=list(rows), created_at__lt=cache.expiry(),
+        ).delete()
+        ModerationVerdict.objects.bulk_create(rows.values(), ignore_conflicts=True)
+        cache.maybe_evict()
+    except Exception as e:
+        print(f"⚠️ Verdict cache DB error: {e}")
+
+
+def store(endpoint, text, score):
+    store_many(endpoint, {text: score})
+
+
+def evict(max_rows=None):
+    return cache.evict(max_rows)
+
+
+def stats():
+    return {
+        endpoint: {
+            'hits': metrics.get(f'verdict_cache.{endpoint}.hit'),
+            'misses': metrics.get(f'verdict_cache.{endpoint}.miss'),
+            'hit_ratio': metrics.ratio(f'verdict_cache.{endpoint}.hit', f'verdict_cache.{endpoint}.miss'),
+        }
+        for endpoint in ('spam', 'toxic')
+    }
+
+
+metrics.register('verdict_cache', stats)
@@ -1,78 +1,119 @@
 from django.shortcuts import render,get_object_or_404
-from django.core.paginator import Paginator
-from django.template.loader import render_to_string
 from django.http import JsonResponse
 from django.http import HttpResponse, Http404
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_POST, require_GET
+from django.conf import settings
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.core.cache import cache
-from .models import Report,Reaction
-from .utils import (
-    detect_gambling_probability, 
-    detect_toxicity_probability, 
-    detect_image_vulgarity, 
-    extract_text_from_document
-)
-from profiles.utils import get_avatar_url
-# Import Utility Baru
-from .gemini_utils import generate_report_metadata
+from .models import Report, REACTION_COUNT_FIELDS
+from .screening import create_screened_report, index_image, status_payload, REJECTION_MESSAGES
+from .spam_filter import prefilter_gambling
+from . import card_cache, feed, search, tracing
+from .reactions import toggle_reaction
+from .pagination import keyset_page
+from webapp import metrics
+from webapp.conditional import conditional_view
+from webapp.ratelimit import rate_limit
+from profiles.utils import get_avatar_urls
 # Create your views here.
+import json
 import os
 import mimetypes
 
+def _feed_state(request):
+    # AJAX (JSON berisi HTML kartu) dan halaman penuh punya ETag berbeda
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    return is_ajax, feed.page_state(request.GET.get('cursor'))
+
+
+@conditional_view('reports', _feed_state)
 def reports(request):
     # 1. Query Dasar (Belum dieksekusi/Lazy)
-    qs = Report.objects.select_related('author').prefetch_related('reactions').order_by('-created_at')
+    # Counter reaction sudah ada di kolom Report, jadi reactions tidak perlu di-prefetch
+    qs = Report.objects.public().select_related('author', 'author__profile')
 
-    # 2. SETUP PAGINATOR (6 Postingan per halaman)
-    paginator = Paginator(qs, 6) 
-    page_number = request.GET.get('page', 1) # Ambil nomor halaman dari URL (default 1)
-    page_obj = paginator.get_page(page_number)
+    # 2. KEYSET PAGINATION (6 Postingan per halaman, tanpa COUNT(*) / OFFSET)
+    # JS mengirim balik `cursor` dari respons sebelumnya (lihat reports/pagination.py)
+    page_items, next_cursor = keyset_page(qs, request.GET.get('cursor'), per_page=6)
 
-    # 3. IMPORT SOCIAL ACCOUNT (Sama seperti sebelumnya)
-    try:
-        from allauth.socialaccount.models import SocialAccount
-    except ImportError:
-        SocialAccount = None
+    # 3. AVATAR SEMUA AUTHOR SEKALIGUS (cache + maksimal 1 query SocialAccount)
+    avatars = get_avatar_urls([r.author for r in page_items])
 
     # 4. PROCESS HANYA 6 ITEM (Optimasi Kinerja)
     final_reports_list = []
     
-    for r in page_obj: # Loop hanya berjalan 6 kali
+    for r in page_items: # Loop hanya berjalan 6 kali
         # --- A. Logic Avatar ---
         author_name = r.author.get_full_name() or r.author.username
-        avatar_url = get_avatar_url(r.author)
 
         setattr(r, 'author_display_name', author_name)
-        setattr(r, 'author_avatar_url', avatar_url)
-
-        # --- B. Logic Reaction ---
-        all_reactions = r.reactions.all()
-        r.agree_count = sum(1 for x in all_reactions if x.type == 'agree')
-        r.support_count = sum(1 for x in all_reactions if x.type == 'support')
-        r.sad_count = sum(1 for x in all_reactions if x.type == 'sad')
-        r.shock_count = sum(1 for x in all_reactions if x.type == 'shock')
-        r.confused_count = sum(1 for x in all_reactions if x.type == 'confused')
-        r.total_reactions_count = len(all_reactions)
+        setattr(r, 'author_avatar_url', avatars.get(r.author_id, ""))
 
         final_reports_list.append(r)
 
+    # HTML kartu dari fragment cache + overlay per pembaca (reports/card_cache.py)
+    cards_html = card_cache.render_cards(final_reports_list, request)
+
     # 5. CEK: APAKAH INI REQUEST SCROLLING (AJAX)?
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        # Render potongan HTML kartu saja (bukan seluruh halaman)
-        html = render_to_string('reports/includes/report_list_chunk.html', {'reports_list': final_reports_list}, request=request)
-        
+        # Potongan HTML kartu saja (bukan seluruh halaman)
         return JsonResponse({
-            'html': html,
-            'has_next': page_obj.has_next() # Beritahu JS apakah masih ada halaman berikutnya
+            'html': cards_html,
+            'has_next': next_cursor is not None, # Beritahu JS apakah masih ada halaman berikutnya
+            'next_cursor': next_cursor,
         })
 
     # 6. JIKA BUKAN AJAX (Halaman Pertama dibuka biasa)
     return render(request, 'reports/indexForReports.html', {
         'reports_list': final_reports_list,
-        'has_next': page_obj.has_next() # Untuk inisialisasi JS
+        'cards_html': cards_html,
+        'has_next': next_cursor is not None, # Untuk inisialisasi JS
+        'next_cursor': next_cursor or '',
     })
 
+def _feed_api_state(request):
+    return feed.FEED_API_VERSION, feed.page_state(request.GET.get('cursor'))
+
+
+@require_GET
+@conditional_view('feed_api', _feed_api_state, per_viewer=False)
+def feed_api(request):
+    """
+    Feed JSON berversi (alternatif HTML chunk): hanya field yang dipakai
+    kartu, plus cursor halaman berikutnya. Tidak bergantung pada pembaca, jadi
+    ETag-nya sama untuk semua client.
+    """
+    rows, next_cursor = feed.feed_rows(request.GET.get('cursor'))
+    return JsonResponse({
+        'version': feed.FEED_API_VERSION,
+        'items': feed.serialize(rows),
+        'has_next': next_cursor is not None,
+        'next_cursor': next_cursor,
+    }, json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+
+@require_GET
+def search_api(request):
+    """
+    Pencarian laporan: ?q= (full-text, urut relevansi) dan/atau filter
+    category / type / status. Item sama dengan feed JSON; cursor dari
+    `next_cursor` respons sebelumnya.
+    """
+    try:
+        facets = search.parse_facets(request.GET)
+    except ValueError as e:
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
+
+    query = search.clean_query(request.GET.get('q'))
+    rows, next_cursor = search.search_rows(query, facets, request.GET.get('cursor'))
+    return JsonResponse({
+        'version': feed.FEED_API_VERSION,
+        'query': query,
+        'filters': facets,
+        'items': feed.serialize(rows),
+        'has_next': next_cursor is not None,
+        'next_cursor': next_cursor,
+    }, json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')})
+
 def preview_file(request, report_id):
     report = get_object_or_404(Report, pk=report_id)
     
@@ -98,31 +139,23 @@ def preview_file(request, report_id):
     
     return response
 
+def _report_not_saved(response):
+    # Hanya submission yang tersimpan (punya ticket) yang dihitung ke rate limit
+    return response.status_code >= 400 and 'ticket' not in json.loads(response.content)
+
+
 @require_POST
+@rate_limit(
+    'submit_report', limit=1, period=300, refund_if=_report_not_saved,
+    message='Sistem spam lagi tahap pengembangan. Untuk saat ini, mohon batasi pengiriman laporan menjadi 1 kali setiap 5 menit.',
+)
+@tracing.traced_view('request')
 def submit_report_api(request):
     """
-    Handles report submission with a 3-layer filtering system.
+    Handles report submission. Laporan disimpan sebagai 'screening' dan
+    dikembalikan ticket untuk polling ke report_status_api.
     """
 
-    # =========================================================
-    # RATE LIMIT 3x / 5 MENIT (BERDASARKAN USER LOGIN)
-    # =========================================================
-    user_id = request.user.id if request.user.is_authenticated else request.META.get('REMOTE_ADDR')
-    cache_key = f"submit_report_{user_id}"
-
-    submit_count = cache.get(cache_key, 0)
-
-    if submit_count >= 1:
-        return JsonResponse({
-            'status': 'rejected',
-            'reason': 'rate_limit',
-            'message': 'Sistem spam lagi tahap pengembangan. Untuk saat ini, mohon batasi pengiriman laporan menjadi 1 kali setiap 5 menit.'
-        }, status=429)
-
-    # -------------------------------
-    # LANJUT KE LOGIKA KAMU ASLI
-    # -------------------------------
-
     # 1. Extract Data
     title = request.POST.get('title', '')
     description = request.POST.get('description', '')
@@ -135,93 +168,58 @@ def submit_report_api(request):
         return JsonResponse({'status': 'error', 'message': 'Deskripsi laporan wajib diisi.'}, status=400)
 
     # =========================================================
-    # PHASE 1: FAIL-FAST (GAMBLING DETECTION)
+    # PHASE 0: PRE-FILTER JUDOL OFFLINE (tanpa network)
+    # Hanya spam yang pasti (ada istilah kuat: "slot gacor", "maxwin", ...)
+    # yang langsung ditolak. Borderline (istilah lemah saja) tetap disimpan
+    # dan diperiksa model HF oleh worker screening seperti laporan lain.
     # =========================================================
 
-    gambling_score_title = detect_gambling_probability(title)
-    gambling_score_desc = detect_gambling_probability(description)
-
-    if gambling_score_title + gambling_score_desc > 0.25:
+    with tracing.stage('prefilter') as stage:
+        spam_verdict, spam_score, spam_terms = prefilter_gambling(title, description)
+        stage.score = spam_score
+    if spam_verdict == 'borderline':
+        metrics.incr('spam_prefilter.borderline')
+    if spam_verdict == 'spam':
+        metrics.incr('spam_prefilter.rejected')
+        print(f"Pre-filter judol: {spam_score} {spam_terms}")
         return JsonResponse({
             'status': 'rejected',
             'reason': 'gambling',
-            'message': 'System detected gambling or spam content. Submission rejected.'
+            'message': REJECTION_MESSAGES['gambling']
         }, status=400)
 
     # =========================================================
-    # PHASE 2: WEIGHTED PENALTY SYSTEM
-    # =========================================================
-
-    toxic_score_title = detect_toxicity_probability(title)
-    toxic_score_desc = detect_toxicity_probability(description)
-
-    attachment_penalty_score = 0.0
-
-    if attachment:
-        content_type = attachment.content_type
-        filename = attachment.name.lower()
-
-        if content_type.startswith('image/'):
-            attachment_penalty_score = detect_image_vulgarity(attachment)
-
-        elif filename.endswith(('.pdf', '.docx', '.txt')):
-            extracted_text = extract_text_from_document(attachment)
-
-            if extracted_text:
-                attachment_penalty_score = detect_toxicity_probability(extracted_text)
-
-    weighted_score = (toxic_score_title * 0.2) + \
-                     (toxic_score_desc * 0.4) + \
-                     (attachment_penalty_score * 0.4)
-
-    if weighted_score > 0.42:
-        return JsonResponse({
-            'status': 'rejected',
-            'reason': 'violation',
-            'message': 'Laporan mengandung konten yang melanggar aturan.'
-        }, status=400)
-
-    # =========================================================
-    # PHASE 3: AI PROCESSING
+    # PHASE 1: MODERASI + SIMPAN
+    # Default (misal di Vercel, tanpa worker): moderasi (gambling, toxicity,
+    # lampiran di memori) dulu, lalu laporan disimpan dengan status akhirnya.
+    # REPORT_SCREENING_ASYNC: simpan sebagai 'screening', moderation_worker
+    # yang memeriksa. Ringkasan Gemini menyusul (reports/enrichment.py).
     # =========================================================
 
+    fields = {
+        'author': request.user,
+        'title': title,
+        'description': description,
+        'type': report_type,
+        'category': category,
+    }
     try:
-        ai_data = generate_report_metadata(description, title)
-
-        final_title = ai_data.get('final_title', title)
-        final_summary = ai_data.get('summary', '')
-        final_sentiment = ai_data.get('sentiment', 'Netral')
-
-        # =========================================================
-        # PHASE 4: SAVE TO DATABASE
-        # =========================================================
-
-        new_report = Report.objects.create(
-            author=request.user,
-            title=final_title,
-            description=description,
-            type=report_type,
-            category=category,
-            attachment=attachment,
-            ai_summary=final_summary,
-            sentiment_score=final_sentiment,
-            status='pending'
-        )
-
-        # =========================================================
-        # UPDATE RATE LIMIT COUNTER (SETELAH BERHASIL SAVE)
-        # =========================================================
-
-        if submit_count == 0:
-            cache.set(cache_key, 1, timeout=300)  # 5 menit
+        if settings.REPORT_SCREENING_ASYNC:
+            new_report = Report.objects.create(**fields, attachment=attachment, status='screening')
+            tracing.current().report_id = new_report.id
+            index_image(new_report, attachment)
         else:
-            cache.incr(cache_key)
+            new_report, _ = create_screened_report(attachment=attachment, **fields)
 
-        return JsonResponse({
-            'status': 'success',
-            'message': 'Laporan berhasil dikirim!',
-            'redirect_url': '/reports/'
-        })
+        payload = status_payload(new_report.status, new_report.moderation_reason)
+        payload['ticket'] = str(new_report.id)
+        payload['status_url'] = reverse('reports:report_status_api', args=[new_report.id])
+
+        if new_report.status == 'screening':
+            return JsonResponse(payload, status=202)
+        if new_report.status == 'rejected':
+            return JsonResponse(payload, status=400)
+        return JsonResponse(payload)
 
     except Exception as e:
         print(f"Error Saving Report: {e}")
@@ -230,6 +228,19 @@ def submit_report_api(request):
             'message': 'Terjadi kesalahan sistem saat menyimpan laporan.'
         }, status=500)
 
+@require_GET
+def report_status_api(request, report_id):
+    """
+    Polling status screening (dipanggil base.js setelah submit).
+    Hanya pemilik laporan yang boleh melihat status laporannya.
+    """
+    row = Report.objects.filter(pk=report_id).values('status', 'moderation_reason', 'author_id').first()
+
+    if not row or row['author_id'] != request.user.id:
+        return JsonResponse({'status': 'error', 'message': 'Laporan tidak ditemukan.'}, status=404)
+
+    return JsonResponse(status_payload(row['status'], row['moderation_reason']))
+
 # PERBAIKAN: Tambahkan parameter 'report_id' di sini agar cocok dengan URL
 @login_required
 @require_POST
@@ -251,47 +262,12 @@ def toggle_reaction_api(request, report_id):
     
     if not rtype:
         return JsonResponse({'status': 'error', 'message': 'Missing reaction type'}, status=400)
+    if rtype not in REACTION_COUNT_FIELDS:
+        return JsonResponse({'status': 'error', 'message': 'Invalid reaction type'}, status=400)
 
-    # 3. Ambil Report dari Database
-    report = get_object_or_404(Report, pk=report_id)
-
-    # 4. Logika Toggle (Simpan/Hapus/Update)
+    # 3. Toggle + counter terbaru dalam satu transaksi (lihat reports/reactions.py)
     try:
-        existing = Reaction.objects.filter(user=request.user, report=report).first()
-        
-        if existing:
-            if existing.type == rtype:
-                # Jika tipe sama -> Hapus (Unlike)
-                existing.delete()
-                action = 'removed'
-            else:
-                # Jika tipe beda -> Ganti
-                existing.type = rtype
-                existing.save()
-                action = 'updated'
-        else:
-            # Belum ada -> Buat baru
-            Reaction.objects.create(user=request.user, report=report, type=rtype)
-            action = 'created'
-
-        # 5. Hitung Ulang Jumlah (Agar UI Update Realtime)
-        # Kita hitung manual dari DB agar akurat
-        # (Alternatif: Gunakan related_name jika sudah diset di models)
-        
-        # Ambil semua reaksi laporan ini
-        reactions = report.reactions.all()
-        
-        counts = {
-            'agree': reactions.filter(type='agree').count(),
-            'support': reactions.filter(type='support').count(),
-            'sad': reactions.filter(type='sad').count(),
-            'shock': reactions.filter(type='shock').count(),
-            'confused': reactions.filter(type='confused').count(),
-        }
-        
-        # Hitung total
-        total_reactions = reactions.count()
-
+        action, counts, total_reactions = toggle_reaction(request.user.id, report_id, rtype)
         return JsonResponse({
             'status': 'success',
             'action': action,
@@ -299,6 +275,8 @@ def toggle_reaction_api(request, report_id):
             'total_reactions': total_reactions
         })
 
+    except Report.DoesNotExist:
+        raise Http404('Report not found')
     except Exception as e:
         print(f"Reaction Error: {e}")
         return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
\ No newline at end of file
@@ -125,6 +125,11 @@ if (window.__colsp_base_js_loaded) {
               setReportModalStage("error", { message: data.message || "Server error." });
               return;
             }
+            if (res.status === 202 && data.status_url) {
+              // Laporan tersimpan, moderasi jalan di background -> polling status
+              pollReportStatus(data.status_url);
+              return;
+            }
             if (res.ok) {
               setReportModalStage("success", {
                 message: data.message || "Report sent!",
@@ -148,6 +153,45 @@ if (window.__colsp_base_js_loaded) {
       });
     }
 
+    // --- 4b. Polling Status Screening ---
+    function pollReportStatus(statusUrl, attempt = 0) {
+      // Maks ~2 menit (60 x 2 detik), setelah itu anggap masih diproses
+      if (attempt >= 60) {
+        setReportModalStage("success", {
+          message: "Laporan diterima dan masih diperiksa. Cek profil Anda nanti.",
+        });
+        return;
+      }
+
+      setTimeout(() => {
+        fetch(statusUrl, { headers: { "X-Requested-With": "XMLHttpRequest" } })
+          .then(async (res) => {
+            const data = await res.json().catch(() => ({}));
+
+            if (!res.ok) {
+              setReportModalStage("error", { message: data.message || "Server error." });
+              return;
+            }
+            if (data.status === "screening") {
+              pollReportStatus(statusUrl, attempt + 1);
+              return;
+            }
+            if (data.status === "rejected") {
+              setReportModalStage("error", { message: data.message || "Submission rejected." });
+              return;
+            }
+            setReportModalStage("success", {
+              message: data.message || "Report sent!",
+              redirect: data.redirect_url,
+            });
+            setTimeout(() => {
+              window.location.href = data.redirect_url || "/reports/";
+            }, 1400);
+          })
+          .catch(() => pollReportStatus(statusUrl, attempt + 1));
+      }, 2000);
+    }
+
     // --- 5. Report Modal Helpers ---
     function openReportModal() {
       const modal = document.getElementById("report-result-modal");
@@ -331,6 +375,11 @@ if (window.__colsp_base_js_loaded) {
       const btn = typeof btnElement === "string" ? document.querySelector(btnElement) : btnElement;
       const actualBtn = btn.closest('button');
       if (btn.disabled) return;
+      // Akun guest (ditandai server di kartu feed): langsung minta verifikasi tanpa request
+      if (actualBtn.dataset.guestRestricted !== undefined) {
+        openOtpModal();
+        return;
+      }
       actualBtn.style.opacity = "0.7";
       btn.disabled = true;
       btn.style.opacity = "0.5";
@@ -660,6 +709,8 @@ function handleChatSubmit(e) {
                     .replace(/\n/g, '<br>')
                     .replace(/\*\*(.*?)\*\*/g, '<b>$1</b>'); 
                 appendBotMessage(formatted);
+            } else if (data.reason === "rate_limit") {
+                appendBotMessage(data.message);
             } else {
                 appendBotMessage("Maaf, saya tidak mengerti.");
             }
@@ -0,0 +1,94 @@
+"""
+Conditional GET (ETag) untuk halaman yang mahal dirender.
+
+Validator dihitung dari query kecil (aggregate / kolom kunci saja) sebelum
+view dijalankan. Kalau cocok dengan If-None-Match, view tidak dipanggil sama
+sekali: tidak ada queryset utama, resolve avatar, maupun render template,
+client langsung dapat 304 tanpa body.
+
+Halaman HTML ikut memuat data pembaca (sidebar, csrf token, tombol reaction
+aktif), jadi untuk view `per_viewer` ETag juga memuat user, versi avatar /
+nama / status guest-nya dan cookie csrf. Teks "x menit lalu" di halaman yang
+dijawab 304 memang tidak diperbarui sampai ada perubahan data.
+
+Rasio 304 per view terlihat di /metrics/ (bagian 'conditional_get').
+"""
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from webapp import metrics
+
+_views = []
+
+
+def viewer_state(request):
+    """Bagian ETag yang bergantung pada pembaca."""
+    csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return ('anon', csrf)
+    profile = getattr(user, 'profile', None)
+    return (
+        user.pk, user.first_name, user.last_name,
+        getattr(profile, 'avatar_version', None), getattr(profile, 'is_guest', None),
+        csrf,
+    )
+
+
+def make_etag(name, state):
+    raw = repr((getattr(settings, 'ETAG_VERSION', ''), name, state))
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def conditional_view(name, validator, per_viewer=True):
+    """
+    Decorator: `validator(request, *args, **kwargs)` mengembalikan state kecil
+    (tuple) yang berubah setiap kali isi halaman berubah.
+    """
+    _views.append(name)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not getattr(settings, 'CONDITIONAL_GET_ENABLED', True):
+                return view(request, *args, **kwargs)
+
+            state = validator(request, *args, **kwargs)
+            if per_viewer:
+                state = (state, viewer_state(request))
+            etag = make_etag(name, state)
+
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                metrics.incr(f'conditional.{name}.not_modified')
+            else:
+                metrics.incr(f'conditional.{name}.full')
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            response['ETag'] = etag
+            # no-cache: browser tetap revalidasi setiap kali (jawabannya 304 kalau tidak berubah)
+            patch_cache_control(response, no_cache=True)
+            if per_viewer:
+                patch_cache_control(response, private=True)
+                patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
+
+
+def stats():
+    data = {}
+    for name in _views:
+        data[name] = {
+            'not_modified': metrics.get(f'conditional.{name}.not_modified'),
+            'full': metrics.get(f'conditional.{name}.full'),
+            'ratio_304': metrics.ratio(f'conditional.{name}.not_modified', f'conditional.{name}.full'),
+        }
+    return data
+
+
+metrics.register('conditional_get', stats)
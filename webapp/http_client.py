@@ -0,0 +1,278 @@
+"""
+Client HTTP bersama untuk semua panggilan model eksternal (HF router dkk).
+
+- Satu requests.Session dengan connection pool per host (keep-alive, TLS
+  tidak dibuka ulang di setiap panggilan).
+- Timeout per endpoint (connect, read).
+- Retry dengan exponential backoff + jitter untuk error sementara, dibatasi
+  sisa waktu deadline pemanggil (time_budget(), mis. deadline moderasi).
+- Circuit breaker per endpoint: kalau endpoint sedang rusak, panggilan
+  langsung gagal cepat (CircuitOpenError) dan pemanggil memakai fallback
+  skornya sendiri tanpa menahan worker.
+"""
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+from . import metrics
+
+# Status yang layak di-retry (model loading / rate limit / gateway)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+ENDPOINTS = {
+    # name: timeout (connect, read), retries, failure_threshold, reset_timeout (detik)
+    'spam':  {'timeout': (3, 10), 'retries': 2, 'failure_threshold': 5, 'reset_timeout': 30},
+    'toxic': {'timeout': (3, 10), 'retries': 2, 'failure_threshold': 5, 'reset_timeout': 30},
+    'nsfw':  {'timeout': (3, 30), 'retries': 1, 'failure_threshold': 3, 'reset_timeout': 60},
+    'embed': {'timeout': (3, 20), 'retries': 2, 'failure_threshold': 5, 'reset_timeout': 30},
+}
+DEFAULT_ENDPOINT = {'timeout': (3, 10), 'retries': 1, 'failure_threshold': 5, 'reset_timeout': 30}
+
+BACKOFF_BASE = 0.3
+BACKOFF_MAX = 4.0
+
+
+class CircuitOpenError(Exception):
+    """Endpoint sedang dianggap down, panggilan tidak dikirim."""
+
+
+class DeadlineExceeded(requests.Timeout):
+    """Deadline pemanggil sudah lewat sebelum request dikirim."""
+
+
+# Deadline absolut (time.monotonic()) untuk semua post() di context ini
+_deadline = contextvars.ContextVar('http_deadline', default=None)
+
+
+@contextmanager
+def time_budget(seconds):
+    """
+    Semua post() di dalam blok ini (termasuk retry) selesai dalam `seconds`
+    detik. Ikut terbawa ke thread lain lewat contextvars.copy_context()
+    (lihat reports/tracing.submit).
+    """
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline():
+    return _deadline.get()
+
+
+class CircuitBreaker:
+    """
+    closed -> (failure_threshold kegagalan berturut-turut) -> open
+    open -> (setelah reset_timeout) -> half_open: satu panggilan percobaan
+    half_open -> sukses: closed, gagal: open lagi
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.times_opened = 0
+        # Thread yang sedang menjalankan panggilan percobaan half-open
+        self._probe_thread = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = 'half_open'
+                self._probe_thread = None
+            if self.state == 'half_open':
+                if self._probe_thread is not None:
+                    self.rejected += 1
+                    return False
+                self._probe_thread = threading.get_ident()
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._probe_thread = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_thread = None
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.times_opened += 1
+                    print(f"⚠️ Circuit '{self.name}' OPEN setelah {self.failures} kegagalan")
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def release_probe(self):
+        """
+        Panggilan percobaan milik thread ini berakhir tanpa record_success /
+        record_failure (exception di luar requests): state tetap half_open dan
+        panggilan berikutnya boleh mencoba lagi.
+        """
+        with self._lock:
+            if self._probe_thread == threading.get_ident():
+                self._probe_thread = None
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'consecutive_failures': self.failures,
+            'times_opened': self.times_opened,
+            'rejected_calls': self.rejected,
+        }
+
+
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16, max_retries=0)
+_session.mount('https://', _adapter)
+_session.mount('http://', _adapter)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint):
+    with _breakers_lock:
+        if endpoint not in _breakers:
+            config = ENDPOINTS.get(endpoint, DEFAULT_ENDPOINT)
+            _breakers[endpoint] = CircuitBreaker(endpoint, config['failure_threshold'], config['reset_timeout'])
+        return _breakers[endpoint]
+
+
+def _backoff(attempt, retry_after=None):
+    """Full jitter: random(0, base * 2^attempt), dibatasi BACKOFF_MAX."""
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX)
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _remaining(deadline):
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _clamp_timeout(timeout, remaining):
+    """Timeout (connect, read) tidak melebihi sisa waktu deadline."""
+    if remaining is None:
+        return timeout
+    if isinstance(timeout, tuple):
+        return tuple(min(value, remaining) for value in timeout)
+    return min(timeout, remaining)
+
+
+def _can_retry(endpoint, deadline, delay):
+    """Masih ada waktu untuk backoff `delay` detik plus satu percobaan lagi?"""
+    remaining = _remaining(deadline)
+    if remaining is None or remaining > delay:
+        return True
+    metrics.incr(f'http.{endpoint}.deadline_exhausted')
+    print(f"⏱️ {endpoint} deadline habis, retry dihentikan")
+    return False
+
+
+def post(endpoint, url, deadline=None, **kwargs):
+    """
+    POST lewat session bersama dengan timeout, retry dan circuit breaker
+    milik `endpoint`. Mengembalikan Response (status terakhir jika semua
+    retry gagal), atau raise CircuitOpenError / DeadlineExceeded /
+    exception requests.
+
+    `deadline` (time.monotonic() absolut, default dari time_budget()):
+    timeout tiap percobaan dipotong ke sisa waktu dan retry berhenti kalau
+    backoff berikutnya sudah melewati deadline.
+    """
+    config = ENDPOINTS.get(endpoint, DEFAULT_ENDPOINT)
+    if deadline is None:
+        deadline = current_deadline()
+    remaining = _remaining(deadline)
+    if remaining is not None and remaining <= 0:
+        # Pemanggil sudah tidak menunggu; jangan kirim (dan jangan hitung sebagai kegagalan endpoint)
+        metrics.incr(f'http.{endpoint}.deadline_exceeded')
+        raise DeadlineExceeded(f"Deadline '{endpoint}' sudah lewat")
+
+    breaker = get_breaker(endpoint)
+    if not breaker.allow():
+        metrics.incr(f'http.{endpoint}.short_circuited')
+        raise CircuitOpenError(f"Circuit '{endpoint}' sedang open")
+
+    timeout = kwargs.pop('timeout', config['timeout'])
+    retries = config['retries']
+
+    try:
+        for attempt in range(retries + 1):
+            metrics.incr(f'http.{endpoint}.requests')
+            try:
+                response = _session.post(url, timeout=_clamp_timeout(timeout, _remaining(deadline)), **kwargs)
+            except requests.RequestException as e:
+                metrics.incr(f'http.{endpoint}.errors')
+                retryable = isinstance(e, (requests.ConnectionError, requests.Timeout))
+                delay = _backoff(attempt)
+                if attempt >= retries or not retryable or not _can_retry(endpoint, deadline, delay):
+                    breaker.record_failure()
+                    raise
+                print(f"⚠️ {endpoint} {type(e).__name__}, retry {attempt + 1}/{retries}")
+                time.sleep(delay)
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                metrics.incr(f'http.{endpoint}.errors')
+                delay = _backoff(attempt, _retry_after(response))
+                if attempt >= retries or not _can_retry(endpoint, deadline, delay):
+                    breaker.record_failure()
+                    return response
+                print(f"⚠️ {endpoint} HTTP {response.status_code}, retry {attempt + 1}/{retries}")
+                time.sleep(delay)
+                continue
+
+            breaker.record_success()
+            return response
+    finally:
+        # Exception selain requests (bug parsing, KeyboardInterrupt, ...) tidak boleh
+        # membuat circuit tertahan di half_open dengan probe yang tidak pernah selesai
+        breaker.release_probe()
+
+
+def connection_stats():
+    """Jumlah koneksi baru vs request per host (reuse tinggi = keep-alive jalan)."""
+    stats = {}
+    pools = _adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool is None:
+            continue
+        requests_made = pool.num_requests
+        stats[f"{key.key_scheme}://{key.key_host}"] = {
+            'connections_opened': pool.num_connections,
+            'requests': requests_made,
+            'reuse_ratio': round(1 - pool.num_connections / requests_made, 4) if requests_made else 0.0,
+        }
+    return stats
+
+
+def stats():
+    with _breakers_lock:
+        breakers = {name: breaker.stats() for name, breaker in _breakers.items()}
+    return {'pools': connection_stats(), 'breakers': breakers}
+
+
+metrics.register('outbound_http', stats)
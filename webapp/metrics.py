@@ -0,0 +1,44 @@
+"""
+Counter & gauge in-process sederhana untuk observasi performa.
+
+Setiap gunicorn worker punya angka sendiri; lihat lewat /metrics/ (staff only).
+Modul lain bisa mendaftarkan provider (fungsi yang mengembalikan dict),
+misalnya statistik cache, supaya ikut tampil di snapshot.
+"""
+import threading
+
+_lock = threading.Lock()
+_counters = {}
+_providers = {}
+
+
+def incr(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def get(name):
+    return _counters.get(name, 0)
+
+
+def ratio(hit_name, miss_name):
+    """Rasio hit / (hit + miss), 0.0 jika belum ada data."""
+    hits, misses = get(hit_name), get(miss_name)
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+def register(name, provider):
+    """Daftarkan callable tanpa argumen yang mengembalikan dict statistik."""
+    _providers[name] = provider
+
+
+def snapshot():
+    with _lock:
+        data = {'counters': dict(sorted(_counters.items()))}
+    for name, provider in _providers.items():
+        try:
+            data[name] = provider()
+        except Exception as e:
+            data[name] = {'error': str(e)}
+    return data
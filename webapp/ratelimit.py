@@ -0,0 +1,205 @@
+"""
+Rate limiter lintas worker (GCRA) dengan state di database.
+
+Cache LocMem hanya per proses, jadi dengan beberapa gunicorn worker / lambda
+Vercel limit efektifnya jadi N kali lipat, dan pola get -> set bisa race.
+Di sini state disimpan di tabel bersama `ratelimit_bucket` (UNLOGGED di
+PostgreSQL: tidak ditulis ke WAL, isinya boleh hilang saat crash) dan setiap
+request cukup satu statement upsert atomik.
+
+GCRA (Generic Cell Rate Algorithm): setiap key menyimpan `tat` (theoretical
+arrival time). Dengan limit L per periode P, interval emisi T = P / L.
+Request pada waktu `now` diterima jika max(tat, now) + T - now <= P, lalu
+tat digeser ke max(tat, now) + T. Hasilnya L request boleh burst, dan
+kuota kembali bertahap (sliding), bukan reset per jendela tetap.
+
+Pemakaian:
+
+    @rate_limit('submit_report', limit=1, period=300)
+    def submit_report_api(request): ...
+"""
+import time
+from functools import wraps
+from django.conf import settings
+from django.db import connection, connections, transaction, DatabaseError, DEFAULT_DB_ALIAS
+from django.http import JsonResponse
+from . import metrics
+
+TABLE = 'ratelimit_bucket'
+
+_DDL = {
+    'postgresql': f"""
+        CREATE UNLOGGED TABLE IF NOT EXISTS {TABLE} (
+            key varchar(200) PRIMARY KEY,
+            tat double precision NOT NULL,
+            updated_at double precision NOT NULL
+        )
+    """,
+    'default': f"""
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            key varchar(200) PRIMARY KEY,
+            tat double precision NOT NULL,
+            updated_at double precision NOT NULL
+        )
+    """,
+}
+
+# `now` diambil dari jam database di PostgreSQL supaya semua worker memakai
+# jam yang sama; backend lain (SQLite untuk development) memakai jam proses.
+_NOW = {
+    'postgresql': 'extract(epoch from clock_timestamp())',
+    'default': '%(now)s',
+}
+_GREATEST = {
+    'postgresql': 'GREATEST',
+    'default': 'MAX',
+}
+
+_UPSERT = """
+    INSERT INTO {table} AS b (key, tat, updated_at)
+    VALUES (%(key)s, {now} + %(interval)s, {now})
+    ON CONFLICT (key) DO UPDATE
+        SET tat = {greatest}(b.tat, EXCLUDED.updated_at) + %(interval)s,
+            updated_at = EXCLUDED.updated_at
+        WHERE {greatest}(b.tat, EXCLUDED.updated_at) + %(interval)s - EXCLUDED.updated_at <= %(period)s
+    RETURNING tat
+"""
+_RETRY_AFTER = """
+    SELECT tat - %(period)s + %(interval)s - {now} FROM {table} WHERE key = %(key)s
+"""
+_REFUND = """
+    UPDATE {table} SET tat = tat - %(interval)s WHERE key = %(key)s
+"""
+_PURGE = """
+    DELETE FROM {table} WHERE tat < {now}
+"""
+
+
+def _sql(template):
+    vendor = connection.vendor
+    return template.format(
+        table=TABLE,
+        now=_NOW.get(vendor, _NOW['default']),
+        greatest=_GREATEST.get(vendor, _GREATEST['default']),
+    )
+
+
+def create_table(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Dipanggil dari post_migrate (lihat reports/apps.py); aman dijalankan berulang."""
+    db = connections[using]
+    with db.cursor() as cursor:
+        cursor.execute(_DDL.get(db.vendor, _DDL['default']))
+
+
+def _execute(sql, params):
+    params = {**params, 'now': time.time()}
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(_sql(sql), params)
+            return cursor.fetchone() if cursor.description else None
+    except DatabaseError:
+        # Tabel belum ada (migrate belum jalan di database ini): buat lalu ulangi sekali
+        create_table()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(_sql(sql), params)
+            return cursor.fetchone() if cursor.description else None
+
+
+def hit(key, limit, period):
+    """
+    Catat satu request untuk `key`. Mengembalikan (allowed, retry_after_detik).
+    Satu statement upsert: row lock ON CONFLICT membuat request paralel
+    untuk key yang sama diserialisasi, jadi limit tepat.
+    """
+    params = {'key': key[:200], 'interval': period / limit, 'period': period}
+    if _execute(_UPSERT, params) is not None:
+        return True, 0.0
+    row = _execute(_RETRY_AFTER, params)
+    return False, max(0.0, row[0]) if row else 0.0
+
+
+def refund(key, limit, period):
+    """Kembalikan satu kuota (misal request gagal validasi dan tidak dihitung)."""
+    _execute(_REFUND, {'key': key[:200], 'interval': period / limit, 'period': period})
+
+
+def purge():
+    """Hapus bucket yang kuotanya sudah penuh kembali (tat di masa lalu)."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_sql(_PURGE), {'now': time.time()})
+        return cursor.rowcount
+
+
+def client_ip(request):
+    """
+    IP client asli. Di belakang proxy (Vercel, load balancer) REMOTE_ADDR adalah
+    alamat proxy, jadi IP diambil dari X-Forwarded-For: entry ke-N dari kanan,
+    N = RATELIMIT_PROXY_HOPS (jumlah proxy tepercaya yang menambahkan entry).
+    Entry di sebelah kirinya dikirim client sendiri dan bisa dipalsukan.
+    """
+    hops = getattr(settings, 'RATELIMIT_PROXY_HOPS', 1)
+    forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    if hops > 0 and forwarded:
+        return forwarded[-min(hops, len(forwarded))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def user_or_ip(request):
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+def user_or_session(request):
+    """User login, lalu session browser; IP hanya kalau belum ada session sama sekali."""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    session_key = getattr(getattr(request, 'session', None), 'session_key', None)
+    return f"session:{session_key}" if session_key else f"ip:{client_ip(request)}"
+
+
+def rate_limit(name, limit, period, key=user_or_ip, refund_if=None, message=None):
+    """
+    Decorator view. `key(request)` menentukan siapa yang dibatasi (default
+    user login, atau IP untuk anonim); key kosong tidak dibatasi.
+    `refund_if(response)` -> True untuk request yang tidak dihitung.
+    Request yang ditolak mendapat 429 + header Retry-After.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'RATELIMIT_ENABLED', True):
+                return view_func(request, *args, **kwargs)
+            ident = key(request)
+            if not ident:
+                return view_func(request, *args, **kwargs)
+
+            bucket = f"{name}:{ident}"
+            try:
+                allowed, retry_after = hit(bucket, limit, period)
+            except DatabaseError as e:
+                # Database bermasalah: jangan blokir user karena limiter
+                print(f"⚠️ Rate limiter error: {e}")
+                return view_func(request, *args, **kwargs)
+
+            if not allowed:
+                metrics.incr(f'ratelimit.{name}.rejected')
+                response = JsonResponse({
+                    'status': 'rejected',
+                    'reason': 'rate_limit',
+                    'retry_after': int(retry_after) + 1,
+                    'message': message or f'Terlalu banyak permintaan. Coba lagi dalam {int(retry_after) + 1} detik.',
+                }, status=429)
+                response['Retry-After'] = str(int(retry_after) + 1)
+                return response
+
+            metrics.incr(f'ratelimit.{name}.allowed')
+            response = view_func(request, *args, **kwargs)
+            if refund_if is not None and refund_if(response):
+                try:
+                    refund(bucket, limit, period)
+                except DatabaseError as e:
+                    print(f"⚠️ Rate limiter error: {e}")
+            return response
+        return wrapper
+    return decorator
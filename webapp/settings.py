@@ -165,9 +165,65 @@ SOCIALACCOUNT_PROVIDERS = {
 
 
 HUGGINGFACE_API_KEY = os.getenv('HUGGINGFACE_API_KEY')
+# Jendela micro-batching (ms) dan ukuran batch maksimal untuk inference teks HF
+HF_BATCH_WINDOW_MS = float(os.getenv('HF_BATCH_WINDOW_MS', 5))
+HF_BATCH_MAX_SIZE = int(os.getenv('HF_BATCH_MAX_SIZE', 16))
+# Pre-processing gambar sebelum cek NSFW (sisi terpendek px, format JPEG/WEBP, kualitas)
+NSFW_IMAGE_SIZE = int(os.getenv('NSFW_IMAGE_SIZE', 224))
+NSFW_IMAGE_FORMAT = os.getenv('NSFW_IMAGE_FORMAT', 'JPEG')
+NSFW_IMAGE_QUALITY = int(os.getenv('NSFW_IMAGE_QUALITY', 85))
+# Cache terjemahan in-process (jumlah entry & TTL detik); tabel DB dibersihkan via prune_translation_cache
+TRANSLATION_CACHE_SIZE = int(os.getenv('TRANSLATION_CACHE_SIZE', 2048))
+TRANSLATION_CACHE_TTL = int(os.getenv('TRANSLATION_CACHE_TTL', 86400))
+# Verdict cache moderasi di DB (TTL detik & batas jumlah baris)
+VERDICT_CACHE_TTL = int(os.getenv('VERDICT_CACHE_TTL', 7 * 86400))
+VERDICT_CACHE_MAX_ROWS = int(os.getenv('VERDICT_CACHE_MAX_ROWS', 100000))
+# Ekstraksi teks PDF/DOCX di worker process (jumlah proses, timeout detik per dokumen, batas memori MB per proses)
+DOCUMENT_EXTRACT_WORKERS = int(os.getenv('DOCUMENT_EXTRACT_WORKERS', 2))
+DOCUMENT_EXTRACT_TIMEOUT = int(os.getenv('DOCUMENT_EXTRACT_TIMEOUT', 5))
+DOCUMENT_EXTRACT_MEMORY_MB = int(os.getenv('DOCUMENT_EXTRACT_MEMORY_MB', 512))
+# Enrichment Gemini setelah commit (jumlah thread & retry untuk error kuota/5xx), lihat juga ENRICHMENT_INLINE
+ENRICHMENT_MAX_WORKERS = int(os.getenv('ENRICHMENT_MAX_WORKERS', 2))
+ENRICHMENT_MAX_RETRIES = int(os.getenv('ENRICHMENT_MAX_RETRIES', 4))
+# Cache respons Gemini di DB (TTL detik & batas jumlah baris)
+GEMINI_CACHE_TTL = int(os.getenv('GEMINI_CACHE_TTL', 30 * 86400))
+GEMINI_CACHE_MAX_ROWS = int(os.getenv('GEMINI_CACHE_MAX_ROWS', 20000))
+# Override endpoint Gemini & Google Translate (misal stub server bench_submit); kosong = endpoint asli.
+# URL Hugging Face diatur lewat HF_ROUTER_URL di reports/api_config_urls.py
+GEMINI_BASE_URL = os.getenv('GEMINI_BASE_URL', '')
+GOOGLE_TRANSLATE_URL = os.getenv('GOOGLE_TRANSLATE_URL', '')
 
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
+# Moderation executor (reports/moderation.py)
+# Jumlah thread bersama untuk cek HF/translate, dan deadline total per submission (detik)
+MODERATION_MAX_WORKERS = int(os.getenv('MODERATION_MAX_WORKERS', 8))
+MODERATION_DEADLINE_SECONDS = float(os.getenv('MODERATION_DEADLINE_SECONDS', 20))
+# False (default): screening dijalankan langsung di request, deploy Vercel tidak punya worker
+# True: submit hanya menyimpan laporan 'screening', diproses oleh `manage.py moderation_worker`;
+# hanya aktifkan kalau worker benar-benar jalan, kalau tidak laporan tertahan di 'screening'
+REPORT_SCREENING_ASYNC = os.getenv('REPORT_SCREENING_ASYNC', 'False') == 'True'
+# True: enrichment Gemini dijalankan di request (thread background dibekukan di Vercel setelah response);
+# False: thread pool, hanya untuk proses yang hidup lama. Default mengikuti mode screening
+ENRICHMENT_INLINE = os.getenv('ENRICHMENT_INLINE', str(not REPORT_SCREENING_ASYNC)) == 'True'
+ENRICHMENT_INLINE_MAX_RETRIES = int(os.getenv('ENRICHMENT_INLINE_MAX_RETRIES', 1))
+# Rate limit submit laporan / chat / OTP / guest login (webapp/ratelimit.py), state di tabel ratelimit_bucket
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True') == 'True'
+# Jumlah proxy tepercaya di depan app (Vercel = 1): IP client diambil dari X-Forwarded-For, bukan REMOTE_ADDR
+RATELIMIT_PROXY_HOPS = int(os.getenv('RATELIMIT_PROXY_HOPS', 1))
+# Per IP dibuat longgar karena satu NAT kampus / asrama dipakai banyak mahasiswa;
+# OTP juga dibatasi per email dan per user / session
+RATELIMIT_GUEST_LOGIN_PER_HOUR = int(os.getenv('RATELIMIT_GUEST_LOGIN_PER_HOUR', 60))
+RATELIMIT_OTP_IP_PER_HOUR = int(os.getenv('RATELIMIT_OTP_IP_PER_HOUR', 60))
+RATELIMIT_OTP_SESSION_PER_10_MIN = int(os.getenv('RATELIMIT_OTP_SESSION_PER_10_MIN', 5))
+RATELIMIT_OTP_EMAIL_PER_10_MIN = int(os.getenv('RATELIMIT_OTP_EMAIL_PER_10_MIN', 3))
+# Lama HTML kartu laporan disimpan di fragment cache feed (detik), lihat reports/card_cache.py
+CARD_CACHE_TTL = int(os.getenv('CARD_CACHE_TTL', 3600))
+# Conditional GET (ETag + 304) untuk feed & halaman profil, lihat webapp/conditional.py
+CONDITIONAL_GET_ENABLED = os.getenv('CONDITIONAL_GET_ENABLED', 'True') == 'True'
+# Ikut di setiap ETag; ganti saat deploy (misal git sha) supaya template baru tidak tertahan 304
+ETAG_VERSION = os.getenv('ETAG_VERSION', '1')
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 if os.environ.get('VERCEL'):
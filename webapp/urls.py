@@ -8,6 +8,7 @@ from profiles import views as account_views
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.index, name='index'),
+    path('metrics/', views.metrics, name='metrics'),
     path('accounts/', include('allauth.urls')),
     # Reports pages and API
     path('reports/', include('reports.urls')),
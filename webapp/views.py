@@ -1,4 +1,12 @@
 from django.shortcuts import render
+from django.http import JsonResponse
+from django.contrib.admin.views.decorators import staff_member_required
+from . import metrics as app_metrics
 
 def index(request):
-  return render(request, 'index.html')
\ No newline at end of file
+  return render(request, 'index.html')
+
+@staff_member_required
+def metrics(request):
+  """Snapshot counter & statistik cache worker yang melayani request ini."""
+  return JsonResponse(app_metrics.snapshot())